@@ -1,11 +1,30 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers import market_analysis, cache, history
+from services.http_client import http_client
+from services.cache_service import cache_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ouvre le pool HTTP partagé au démarrage, le ferme proprement à l'arrêt
+    await http_client.get_client()
+    # Envoi périodique des hits du cache, puis un dernier envoi à l'arrêt
+    hit_flusher = asyncio.create_task(cache_service.run_hit_flusher())
+    yield
+    hit_flusher.cancel()
+    await asyncio.gather(hit_flusher, return_exceptions=True)
+    cache_service.flush_hits()
+    await http_client.aclose()
+
 
 app = FastAPI(
     title="Joblyx API",
     description="Job market analysis API for Canada",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
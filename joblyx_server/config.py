@@ -12,4 +12,48 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
 
+# Extracteur de skills : "groq" (LLM) ou "local" (matcher Aho-Corasick)
+SKILLS_EXTRACTOR = os.getenv("SKILLS_EXTRACTOR", "groq")
+
+# Limites du compte Groq (les tokens/minute sont resynchronisés via les headers)
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "30000"))
+# Attente maximale (secondes) d'une capacité Groq avant repli sur le matcher local
+GROQ_MAX_WAIT = float(os.getenv("GROQ_MAX_WAIT", "30"))
+# Appels Groq simultanés pour tout le process (toutes analyses confondues)
+GROQ_MAX_CONCURRENT = int(os.getenv("GROQ_MAX_CONCURRENT", "4"))
+
+# Pool HTTP partagé (JSearch, SerpAPI) : keep-alive et plafond par hôte
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+
+# Hedging JSearch -> SerpAPI : SerpAPI est lancé en parallèle quand JSearch
+# dépasse ce percentile de sa latence récente (délai fixe sans historique)
+JOB_SEARCH_HEDGING = os.getenv("JOB_SEARCH_HEDGING", "true").lower() == "true"
+JOB_SEARCH_HEDGE_PERCENTILE = float(os.getenv("JOB_SEARCH_HEDGE_PERCENTILE", "95"))
+JOB_SEARCH_HEDGE_DELAY = float(os.getenv("JOB_SEARCH_HEDGE_DELAY", "8"))
+# Fan-out : interroger JSearch et SerpAPI ensemble et fusionner (marchés peu fournis)
+JOB_SEARCH_FAN_OUT = os.getenv("JOB_SEARCH_FAN_OUT", "false").lower() == "true"
+
+# Similarité (Jaccard estimé) à partir de laquelle deux descriptions sont
+# considérées comme la même offre et la copie n'est pas analysée
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+
+# Ancienneté max des offres réutilisées depuis le stockage local
+POSTING_STORE_MAX_AGE_DAYS = int(os.getenv("POSTING_STORE_MAX_AGE_DAYS", "30"))
+
+# Cache mémoire devant la table search_cache (par process) : taille max, durée de
+# vie max d'une entrée et durée pendant laquelle une absence est mémorisée
+CACHE_MEMORY_MAX_BYTES = int(os.getenv("CACHE_MEMORY_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_MEMORY_MAX_TTL = float(os.getenv("CACHE_MEMORY_MAX_TTL", "3600"))
+CACHE_NEGATIVE_TTL = float(os.getenv("CACHE_NEGATIVE_TTL", "30"))
+# Après expiration, une analyse reste servie (marquée périmée) pendant cette
+# durée, le temps qu'un recalcul en arrière-plan la remplace
+CACHE_STALE_WINDOW = float(os.getenv("CACHE_STALE_WINDOW", "86400"))
+# Les hits du cache sont comptés en mémoire et envoyés en un seul appel RPC
+# au plus tard toutes les CACHE_HIT_FLUSH_INTERVAL secondes
+CACHE_HIT_FLUSH_INTERVAL = float(os.getenv("CACHE_HIT_FLUSH_INTERVAL", "30"))
+
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
@@ -13,7 +13,11 @@ class MarketAnalysisResponse(BaseModel):
     total_jobs_analyzed: int
     top_skills: list[SkillInfo]
     message: str | None = None
+    provider: str | None = None
+    duplicates_removed: int = 0
     from_cache: bool = False
+    stale: bool = False
+    cache_age: int | None = None
 
 
 class SkillsByCategoryResponse(BaseModel):
@@ -21,4 +25,8 @@ class SkillsByCategoryResponse(BaseModel):
     location: str
     total_jobs_analyzed: int
     skills_by_category: dict[str, list[dict]]
+    provider: str | None = None
+    duplicates_removed: int = 0
     from_cache: bool = False
+    stale: bool = False
+    cache_age: int | None = None
@@ -13,3 +13,9 @@ async def get_cache_stats():
 async def cleanup_cache():
     deleted = cache_service.clear_expired()
     return {"deleted_entries": deleted}
+
+# Vide le cache mémoire du process (les entrées Supabase sont conservées)
+@router.post("/invalidate")
+async def invalidate_memory_cache():
+    cache_service.invalidate_all()
+    return {"message": "Memory cache cleared"}
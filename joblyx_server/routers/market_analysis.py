@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Query, Header, HTTPException
 from data.models import MarketAnalysisResponse, SkillsByCategoryResponse
-from services.market_analysis import market_analyzer
+from services.market_analysis import market_analyzer, job_search_service, ExtractionScheduler
 from services.user import user_history_service, user_quota
 from services.auth import get_user_id_from_token
 
@@ -18,6 +18,13 @@ async def get_optional_user_id(authorization: str = Header(None)) -> str | None:
         return None
 
 
+def extraction_weight(user_id: str | None) -> int:
+    """Les utilisateurs authentifiés sont prioritaires pour les appels LLM"""
+    if user_id:
+        return ExtractionScheduler.AUTHENTICATED_WEIGHT
+    return ExtractionScheduler.DEFAULT_WEIGHT
+
+
 @router.get("/analyze", response_model=MarketAnalysisResponse)
 async def analyze_market(
     job: str = Query(..., description="Job title (e.g., 'Software Developer')"),
@@ -49,7 +56,8 @@ async def analyze_market(
             city=city,
             province=province,
             top_n=top_n,
-            balanced=balanced
+            balanced=balanced,
+            weight=extraction_weight(user_id)
         )
 
         # Enregistrer usage + historique si authentifié et recherche réussie
@@ -98,7 +106,8 @@ async def analyze_market_by_category(
         result = await market_analyzer.get_skills_by_category(
             query=job,
             city=city,
-            province=province
+            province=province,
+            weight=extraction_weight(user_id)
         )
 
         # Enregistrer usage + historique si authentifié et recherche réussie
@@ -127,3 +136,8 @@ async def analyze_market_by_category(
 async def get_quota_stats(authorization: str = Header(..., description="Bearer token")):
     user_id = await get_user_id_from_token(authorization)
     return user_quota.get_stats(user_id)
+
+# Retourne l'état de santé des providers d'offres (disjoncteurs, latences)
+@router.get("/providers")
+async def get_providers_health():
+    return job_search_service.get_provider_health()
@@ -1,81 +1,204 @@
-from datetime import datetime
-from config import supabase
+import time
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from config import supabase, CACHE_NEGATIVE_TTL, CACHE_STALE_WINDOW, CACHE_HIT_FLUSH_INTERVAL
+from services.memory_cache import MemoryCache
+from services.query_canonicalizer import query_canonicalizer
 
 class CacheService:
-    #Récupère les résultats du cache
-    def get_cache_results(self, query: str, city: str, province: str) -> dict | None:
+    """
+    Cache des analyses de marché : table Supabase search_cache, précédée
+    d'un cache mémoire (LRU borné en octets) qui sert les marchés populaires
+    sans aller-retour réseau et mémorise brièvement les absences.
+    Une entrée expirée reste disponible, marquée périmée, pendant la
+    fenêtre CACHE_STALE_WINDOW. Les hits sont comptés en mémoire et envoyés
+    par lots (RPC record_cache_hits) : une lecture n'écrit jamais en base.
+    """
 
+    def __init__(self, memory: MemoryCache | None = None, stale_window: float = CACHE_STALE_WINDOW):
+        self.memory = memory or MemoryCache()
+        self.stale_window = stale_window
+        # Hits en attente par clé canonique (colonne unique search_key)
+        self._pending_hits: Counter[str] = Counter()
+        self._hits_lock = threading.Lock()
+
+    @staticmethod
+    def _timestamp(expires_at: str | None) -> float | None:
+        """expires_at en timestamp (None si absente ou illisible)"""
+        if not expires_at:
+            return None
         try:
+            return datetime.fromisoformat(expires_at).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    def _serve(self, entry: dict, allow_stale: bool) -> dict | None:
+        """Copie des résultats (l'appelant annote from_cache), None si périmés et refusés"""
+        results = dict(entry["results"])
+        now = time.time()
+        if results.get("cached_at"):
+            results["cache_age"] = int(now - results["cached_at"])
+
+        expires_at = entry.get("expires_at")
+        if expires_at is None or expires_at > now:
+            return results
+        if not allow_stale:
+            return None
+
+        results["stale"] = True
+        return results
+
+    #Récupère les résultats du cache (allow_stale : accepte une entrée expirée dans la fenêtre)
+    def get_cache_results(self, query: str, city: str, province: str, allow_stale: bool = False) -> dict | None:
+
+        # Clé canonique : "Sr. Dev / QC" et "Senior Developer / Québec" partagent l'entrée
+        key = query_canonicalizer.key(query, city, province)
+
+        found, cached = self.memory.get(key)
+        if found:
+            if cached is None:
+                print(f"Cache miss (memory): {query} - {city} ({province})")
+                return None
+            served = self._serve(cached, allow_stale)
+            if served is not None:
+                if not served.get("stale"):
+                    self._record_hit(key)
+                print(f"Cache hit (memory): {query} - {city} ({province})")
+            return served
+
+        try:
+            # Égalité sur la colonne unique : au plus une ligne, même avec des lignes héritées
             result = supabase.table("search_cache") \
-                .select("id, results") \
-                .ilike("query", query) \
-                .ilike("city", city) \
-                .ilike("province", province) \
-                .gte("expires_at", datetime.now().isoformat()) \
-                .limit(1) \
+                .select("id, results, expires_at") \
+                .eq("search_key", key) \
+                .gte("expires_at", (datetime.now() - timedelta(seconds=self.stale_window)).isoformat()) \
+                .maybe_single() \
                 .execute()
 
-            if result and result.data and len(result.data) > 0:
-                cache_entry = result.data[0]
-                # Déclencher le trigger pour incrémenter hit_count et refresh TTL
-                supabase.table("search_cache") \
-                    .update({"total_jobs": cache_entry["results"].get("total_jobs_analyzed", 0)}) \
-                    .eq("id", cache_entry["id"]) \
-                    .execute()
+            # Clé canonique unique : au plus une ligne
+            if result and result.data:
+                cache_entry = result.data
+                entry = {"results": cache_entry["results"], "expires_at": self._timestamp(cache_entry.get("expires_at"))}
+                fresh = entry["expires_at"] is None or entry["expires_at"] > time.time()
+
+                # Un hit périmé ne prolonge pas le TTL : l'entrée attend son recalcul
+                if fresh:
+                    self._record_hit(key)
 
-                print(f"Cache hit: {query} - {city} ({province})")
-                return cache_entry["results"]
+                # Gardée en mémoire jusqu'à la fin de sa fenêtre de péremption
+                ttl = entry["expires_at"] + self.stale_window - time.time() if entry["expires_at"] else None
+                self.memory.set(key, entry, ttl)
+                print(f"Cache {'hit' if fresh else 'stale'}: {query} - {city} ({province})")
+                return self._serve(entry, allow_stale)
 
+            self.memory.set_miss(key, CACHE_NEGATIVE_TTL)
             print(f"Cache miss: {query} - {city} ({province})")
             return None
 
         except Exception as e:
             print(f"Error lecture cache: {e}")
             return None
+
+    def _record_hit(self, search_key: str) -> None:
+        with self._hits_lock:
+            self._pending_hits[search_key] += 1
+
+    # Envoie les hits accumulés en un seul appel (hit_count et TTL mis à jour côté SQL).
+    # Chaque hit vise sa ligne par search_key : index unique, jamais plusieurs lignes héritées
+    def flush_hits(self) -> int:
+        with self._hits_lock:
+            pending, self._pending_hits = self._pending_hits, Counter()
+        if not pending:
+            return 0
+
+        try:
+            supabase.rpc("record_cache_hits", {
+                "hits": [
+                    {"search_key": search_key, "hits": hits}
+                    for search_key, hits in pending.items()
+                ]
+            }).execute()
+        except Exception as e:
+            # Remis en attente pour le prochain envoi
+            with self._hits_lock:
+                self._pending_hits.update(pending)
+            print(f"Error flushing cache hits: {e}")
+            return 0
+
+        return sum(pending.values())
+
+    # Boucle d'envoi périodique, lancée par le lifespan de l'app
+    async def run_hit_flusher(self, interval: float = CACHE_HIT_FLUSH_INTERVAL) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.flush_hits)
+
+    # Retire une recherche du cache mémoire (l'entrée Supabase n'est pas touchée)
+    def invalidate(self, query: str, city: str, province: str) -> bool:
+        return self.memory.invalidate(query_canonicalizer.key(query, city, province))
+
+    # Vide le cache mémoire
+    def invalidate_all(self) -> None:
+        self.memory.clear()
         
-    #Sauvegarde les résultats dans le cache
+    # Ligne search_cache d'une analyse, identifiée par sa clé canonique (colonne unique search_key)
+    def _cache_row(self, query: str, city: str, province: str, results: dict, total_jobs: int) -> dict:
+        query_key, city_key, province_key = query_canonicalizer.canonical(query, city, province)
+        return {
+            "search_key": query_canonicalizer.key(query, city, province),
+            "query": query_key,
+            "city": city_key,
+            "province": province_key,
+            # Date du calcul, pour indiquer l'âge d'un résultat servi depuis le cache
+            "results": {**results, "cached_at": time.time()},
+            "total_jobs": total_jobs,
+        }
+
+    #Sauvegarde les résultats dans le cache (un seul upsert atomique sur search_key)
     def save_to_cache(self, query: str, city: str, province: str, results: dict, total_jobs: int) -> bool:
 
         try:
-            query_lower = query.lower()
-            city_lower = city.lower()
-            province_lower = province.lower()
-
-            # Vérifier si existe déjà
-            existing = supabase.table("search_cache") \
-                .select("id") \
-                .ilike("query", query_lower) \
-                .ilike("city", city_lower) \
-                .ilike("province", province_lower) \
-                .limit(1) \
-                .execute()
-
-            if existing and existing.data and len(existing.data) > 0:
-                # UPDATE
-                supabase.table("search_cache") \
-                    .update({
-                        "results": results,
-                        "total_jobs": total_jobs,
-                    }) \
-                    .eq("id", existing.data[0]["id"]) \
-                    .execute()
-            else:
-                # INSERT
-                supabase.table("search_cache").insert({
-                    "query": query_lower,
-                    "city": city_lower,
-                    "province": province_lower,
-                    "results": results,
-                    "total_jobs": total_jobs,
-                }).execute()
+            row = self._cache_row(query, city, province, results, total_jobs)
+            supabase.table("search_cache").upsert(row, on_conflict="search_key").execute()
 
+            # Le cache mémoire sert directement les prochaines lectures (et oublie l'absence)
+            self.memory.set(row["search_key"], {"results": row["results"], "expires_at": None})
             print(f"Cache saved: {query} - {city} ({province})")
             return True
 
         except Exception as e:
+            self.invalidate(query, city, province)
             print(f"Error saving to cache: {e}")
             return False
-        
+
+    # Sauvegarde plusieurs marchés en un seul upsert (recalculs en arrière-plan)
+    def save_many_to_cache(self, entries: list[dict]) -> bool:
+        """entries : dicts {query, city, province, results, total_jobs}"""
+        if not entries:
+            return True
+
+        rows = {}
+        try:
+            for entry in entries:
+                row = self._cache_row(entry["query"], entry["city"], entry["province"], entry["results"], entry["total_jobs"])
+                # Un upsert ne peut pas toucher deux fois la même ligne : la dernière version gagne
+                rows[row["search_key"]] = row
+
+            supabase.table("search_cache").upsert(list(rows.values()), on_conflict="search_key").execute()
+
+            for key, row in rows.items():
+                self.memory.set(key, {"results": row["results"], "expires_at": None})
+            print(f"Cache saved: {len(rows)} searches")
+            return True
+
+        except Exception as e:
+            for key in rows:
+                self.memory.invalidate(key)
+            print(f"Error saving to cache: {e}")
+            return False
+
     # Appelle la fonction SQL de nettoyage
     def clear_expired(self) -> int:
         
@@ -116,7 +239,9 @@ class CacheService:
                 "total_entries": total.count or 0,
                 "valid_entries": valid.count or 0,
                 "expired_entries": (total.count or 0) - (valid.count or 0),
-                "popular_searches": popular.data or []
+                "popular_searches": popular.data or [],
+                "memory": self.memory.get_stats(),
+                "pending_hits": sum(self._pending_hits.values())
             }
         
         except Exception as e:
@@ -125,7 +250,9 @@ class CacheService:
                 "total_entries": 0,
                 "valid_entries": 0,
                 "expired_entries": 0,
-                "popular_searches": []
+                "popular_searches": [],
+                "memory": self.memory.get_stats(),
+                "pending_hits": sum(self._pending_hits.values())
             }
         
 cache_service = CacheService()
\ No newline at end of file
@@ -0,0 +1,71 @@
+import asyncio
+import httpx
+from config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+)
+
+
+class SharedHttpClient:
+    """
+    Client httpx unique pour tout le process : pool de connexions,
+    HTTP/2 et keep-alive, pour ne plus repayer TCP + TLS à chaque analyse.
+    Ouvert au démarrage et fermé à l'arrêt par le lifespan de l'app.
+    """
+
+    TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    async def get_client(self) -> httpx.AsyncClient:
+        """Retourne le client partagé, créé à la première utilisation"""
+        loop = asyncio.get_running_loop()
+
+        # Un client httpx est lié à la boucle qui l'a ouvert
+        if self._client is None or self._loop is not loop:
+            client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self._client = await client.__aenter__()
+            self._loop = loop
+            self._host_limits = {}
+
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Plafond de requêtes simultanées par hôte"""
+        host = httpx.URL(url).host
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST)
+        return self._host_limits[host]
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        client = await self.get_client()
+        async with self._host_limit(url):
+            return await client.get(url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Ferme proprement les connexions du pool"""
+        if self._client is None:
+            return
+
+        client, self._client = self._client, None
+        self._loop = None
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception as e:
+            print(f"HTTP client close error: {e}")
+
+
+http_client = SharedHttpClient()
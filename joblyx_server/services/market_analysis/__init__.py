@@ -1,6 +1,9 @@
 from .jsearch_service import jsearch_service, JSearchService
 from .serpapi_service import serpapi_service, SerpAPIService
 from .job_search_service import job_search_service, JobSearchService
+from .skills_taxonomy import skills_taxonomy, SkillsTaxonomy
+from .skill_matcher import skill_matcher, SkillMatcher
+from .extraction_scheduler import extraction_scheduler, ExtractionScheduler
 from .groq_service import groq_extractor, GroqSkillsExtractor
 from .market_analyzer import market_analyzer, MarketAnalyzer
 
@@ -11,6 +14,12 @@ __all__ = [
     "SerpAPIService",
     "job_search_service",
     "JobSearchService",
+    "skills_taxonomy",
+    "SkillsTaxonomy",
+    "skill_matcher",
+    "SkillMatcher",
+    "extraction_scheduler",
+    "ExtractionScheduler",
     "groq_extractor",
     "GroqSkillsExtractor",
     "market_analyzer",
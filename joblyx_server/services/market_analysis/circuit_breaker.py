@@ -0,0 +1,93 @@
+import time
+from collections import deque
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un provider d'offres (closed / open / half_open).
+    S'ouvre quand le taux d'erreur sur les derniers appels dépasse le seuil,
+    ou jusqu'à la remise à zéro annoncée par un 429. Une fois le délai
+    écoulé, un seul appel de test est laissé passer avant de refermer.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        error_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.open_seconds = open_seconds
+        self._results: deque[bool] = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._open_until = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() >= self._open_until:
+            return self.HALF_OPEN
+        return self._state
+
+    def error_rate(self) -> float:
+        if not self._results:
+            return 0.0
+        return self._results.count(False) / len(self._results)
+
+    def allow(self) -> bool:
+        """Indique si un appel peut partir (réserve l'appel de test en half_open)"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN or self._probe_in_flight:
+            return False
+
+        self._state = self.HALF_OPEN
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self._results.append(True)
+        if self._state != self.CLOSED:
+            print(f"Circuit {self.name}: closed")
+            self._results.clear()
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        """Enregistre un échec ; retry_after (secondes) vient d'un 429"""
+        self._results.append(False)
+        self._probe_in_flight = False
+
+        if retry_after is not None:
+            self._open(retry_after)
+        elif self._state == self.HALF_OPEN:
+            self._open(self.open_seconds)
+        elif len(self._results) >= self.min_calls and self.error_rate() >= self.error_threshold:
+            self._open(self.open_seconds)
+
+    def record_cancelled(self) -> None:
+        """Appel abandonné (perdant d'un hedge) : libère l'appel de test sans verdict"""
+        self._probe_in_flight = False
+
+    def _open(self, seconds: float) -> None:
+        self._state = self.OPEN
+        self._open_until = max(self._open_until, time.monotonic() + seconds)
+        print(f"Circuit {self.name}: open for {seconds:.0f}s")
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 2),
+            "calls": len(self._results),
+            "retry_in": round(max(0.0, self._open_until - time.monotonic()), 1),
+        }
@@ -0,0 +1,126 @@
+import json
+import re
+import sqlite3
+import hashlib
+import threading
+import time
+from pathlib import Path
+from .skill_matcher import fold_text
+
+
+def normalize_description(text: str) -> str:
+    """Normalise une description (casse, accents, espaces) avant le hash"""
+    return re.sub(r"\s+", " ", fold_text(text)).strip()
+
+
+class ExtractionCache:
+    """
+    Cache local des skills extraits par offre, adressé par contenu.
+    La clé combine le hash du texte normalisé, le modèle et la version de la
+    taxonomie. Stockage SQLite sur disque avec éviction LRU bornée.
+    """
+
+    DEFAULT_PATH = Path(__file__).parent.parent.parent / "data" / "extraction_cache.sqlite3"
+
+    def __init__(self, path: Path | str = DEFAULT_PATH, max_entries: int = 50000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, model: str, taxonomy_version: str) -> str:
+        digest = hashlib.sha256(normalize_description(text).encode("utf-8")).hexdigest()
+        return f"{model}:{taxonomy_version}:{digest}"
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre la base au premier accès"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                "key TEXT PRIMARY KEY, skills TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_last_used ON extractions(last_used)")
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: list[str]) -> dict[str, list[str]]:
+        """Retourne les entrées trouvées et rafraîchit leur date d'utilisation"""
+        unique_keys = list(dict.fromkeys(keys))
+        if not unique_keys:
+            return {}
+
+        found = {}
+        try:
+            with self._lock:
+                conn = self._connect()
+                # SQLite limite le nombre de paramètres par requête
+                for i in range(0, len(unique_keys), 500):
+                    chunk = unique_keys[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT key, skills FROM extractions WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    found.update({key: json.loads(skills) for key, skills in rows})
+
+                if found:
+                    now = time.time()
+                    conn.executemany(
+                        "UPDATE extractions SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+                    conn.commit()
+
+        except sqlite3.Error as e:
+            print(f"Extraction cache read error: {e}")
+
+        return found
+
+    def set_many(self, entries: dict[str, list[str]]) -> None:
+        """Enregistre des extractions puis applique l'éviction"""
+        if not entries:
+            return
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                now = time.time()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO extractions (key, skills, last_used) VALUES (?, ?, ?)",
+                    [(key, json.dumps(skills), now) for key, skills in entries.items()]
+                )
+                self._evict(conn)
+                conn.commit()
+
+        except sqlite3.Error as e:
+            print(f"Extraction cache write error: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Supprime les entrées les moins récemment utilisées au-delà de la limite"""
+        count = conn.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+        if count <= self.max_entries:
+            return
+
+        # Descendre à 90% de la limite pour ne pas évincer à chaque écriture
+        to_delete = count - int(self.max_entries * 0.9)
+        conn.execute(
+            "DELETE FROM extractions WHERE key IN "
+            "(SELECT key FROM extractions ORDER BY last_used ASC LIMIT ?)",
+            (to_delete,)
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM extractions")
+            conn.commit()
+
+
+extraction_cache = ExtractionCache()
@@ -0,0 +1,108 @@
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, TypeVar
+from config import GROQ_MAX_CONCURRENT
+
+T = TypeVar("T")
+
+
+class ExtractionFlow:
+    """File d'attente des appels LLM d'une analyse"""
+
+    def __init__(self, weight: int):
+        self.weight = max(1, weight)
+        self.credits = self.weight
+        self.queue: deque[asyncio.Future] = deque()
+
+
+class ExtractionScheduler:
+    """
+    Ordonnanceur partagé des appels LLM entre analyses concurrentes.
+    Chaque analyse ouvre un flux avec un poids ; les créneaux libres sont
+    distribués en round-robin pondéré (un flux de poids 2 obtient deux
+    appels par tour) sous un plafond global de concurrence.
+    """
+
+    DEFAULT_WEIGHT = 1
+    AUTHENTICATED_WEIGHT = 2
+
+    def __init__(self, max_concurrent: int = GROQ_MAX_CONCURRENT):
+        self.max_concurrent = max_concurrent
+        self._running = 0
+        self._active: deque[ExtractionFlow] = deque()
+
+    @contextmanager
+    def flow(self, weight: int = DEFAULT_WEIGHT):
+        """Enregistre un flux le temps d'une analyse"""
+        flow = ExtractionFlow(weight)
+        self._active.append(flow)
+        try:
+            yield flow
+        finally:
+            self._active.remove(flow)
+            for ticket in flow.queue:
+                ticket.cancel()
+            self._dispatch()
+
+    async def run(self, flow: ExtractionFlow, func: Callable[[], Awaitable[T]]) -> T:
+        """Attend son tour dans le flux puis exécute l'appel"""
+        ticket = asyncio.get_running_loop().create_future()
+        flow.queue.append(ticket)
+        self._dispatch()
+
+        try:
+            await ticket
+        except asyncio.CancelledError:
+            # Créneau accordé juste avant l'annulation : le rendre
+            if ticket.done() and not ticket.cancelled():
+                self._release()
+            raise
+
+        try:
+            return await func()
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._dispatch()
+
+    def _next_ticket(self) -> asyncio.Future | None:
+        """Round-robin pondéré sur les flux ayant des appels en attente"""
+        for _ in range(len(self._active)):
+            flow = self._active[0]
+            while flow.queue and flow.queue[0].done():
+                flow.queue.popleft()
+
+            if flow.queue:
+                ticket = flow.queue.popleft()
+                flow.credits -= 1
+                if flow.credits <= 0:
+                    flow.credits = flow.weight
+                    self._active.rotate(-1)
+                return ticket
+
+            flow.credits = flow.weight
+            self._active.rotate(-1)
+
+        return None
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrent:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            self._running += 1
+            ticket.set_result(None)
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self._running,
+            "max_concurrent": self.max_concurrent,
+            "active_flows": len(self._active),
+            "queued": sum(len(flow.queue) for flow in self._active),
+        }
+
+
+extraction_scheduler = ExtractionScheduler()
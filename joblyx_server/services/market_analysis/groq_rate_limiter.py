@@ -0,0 +1,150 @@
+import re
+import time
+import asyncio
+from config import GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE, GROQ_MAX_WAIT
+
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: str | None) -> float | None:
+    """Convertit une durée Groq ("2m59.56s", "7.66s", "120ms") en secondes"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _parse_int(value: str | None) -> int | None:
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class GroqRateLimiter:
+    """
+    Token bucket partagé par tout le process pour les appels Groq.
+    Les requêtes/minute viennent de la config (Groq n'expose que le quota
+    journalier en headers), les tokens/minute et le quota journalier sont
+    resynchronisés avec les headers x-ratelimit-* de chaque réponse.
+    Les réservations peuvent rendre le solde négatif : chaque appel attend
+    alors exactement le temps de recharge nécessaire au lieu de boucler.
+    Au-delà de max_wait (quota journalier épuisé, long retry-after), la
+    réservation est annulée et l'appelant se replie sur le matcher local.
+    """
+
+    # Attente par défaut sur un 429 sans retry-after ni reset
+    DEFAULT_BACKOFF = 15.0
+
+    def __init__(
+        self,
+        requests_per_minute: int = GROQ_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = GROQ_TOKENS_PER_MINUTE,
+        max_wait: float = GROQ_MAX_WAIT,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = max_wait
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._in_flight_tokens = 0
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+        self._updated_at = now
+
+    def reserve(self, tokens: int) -> float:
+        """Réserve une requête et des tokens, retourne le délai à attendre (secondes)"""
+        now = time.monotonic()
+        self._refill(now)
+
+        # Une requête plus grosse que la limite ne doit pas bloquer indéfiniment
+        tokens = min(tokens, self.tokens_per_minute)
+        self._requests -= 1
+        self._tokens -= tokens
+        self._in_flight_tokens += tokens
+
+        return max(
+            0.0,
+            -self._requests * 60 / self.requests_per_minute,
+            -self._tokens * 60 / self.tokens_per_minute,
+            self._blocked_until - now,
+        )
+
+    def _cancel(self, tokens: int) -> None:
+        """Rend une réservation qui ne sera pas utilisée"""
+        tokens = min(tokens, self.tokens_per_minute)
+        self._requests += 1
+        self._tokens += tokens
+        self._in_flight_tokens = max(0, self._in_flight_tokens - tokens)
+
+    async def acquire(self, tokens: int) -> bool:
+        """Attend que la capacité réservée soit disponible, False si l'attente dépasse max_wait"""
+        deadline = time.monotonic() + self.max_wait
+        wait = self.reserve(tokens)
+        while wait > 0:
+            if time.monotonic() + wait > deadline:
+                self._cancel(tokens)
+                return False
+            await asyncio.sleep(wait)
+            # Un 429 reçu pendant l'attente peut repousser la reprise
+            wait = self._blocked_until - time.monotonic()
+        return True
+
+    def release(self, tokens: int) -> None:
+        """Appel terminé : ses tokens ne sont plus en vol"""
+        self._in_flight_tokens = max(0, self._in_flight_tokens - min(tokens, self.tokens_per_minute))
+
+    def update_from_headers(self, headers) -> None:
+        """Resynchronise le bucket avec les headers x-ratelimit-* de Groq"""
+        now = time.monotonic()
+        self._refill(now)
+
+        limit_tokens = _parse_int(headers.get("x-ratelimit-limit-tokens"))
+        if limit_tokens:
+            self.tokens_per_minute = limit_tokens
+
+        # Le serveur fait foi, moins ce qui est encore en vol de notre côté
+        remaining_tokens = _parse_int(headers.get("x-ratelimit-remaining-tokens"))
+        if remaining_tokens is not None:
+            self._tokens = min(self.tokens_per_minute, remaining_tokens - self._in_flight_tokens)
+
+        # remaining-requests est un quota journalier : à zéro on attend sa remise à zéro
+        remaining_requests = _parse_int(headers.get("x-ratelimit-remaining-requests"))
+        if remaining_requests == 0:
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self._blocked_until = max(self._blocked_until, now + reset)
+
+    def on_rate_limited(self, headers) -> float:
+        """Réponse 429 : bloque jusqu'au retry-after exact, retourne le délai"""
+        now = time.monotonic()
+        delay = parse_duration(headers.get("retry-after"))
+
+        if delay is None:
+            resets = [
+                parse_duration(headers.get("x-ratelimit-reset-tokens")),
+                parse_duration(headers.get("x-ratelimit-reset-requests")),
+            ]
+            resets = [r for r in resets if r is not None]
+            delay = max(resets) if resets else self.DEFAULT_BACKOFF
+
+        self._blocked_until = max(self._blocked_until, now + delay)
+        self.update_from_headers(headers)
+        return delay
+
+
+groq_rate_limiter = GroqRateLimiter()
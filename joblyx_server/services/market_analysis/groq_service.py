@@ -1,78 +1,192 @@
 import json
 import asyncio
-from groq import Groq, AsyncGroq
-from pathlib import Path
+from contextlib import nullcontext
+from groq import Groq, AsyncGroq, RateLimitError
 from config import GROQ_API_KEY
+from .skill_matcher import skill_matcher
+from .skills_taxonomy import skills_taxonomy
+from .extraction_cache import extraction_cache
+from .groq_rate_limiter import groq_rate_limiter
+from .posting_preprocessor import posting_preprocessor
+from .extraction_scheduler import extraction_scheduler, ExtractionFlow, ExtractionScheduler
 
 
 class GroqSkillsExtractor:
-    def __init__(self):
-        self.client = Groq(api_key=GROQ_API_KEY)
-        self.async_client = AsyncGroq(api_key=GROQ_API_KEY)
-        self.skills_by_category, self.skills_list = self._load_skills_reference()
 
-    def _load_skills_reference(self) -> tuple[dict, list]:
-        """Charge skills.json comme référence"""
-        skills_path = Path(__file__).parent.parent.parent / "data" / "skills.json"
-        with open(skills_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+    MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
 
-        # Structure par catégorie (pour le mapping)
-        by_category = {}
-        # Liste plate (pour le prompt - réduit les tokens)
-        flat_list = []
+    # Skills les plus fréquents ajoutés pour chaque catégorie détectée
+    CANDIDATES_PER_CATEGORY = 8
+    # Sans aucune détection lexicale, on garde les premiers skills de chaque catégorie
+    DEFAULT_CANDIDATES_PER_CATEGORY = 3
 
-        for category, skills in data.get("IT", {}).items():
-            by_category[category] = [s["name"] for s in skills]
-            flat_list.extend([s["name"] for s in skills])
+    # Budget de tokens d'une offre après découpage en sections
+    POSTING_TOKEN_BUDGET = 750
+    # Budget de tokens d'entrée par requête groupée (offres + liste de candidats)
+    BATCH_TOKEN_BUDGET = 6000
+    MAX_BATCH_SIZE = 8
+    # Des IDs numériques coûtent bien moins de tokens que des noms
+    OUTPUT_TOKENS_PER_POSTING = 80
+    SINGLE_MAX_TOKENS = 200
 
-        return by_category, flat_list
+    def __init__(self):
+        self.client = Groq(api_key=GROQ_API_KEY)
+        # Les retries sont gérés par le rate limiter partagé, pas par le SDK
+        self.async_client = AsyncGroq(api_key=GROQ_API_KEY, max_retries=0)
+        self.rate_limiter = groq_rate_limiter
+        self.scheduler = extraction_scheduler
+        self.taxonomy = skills_taxonomy
+        self.skills_by_category = self.taxonomy.by_category
+        # Codebook : nom -> ID stable (les IDs renvoyés sont relus via taxonomy.names)
+        self.skill_ids = self.taxonomy.ids
+        self.taxonomy_version = self.taxonomy.version
+        self.matcher = skill_matcher
+        self.preprocessor = posting_preprocessor
+        self.cache = extraction_cache
 
     def _get_category(self, skill_name: str) -> str:
         """Trouve la catégorie d'un skill"""
+        return self.taxonomy.category_of(skill_name)
+
+    def _candidate_skills(self, job_description: str) -> list[str]:
+        """Pré-sélectionne les skills plausibles pour une offre (au lieu des 1073)"""
+        hits = self.matcher.extract_skills(job_description)
+        # Bitmask des skills détectés croisé avec celui de chaque catégorie
+        hit_mask = self.taxonomy.mask_of(self.taxonomy.resolve(skill) for skill in hits)
+        categories = set(self.taxonomy.categories_of_mask(hit_mask))
+
+        if categories:
+            per_category = self.CANDIDATES_PER_CATEGORY
+        else:
+            categories = set(self.skills_by_category)
+            per_category = self.DEFAULT_CANDIDATES_PER_CATEGORY
+
+        # skills.json liste les skills les plus courants en premier dans chaque catégorie
+        candidates = dict.fromkeys(hits)
         for category, skills in self.skills_by_category.items():
-            if skill_name in skills:
-                return category
-        return "other"
-    
-    def extract_skills(self, job_description: str) -> list[str]:
-        """Extrait les skills d'une description avec Groq"""
+            if category in categories:
+                candidates.update(dict.fromkeys(skills[:per_category]))
+
+        return list(candidates)
+
+    def _codebook(self, candidates) -> str:
+        """Liste "id=nom" envoyée au modèle"""
+        return ", ".join(f"{self.skill_ids[name]}={name}" for name in candidates)
+
+    def _ids_to_skills(self, ids) -> list[str] | None:
+        """Validation stricte d'un tableau d'IDs, retourne les noms (None si invalide)"""
+        if not isinstance(ids, list):
+            return None
+        names = [
+            self.taxonomy.names[i] for i in ids
+            if type(i) is int and i in self.taxonomy.names
+        ]
+        return list(dict.fromkeys(names))
+
+    def _parse_single(self, content: str) -> list[str] | None:
+        """Parse la réponse JSON {"skills": [ids]} d'une offre"""
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            print(f"Erreur parsing Groq: {e}")
+            return None
+
+        if not isinstance(data, dict):
+            return None
+        return self._ids_to_skills(data.get("skills"))
 
-        prompt = f"""Extract technical skills from this job posting.
+    def _prepare_posting(self, job_description: str) -> str:
+        """Garde les sections utiles de l'offre (exigences d'abord) dans le budget"""
+        return self.preprocessor.prepare(job_description, self.POSTING_TOKEN_BUDGET)
+
+    def _build_prompt(self, job_description: str) -> str:
+        """Construit le prompt avec la liste réduite de skills candidats"""
+        posting = self._prepare_posting(job_description)
+        candidates = self._candidate_skills(posting)
+
+        return f"""Extract technical skills from this job posting.
 
 RULES:
-1. ONLY return skills from this list: {", ".join(self.skills_list)}
-2. Return ONLY a JSON array, nothing else
+1. ONLY use skills from this list (format id=name): {self._codebook(candidates)}
+2. Return a JSON object with the ids of the skills found
 3. Ignore skills not in the list
 
 JOB POSTING:
-{job_description[:3000]}
+{posting}
+
+RETURN FORMAT (JSON object only):
+{{"skills": [1, 42, 310]}}"""
+
+    def _build_batch_prompt(self, postings: list[str]) -> str:
+        """Construit un prompt regroupant plusieurs offres numérotées (déjà préparées)"""
+        candidates = {}
+        for posting in postings:
+            candidates.update(dict.fromkeys(self._candidate_skills(posting)))
+
+        numbered = "\n\n".join(
+            f"POSTING {i}:\n{posting}"
+            for i, posting in enumerate(postings)
+        )
+
+        return f"""Extract technical skills from each job posting below.
+
+RULES:
+1. ONLY use skills from this list (format id=name): {self._codebook(candidates)}
+2. Return a JSON object mapping each posting number to the array of skill ids found
+3. Include every posting number, with [] when no skill matches
+4. Ignore skills not in the list
+
+{numbered}
+
+RETURN FORMAT (JSON object only):
+{{"0": [1, 42], "1": [310]}}"""
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Estimation grossière (~4 caractères par token)"""
+        return len(text) // 4 + 1
+
+    def _plan_batches(self, postings: list[str]) -> list[list[int]]:
+        """Regroupe les offres en lots qui respectent le budget de tokens"""
+        batches = []
+        current, current_candidates, current_tokens = [], set(), 0
+
+        for i, posting in enumerate(postings):
+            candidates = set(self._candidate_skills(posting))
+            posting_tokens = self._estimate_tokens(posting)
+            cost = posting_tokens + self._estimate_tokens(self._codebook(candidates - current_candidates))
+
+            if current and (current_tokens + cost > self.BATCH_TOKEN_BUDGET or len(current) >= self.MAX_BATCH_SIZE):
+                batches.append(current)
+                current, current_candidates = [], set()
+                cost = posting_tokens + self._estimate_tokens(self._codebook(candidates))
+                current_tokens = 0
+
+            current.append(i)
+            current_candidates |= candidates
+            current_tokens += cost
+
+        if current:
+            batches.append(current)
+
+        return batches
 
-RETURN FORMAT (JSON array only):
-["Python", "React", "AWS"]"""
+    def extract_skills(self, job_description: str) -> list[str]:
+        """Extrait les skills d'une description avec Groq"""
+
+        prompt = self._build_prompt(job_description)
 
         try:
             response = self.client.chat.completions.create(
-                model="meta-llama/llama-4-scout-17b-16e-instruct",
+                model=self.MODEL,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0,
-                max_tokens=500
+                max_tokens=self.SINGLE_MAX_TOKENS,
+                response_format={"type": "json_object"}
             )
 
-            content = response.choices[0].message.content.strip()
-
-            # Nettoyer la réponse
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-
-            skills = json.loads(content.strip())
-
-            # Valider que les skills sont dans la liste
-            return [s for s in skills if s in self.skills_list]
+            # Valider que les IDs sont dans le codebook
+            return self._parse_single(response.choices[0].message.content) or []
 
         except Exception as e:
             print(f"Erreur Groq: {e}")
@@ -90,75 +204,172 @@ RETURN FORMAT (JSON array only):
 
     async def extract_skills_async(self, job_description: str, max_retries: int = 3) -> list[str]:
         """Version async de extract_skills avec retry pour rate limit"""
+        return await self._request_skills_async(job_description, max_retries) or []
+
+    async def _request_skills_async(self, job_description: str, max_retries: int = 3) -> list[str] | None:
+        """Appel Groq async, retourne None en cas d'échec (à ne pas mettre en cache)"""
+        content = await self._chat_async(self._build_prompt(job_description), self.SINGLE_MAX_TOKENS, max_retries)
+        if content is None:
+            return None
+
+        return self._parse_single(content)
+
+    async def _request_batch_async(self, postings: list[str], max_retries: int = 3) -> dict[int, list[str]] | None:
+        """
+        Appel Groq pour un lot, retourne {index: skills} pour les offres correctement parsées
+        ({} si la réponse est illisible). None si l'appel lui-même a échoué (erreur API, limiteur).
+        """
+        max_tokens = self.OUTPUT_TOKENS_PER_POSTING * len(postings)
+        content = await self._chat_async(self._build_batch_prompt(postings), max_tokens, max_retries)
+        if content is None:
+            return None
+
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            print(f"Erreur parsing lot Groq ({len(postings)} offres): {e}")
+            return {}
 
-        prompt = f"""Extract technical skills from this job posting.
+        if not isinstance(data, dict):
+            return {}
 
-RULES:
-1. ONLY return skills from this list: {", ".join(self.skills_list)}
-2. Return ONLY a JSON array, nothing else
-3. Ignore skills not in the list
+        parsed = {}
+        for key, ids in data.items():
+            try:
+                index = int(key)
+            except (TypeError, ValueError):
+                continue
+            skills = self._ids_to_skills(ids)
+            if 0 <= index < len(postings) and skills is not None:
+                parsed[index] = skills
 
-JOB POSTING:
-{job_description[:3000]}
+        return parsed
+
+    async def _chat_async(self, prompt: str, max_tokens: int, max_retries: int = 3) -> str | None:
+        """Envoie un prompt en mode JSON avec retry pour rate limit"""
 
-RETURN FORMAT (JSON array only):
-["Python", "React", "AWS"]"""
+        estimated_tokens = self._estimate_tokens(prompt) + max_tokens
 
         for attempt in range(max_retries):
+            if not await self.rate_limiter.acquire(estimated_tokens):
+                print("Groq: rate limit wait too long, skipping LLM call")
+                return None
             try:
-                response = await self.async_client.chat.completions.create(
-                    model="meta-llama/llama-4-scout-17b-16e-instruct",
+                raw = await self.async_client.chat.completions.with_raw_response.create(
+                    model=self.MODEL,
                     messages=[{"role": "user", "content": prompt}],
                     temperature=0,
-                    max_tokens=500
+                    max_tokens=max_tokens,
+                    response_format={"type": "json_object"}
                 )
+            except RateLimitError as e:
+                # Le prochain acquire() attend exactement le retry-after
+                self.rate_limiter.release(estimated_tokens)
+                wait_time = self.rate_limiter.on_rate_limited(e.response.headers)
+                print(f"Groq rate limit, retry in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})")
+                continue
+            except Exception as e:
+                self.rate_limiter.release(estimated_tokens)
+                print(f"Erreur Groq async: {e}")
+                return None
 
-                content = response.choices[0].message.content.strip()
-
-                if content.startswith("```json"):
-                    content = content[7:]
-                if content.startswith("```"):
-                    content = content[3:]
-                if content.endswith("```"):
-                    content = content[:-3]
-
-                skills = json.loads(content.strip())
-                return [s for s in skills if s in self.skills_list]
+            self.rate_limiter.release(estimated_tokens)
+            self.rate_limiter.update_from_headers(raw.headers)
 
+            try:
+                response = await raw.parse()
+                return response.choices[0].message.content
             except Exception as e:
-                error_str = str(e)
-                if "429" in error_str or "rate_limit" in error_str:
-                    wait_time = (attempt + 1) * 15  # 15s, 30s, 45s
-                    print(f"Groq rate limit, retry in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    await asyncio.sleep(wait_time)
-                else:
-                    print(f"Erreur Groq async: {e}")
-                    return []
+                print(f"Erreur Groq async: {e}")
+                return None
 
         print("Groq: max retries exceeded")
-        return []
+        return None
+
+    async def _extract_batch(self, postings: list[str], flow: ExtractionFlow) -> list[list[str] | None]:
+        """Extrait un lot, puis découpe et réessaie les offres mal parsées ou manquantes"""
+        parsed = await self.scheduler.run(flow, lambda: self._request_batch_async(postings))
+        if parsed is None:
+            # Appel en échec (erreur API, refus du limiteur) : redécouper ne ferait que multiplier les échecs
+            return [None] * len(postings)
+
+        results = [parsed.get(i) for i in range(len(postings))]
+        missing = [i for i, skills in enumerate(results) if skills is None]
+
+        if not missing or len(postings) == 1:
+            return results
+
+        # Lot entièrement raté : on le coupe en deux, sinon on relance seulement les manquants
+        if len(missing) == len(postings):
+            mid = len(missing) // 2
+            groups = [missing[:mid], missing[mid:]]
+        else:
+            groups = [missing]
+
+        print(f"Groq: retrying {len(missing)}/{len(postings)} postings in {len(groups)} smaller batch(es)")
+        retried = await asyncio.gather(*(
+            self._extract_batch([postings[i] for i in group], flow) for group in groups
+        ))
+
+        for group, group_results in zip(groups, retried):
+            for i, skills in zip(group, group_results):
+                results[i] = skills
+
+        return results
 
     async def extract_skills_list_async(self, job_description: str) -> list[dict]:
         """Version async de extract_skills_list"""
         skills = await self.extract_skills_async(job_description)
+        return self._to_skills_list(skills)
+
+    def _to_skills_list(self, skills: list[str]) -> list[dict]:
         return [
             {"name": skill, "category": self._get_category(skill)}
             for skill in skills
         ]
 
-    async def extract_all_skills(self, descriptions: list[str], max_concurrent: int = 2) -> list[list[dict]]:
-        """Extrait les skills de plusieurs descriptions avec limite de concurrence"""
-        semaphore = asyncio.Semaphore(max_concurrent)
-
-        async def extract_with_limit(desc: str) -> list[dict]:
-            async with semaphore:
-                return await self.extract_skills_list_async(desc)
-
-        tasks = [extract_with_limit(desc) for desc in descriptions]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Filtrer les erreurs
-        return [r for r in results if isinstance(r, list)]
+    async def extract_all_skills(
+        self,
+        descriptions: list[str],
+        weight: int = ExtractionScheduler.DEFAULT_WEIGHT,
+        flow: ExtractionFlow | None = None,
+    ) -> list[list[dict] | None]:
+        """
+        Extrait les skills de plusieurs descriptions, seuls les absents du cache vont au LLM.
+        Les appels passent par l'ordonnanceur partagé : dans le flux de l'analyse s'il est
+        fourni, sinon dans un flux ouvert pour cet appel avec le poids donné.
+        Une extraction en échec vaut None, à sa position : la liste reste alignée.
+        """
+        keys = [self.cache.make_key(desc, self.MODEL, self.taxonomy_version) for desc in descriptions]
+        # Lectures et écritures SQLite (éviction comprise) hors de la boucle d'événements
+        skills_by_key = await asyncio.to_thread(self.cache.get_many, keys)
+
+        # Une seule requête par texte distinct absent du cache
+        misses = {key: desc for key, desc in zip(keys, descriptions) if key not in skills_by_key}
+        print(f"Extraction cache: {len(descriptions) - len(misses)} hits, {len(misses)} misses")
+
+        # Plusieurs offres par requête, lots dimensionnés par budget de tokens
+        miss_keys = list(misses)
+        miss_postings = [self._prepare_posting(desc) for desc in misses.values()]
+        batches = self._plan_batches(miss_postings)
+
+        with nullcontext(flow) if flow else self.scheduler.flow(weight) as flow:
+            batch_results = await asyncio.gather(*(
+                self._extract_batch([miss_postings[i] for i in batch], flow) for batch in batches
+            ), return_exceptions=True)
+
+        results = [None] * len(miss_postings)
+        for batch, skills_lists in zip(batches, batch_results):
+            if isinstance(skills_lists, list):
+                for i, skills in zip(batch, skills_lists):
+                    results[i] = skills
+
+        # Ne garder (et ne mettre en cache) que les extractions réussies
+        extracted = {key: skills for key, skills in zip(miss_keys, results) if skills is not None}
+        await asyncio.to_thread(self.cache.set_many, extracted)
+        skills_by_key.update(extracted)
+
+        return [self._to_skills_list(skills_by_key[key]) if key in skills_by_key else None for key in keys]
 
 
 groq_extractor = GroqSkillsExtractor()
\ No newline at end of file
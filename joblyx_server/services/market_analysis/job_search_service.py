@@ -1,47 +1,160 @@
+import time
+import asyncio
 import httpx
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable
+from config import JOB_SEARCH_HEDGING, JOB_SEARCH_HEDGE_PERCENTILE, JOB_SEARCH_HEDGE_DELAY, JOB_SEARCH_FAN_OUT
 from .jsearch_service import JSearchService
 from .serpapi_service import SerpAPIService
+from .provider_stats import provider_latency
+from .circuit_breaker import CircuitBreaker
+from .posting_dedup import PostingDeduplicator
+from .groq_rate_limiter import parse_duration
 
 
 class JobSearchService:
     """
     Service de recherche d'emplois avec fallback.
-    Essaie JSearch en premier, puis SerpAPI si JSearch échoue.
+    Essaie JSearch en premier, puis SerpAPI si JSearch échoue. Si JSearch
+    dépasse son percentile de latence habituel, SerpAPI est lancé en
+    parallèle (hedging) et la première réponse exploitable l'emporte.
+    Un disjoncteur par provider évite d'interroger un provider en panne
+    ou limité (429) jusqu'à sa remise à zéro.
     """
 
+    PROVIDERS = ("jsearch", "serpapi")
+    # Jamais de hedge plus tôt que ce délai, même si JSearch est très rapide
+    MIN_HEDGE_DELAY = 1.0
+    # Ouverture du disjoncteur sur un 429 sans délai annoncé
+    RATE_LIMIT_BACKOFF = 60.0
+
     def __init__(self):
         self.jsearch = JSearchService()
         self.serpapi = SerpAPIService()
-        self.last_provider = None
+        self.latency = provider_latency
+        self.hedging = JOB_SEARCH_HEDGING
+        self.breakers = {provider: CircuitBreaker(provider) for provider in self.PROVIDERS}
+        # Provider de la requête en cours (par tâche, pas partagé entre requêtes)
+        self._provider: ContextVar[str | None] = ContextVar(f"job_search_provider_{id(self)}", default=None)
+        # Requête en cours menée à terme par les providers (aucune panne, pas de circuit tout ouvert)
+        self._complete: ContextVar[bool] = ContextVar(f"job_search_complete_{id(self)}", default=False)
+
+    @property
+    def last_provider(self) -> str | None:
+        return self._provider.get()
+
+    @last_provider.setter
+    def last_provider(self, provider: str | None) -> None:
+        self._provider.set(provider)
+
+    def get_hedge_delay(self, provider: str = "jsearch") -> float:
+        """Délai avant hedge : percentile de latence du provider, défaut sans historique"""
+        observed = self.latency.percentile(provider, JOB_SEARCH_HEDGE_PERCENTILE)
+        if observed is None:
+            return JOB_SEARCH_HEDGE_DELAY
+        return max(self.MIN_HEDGE_DELAY, observed)
+
+    def _retry_after(self, error: Exception) -> float | None:
+        """Délai annoncé par un 429 (retry-after ou reset RapidAPI), None sinon"""
+        if not isinstance(error, httpx.HTTPStatusError) or error.response.status_code != 429:
+            return None
+
+        headers = error.response.headers
+        for header in ("retry-after", "x-ratelimit-requests-reset"):
+            delay = parse_duration(headers.get(header))
+            if delay is not None:
+                return delay
+        return self.RATE_LIMIT_BACKOFF
+
+    async def _timed(self, provider: str, call: Callable[[], Awaitable[list]]) -> list:
+        """Appelle un provider en alimentant ses stats de latence et son disjoncteur"""
+        breaker = self.breakers[provider]
+        start = time.monotonic()
 
-    async def search_jobs(self, query: str, location: str = "", num_pages: int = 1) -> list[dict]:
-        # Essayer JSearch d'abord
         try:
-            jobs = await self.jsearch.search_jobs(query, location, num_pages)
-            if jobs:
-                self.last_provider = "jsearch"
-                print(f"JobSearch: Using JSearch ({len(jobs)} jobs)")
-                return jobs
+            result = await call()
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except Exception as e:
+            breaker.record_failure(self._retry_after(e))
+            raise
+
+        self.latency.record(provider, time.monotonic() - start)
+        breaker.record_success()
+        return result
+
+    def _task_jobs(self, provider: str, task: asyncio.Task) -> list:
+        """Résultat d'un provider, [] (avec log) en cas d'erreur"""
+        try:
+            return task.result() or []
         except httpx.HTTPStatusError as e:
-            if e.response.status_code == 429:
+            if provider == "jsearch" and e.response.status_code == 429:
                 print("JSearch rate limit reached, falling back to SerpAPI")
             else:
-                print(f"JSearch HTTP error: {e}, falling back to SerpAPI")
+                print(f"{provider} HTTP error: {e}")
         except Exception as e:
-            print(f"JSearch error: {e}, falling back to SerpAPI")
+            print(f"{provider} error: {e}")
+        return []
+
+    async def _hedged(self, primary: Callable[[], Awaitable[list]], fallback: Callable[[], Awaitable[list]]) -> tuple[str | None, list]:
+        """Lance JSearch puis SerpAPI (en secours ou en hedge), retourne le premier résultat non vide"""
+        waiting = list(zip(self.PROVIDERS, (primary, fallback)))
+        tasks = {}
 
-        # Fallback vers SerpAPI
+        def launch_next() -> str | None:
+            # Les providers dont le disjoncteur est ouvert sont sautés
+            while waiting:
+                provider, call = waiting.pop(0)
+                if self.breakers[provider].allow():
+                    tasks[asyncio.create_task(self._timed(provider, call))] = provider
+                    return provider
+                print(f"JobSearch: skipping {provider} (circuit {self.breakers[provider].state})")
+            return None
+
+        current = launch_next()
         try:
-            jobs = await self.serpapi.search_jobs(query, location, num_pages)
-            if jobs:
-                self.last_provider = "serpapi"
-                print(f"JobSearch: Using SerpAPI fallback ({len(jobs)} jobs)")
-                return jobs
-        except Exception as e:
-            print(f"SerpAPI fallback error: {e}")
+            while tasks:
+                timeout = self.get_hedge_delay(current) if self.hedging and waiting else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
 
-        self.last_provider = None
-        return []
+                for task in done:
+                    provider = tasks.pop(task)
+                    jobs = self._task_jobs(provider, task)
+                    if jobs:
+                        return provider, jobs
+
+                # Provider en échec, sans résultat ou trop lent : lancer le suivant
+                if not done:
+                    print(f"JobSearch: {current} slower than {timeout:.1f}s, hedging")
+                if not done or not tasks:
+                    current = launch_next() or current
+
+            return None, []
+        finally:
+            # Annuler le perdant et attendre sa fin pour libérer ses connexions
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_provider_health(self) -> dict:
+        """État des disjoncteurs et latences récentes des providers"""
+        latency = self.latency.get_stats()
+        return {
+            provider: {**self.breakers[provider].get_stats(), "latency": latency.get(provider)}
+            for provider in self.PROVIDERS
+        }
+
+    async def search_jobs(self, query: str, location: str = "", num_pages: int = 1) -> list[dict]:
+        provider, jobs = await self._hedged(
+            lambda: self.jsearch.search_jobs(query, location, num_pages),
+            lambda: self.serpapi.search_jobs(query, location, num_pages),
+        )
+
+        self.last_provider = provider
+        if provider:
+            print(f"JobSearch: Using {provider} ({len(jobs)} jobs)")
+        return jobs
 
     async def get_job_descriptions(self, query: str, location: str = "", num_pages: int = 5) -> list[str]:
         jobs = await self.search_jobs(query, location, num_pages)
@@ -54,9 +167,173 @@ class JobSearchService:
 
         return descriptions
 
+    @staticmethod
+    def _tag(provider: str, jobs: list[dict]) -> list[dict]:
+        """Indique sur chaque offre le provider qui l'a fournie"""
+        for job in jobs:
+            job["provider"] = provider
+        return jobs
+
+    def _page_openers(self, query: str, location: str, num_pages: int, date_posted: str = "month") -> dict[str, Callable[[], AsyncIterator[list[dict]]]]:
+        """Ouvre le flux de pages de chaque provider, dans l'ordre de préférence"""
+        # SerpAPI n'a pas de filtre de date : l'appelant filtre sur job_posted_at_timestamp
+        return {
+            "jsearch": lambda: self.jsearch.iter_pages(query, location, num_pages, date_posted),
+            "serpapi": lambda: self.serpapi.iter_pages(query, location, num_pages),
+        }
+
+    async def _iter_hedged(self, query: str, location: str, num_pages: int, date_posted: str = "month") -> AsyncIterator[list[dict]]:
+        """Pages du provider qui répond en premier"""
+        pages = {}
+        answered = []
+        self._complete.set(False)
+
+        def first_page(provider: str, open_pages) -> Callable[[], Awaitable[list]]:
+            # Le générateur n'est créé que si le provider est réellement interrogé
+            async def call():
+                pages[provider] = open_pages()
+                jobs = await anext(pages[provider], [])
+                answered.append(provider)
+                return jobs
+            return call
+
+        openers = self._page_openers(query, location, num_pages, date_posted)
+        try:
+            provider, jobs = await self._hedged(
+                first_page("jsearch", openers["jsearch"]),
+                first_page("serpapi", openers["serpapi"]),
+            )
+
+            self.last_provider = provider
+            if not provider:
+                # Réponse vide d'un provider : rien à trouver ; aucune réponse : panne
+                self._complete.set(bool(answered))
+                return
+
+            yield self._tag(provider, jobs)
+
+            # Les pages suivantes viennent du même provider, sans mélange
+            try:
+                async for jobs in pages[provider]:
+                    if jobs:
+                        yield self._tag(provider, jobs)
+            except Exception as e:
+                print(f"{provider} error after first page: {e}")
+                self.breakers[provider].record_failure(self._retry_after(e))
+            else:
+                self._complete.set(True)
+        finally:
+            for provider_pages in pages.values():
+                await provider_pages.aclose()
+
+    async def _iter_fan_out(
+        self,
+        query: str,
+        location: str,
+        num_pages: int,
+        target_jobs: int,
+        date_posted: str = "month",
+    ) -> AsyncIterator[list[dict]]:
+        """Interroge tous les providers sains en parallèle et fusionne leurs pages sans doublons"""
+        queue: asyncio.Queue = asyncio.Queue()
+        dedup = PostingDeduplicator()
+        failed = []
+        self._complete.set(False)
+
+        async def pump(provider: str, open_pages) -> None:
+            breaker = self.breakers[provider]
+            start = time.monotonic()
+            pages = open_pages()
+            first = True
+            try:
+                async for jobs in pages:
+                    if first:
+                        self.latency.record(provider, time.monotonic() - start)
+                        first = False
+                    queue.put_nowait((provider, self._tag(provider, jobs)))
+            except asyncio.CancelledError:
+                breaker.record_cancelled()
+                raise
+            except Exception as e:
+                print(f"{provider} error during fan-out: {e}")
+                breaker.record_failure(self._retry_after(e))
+                failed.append(provider)
+            else:
+                breaker.record_success()
+            finally:
+                await pages.aclose()
+                # Fin de flux, même en cas d'erreur
+                queue.put_nowait((provider, None))
+
+        tasks = [
+            asyncio.create_task(pump(provider, open_pages))
+            for provider, open_pages in self._page_openers(query, location, num_pages, date_posted).items()
+            if self.breakers[provider].allow()
+        ]
+        running = len(tasks)
+        contributors = []
+        total = 0
+        self.last_provider = None
+
+        try:
+            while running and total < target_jobs:
+                provider, jobs = await queue.get()
+                if jobs is None:
+                    running -= 1
+                    continue
+
+                unique = dedup.filter(jobs)[:target_jobs - total]
+                if not unique:
+                    continue
+
+                if provider not in contributors:
+                    contributors.append(provider)
+                    self.last_provider = "+".join(p for p in self.PROVIDERS if p in contributors)
+                total += len(unique)
+                yield unique
+        finally:
+            # Échantillon atteint (ou consommateur parti) : couper les providers restants
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._complete.set(bool(tasks) and not failed)
+        print(f"JobSearch: fan-out {self.last_provider} ({total} jobs, {dedup.duplicates} cross-provider duplicates)")
+
+    async def iter_jobs(
+        self,
+        query: str,
+        location: str = "",
+        num_pages: int = 1,
+        fan_out: bool | None = None,
+        target_jobs: int | None = None,
+        date_posted: str = "month",
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Produit les offres page par page, d'un seul provider ou de tous en fan-out.
+        date_posted (today, 3days, week, month) restreint aux offres récentes.
+        """
+        fan_out = JOB_SEARCH_FAN_OUT if fan_out is None else fan_out
+
+        if fan_out:
+            target_jobs = target_jobs or num_pages * self.jsearch.JOBS_PER_PAGE
+            pages = self._iter_fan_out(query, location, num_pages, target_jobs, date_posted)
+        else:
+            pages = self._iter_hedged(query, location, num_pages, date_posted)
+
+        try:
+            async for jobs in pages:
+                yield jobs
+        finally:
+            await pages.aclose()
+
     def get_last_provider(self) -> str | None:
-        """Retourne le dernier provider utilisé (jsearch ou serpapi)"""
+        """Retourne le provider de la requête en cours (jsearch, serpapi ou jsearch+serpapi)"""
         return self.last_provider
 
+    def is_last_search_complete(self) -> bool:
+        """Vrai si la requête en cours a été menée à terme (au moins un provider a répondu, aucun n'a échoué en route)"""
+        return self._complete.get()
+
 
 job_search_service = JobSearchService()
@@ -1,60 +1,134 @@
-import unicodedata
+import asyncio
 import httpx
+from contextlib import nullcontext
+from typing import AsyncIterator
 from config import RAPIDAPI_KEY
-
-
-def normalize_text(text: str) -> str:
-    normalized = unicodedata.normalize("NFD", text)
-    without_accents = "".join(c for c in normalized if unicodedata.category(c) != "Mn")
-    return without_accents
+from services.http_client import http_client
+from services.query_canonicalizer import normalize_text
 
 
 class JSearchService:
     BASE_URL = "https://jsearch.p.rapidapi.com/search"
 
+    # JSearch renvoie ~10 offres par page et accepte plusieurs pages par requête
+    JOBS_PER_PAGE = 10
+    PAGES_PER_REQUEST = 3
+    # Requêtes simultanées d'une même recherche (pas de borne globale au processus)
+    MAX_CONCURRENT_REQUESTS = 3
+    # Filtres date_posted de JSearch, du plus étroit au plus large
+    DATE_POSTED_WINDOWS = (("today", 1), ("3days", 3), ("week", 7))
+
     def __init__(self):
         self.headers = {
             "X-RapidAPI-Key": RAPIDAPI_KEY,
             "X-RapidAPI-Host": "jsearch.p.rapidapi.com"
         }
+        self.http = http_client
+
+    def date_posted_window(self, elapsed_seconds: float) -> str | None:
+        """Plus petit filtre date_posted couvrant la durée écoulée (None au-delà d'une semaine)"""
+        for window, days in self.DATE_POSTED_WINDOWS:
+            if elapsed_seconds <= days * 86400:
+                return window
+        return None
+
+    def plan_windows(self, num_pages: int) -> list[tuple[int, int]]:
+        """Fenêtres (page, num_pages) sans chevauchement couvrant les pages 1..num_pages"""
+        return [
+            (start, min(self.PAGES_PER_REQUEST, num_pages - start + 1))
+            for start in range(1, num_pages + 1, self.PAGES_PER_REQUEST)
+        ]
+
+    async def _fetch_window(
+        self,
+        query: str,
+        location: str,
+        page: int,
+        num_pages: int,
+        date_posted: str = "month",
+        requests: asyncio.Semaphore | None = None,
+    ) -> list[dict]:
+        """Récupère une fenêtre de pages en une seule requête (bornée par le sémaphore de la recherche)"""
+        params = {
+            "query": f"{query} in {location}" if location else query,
+            "page": str(page),
+            "num_pages": str(num_pages),
+            "country": "ca",
+            "date_posted": date_posted
+        }
 
-    async def search_jobs(self, query: str, location: str = "", num_pages: int = 1) -> list[dict]:
-        all_jobs = []
-
+        try:
+            async with requests or nullcontext():
+                response = await self.http.get(
+                    self.BASE_URL,
+                    headers=self.headers,
+                    params=params
+                )
+            response.raise_for_status()
+            data = response.json()
+
+        except httpx.HTTPStatusError as e:
+            print(f"JSearch HTTP error page {page}: {e}")
+            raise
+        except httpx.RequestError as e:
+            # Timeout ou connexion refusée : remonte au disjoncteur du provider
+            print(f"JSearch request error page {page}: {e}")
+            raise
+
+        return data.get("data", [])
+
+    def _dedupe(self, jobs: list[dict], seen: set) -> list[dict]:
+        """Retire les offres déjà produites (même job_id)"""
+        unique = []
+        for job in jobs:
+            job_id = job.get("job_id")
+            if job_id:
+                if job_id in seen:
+                    continue
+                seen.add(job_id)
+            unique.append(job)
+        return unique
+
+    async def iter_pages(self, query: str, location: str = "", num_pages: int = 1, date_posted: str = "month") -> AsyncIterator[list[dict]]:
+        """Produit les offres fenêtre par fenêtre, dès que chaque requête aboutit"""
         query = normalize_text(query)
         location = normalize_text(location)
+        windows = self.plan_windows(num_pages)
+        if not windows:
+            return
+
+        seen = set()
+        # Borne propre à cette recherche : l'attente ne se mesure pas d'une recherche à l'autre
+        requests = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+
+        # Première fenêtre seule : inutile de payer les suivantes si elle n'est pas pleine
+        page, size = windows[0]
+        jobs = await self._fetch_window(query, location, page, size, date_posted, requests)
+        if not jobs:
+            return
+        yield self._dedupe(jobs, seen)
+
+        if len(jobs) < size * self.JOBS_PER_PAGE:
+            return
+
+        tasks = [
+            asyncio.create_task(self._fetch_window(query, location, page, size, date_posted, requests))
+            for page, size in windows[1:]
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                jobs = self._dedupe(await next_done, seen)
+                if jobs:
+                    yield jobs
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def search_jobs(self, query: str, location: str = "", num_pages: int = 1) -> list[dict]:
+        all_jobs = []
 
-        async with httpx.AsyncClient(timeout=30) as client:
-            for page in range(1, num_pages + 1):
-                params = {
-                    "query": f"{query} in {location}" if location else query,
-                    "page": str(page),
-                    "num_pages": "3",
-                    "country": "ca",
-                    "date_posted": "month"
-                }
-
-                try:
-                    response = await client.get(
-                        self.BASE_URL,
-                        headers=self.headers,
-                        params=params
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-
-                    jobs = data.get("data", [])
-                    if not jobs:
-                        break
-
-                    all_jobs.extend(jobs)
-
-                except httpx.HTTPStatusError as e:
-                    print(f"JSearch HTTP error page {page}: {e}")
-                    raise
-                except httpx.RequestError as e:
-                    print(f"JSearch request error page {page}: {e}")
-                    break
+        async for jobs in self.iter_pages(query, location, num_pages):
+            all_jobs.extend(jobs)
 
         return all_jobs
 
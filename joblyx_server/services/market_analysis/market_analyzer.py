@@ -1,8 +1,19 @@
+import math
+import time
 import asyncio
 from collections import Counter, defaultdict
+from typing import AsyncIterator
 from .job_search_service import job_search_service
 from .groq_service import groq_extractor
+from .skill_matcher import skill_matcher
+from .skills_taxonomy import skills_taxonomy
+from .posting_dedup import NearDuplicateFilter
+from .posting_store import posting_store
+from .single_flight import SingleFlight
+from .extraction_scheduler import extraction_scheduler, ExtractionFlow
 from services.cache_service import cache_service
+from services.query_canonicalizer import query_canonicalizer
+from config import SKILLS_EXTRACTOR
 
 
 class MarketAnalyzer:
@@ -40,12 +51,246 @@ class MarketAnalyzer:
 
     MIN_PERCENTAGE = 15.0
     MAX_PER_CATEGORY = 5
+    # Taille d'une page de provider (~10 offres)
+    JOBS_PER_PAGE = 10
 
     def __init__(self):
         self.job_search = job_search_service
-        self.extractor = groq_extractor
+        self.local_extractor = skill_matcher
+        self.taxonomy = skills_taxonomy
+        self.extractor = skill_matcher if SKILLS_EXTRACTOR == "local" else groq_extractor
         self.cache = cache_service
-    
+        self.store = posting_store
+        self.scheduler = extraction_scheduler
+        self.flights = SingleFlight()
+        self._refreshes: dict[str, asyncio.Task] = {}
+
+    # Extrait les skills avec le backend configuré, repli local pour chaque offre en échec (None).
+    # Toutes les pages d'une analyse passent par le même flux de l'ordonnanceur
+    async def _extract_skills(self, descriptions: list[str], flow: ExtractionFlow | None = None) -> list[list[dict]]:
+        results = list(await self.extractor.extract_all_skills(descriptions, flow=flow))
+
+        failed = [i for i, skills in enumerate(results) if skills is None]
+        if failed:
+            print(f"Extraction LLM en échec pour {len(failed)}/{len(descriptions)} offres, repli sur le matcher local")
+            fallback = await self.local_extractor.extract_all_skills([descriptions[i] for i in failed])
+            for i, skills in zip(failed, fallback):
+                results[i] = skills
+
+        return results
+
+    # Convertit des skills extraits en IDs de la taxonomie (pour le stockage)
+    def _skill_ids(self, skills_list: list[dict]) -> list[int]:
+        ids = (self.taxonomy.resolve(s["name"]) for s in skills_list)
+        return [skill_id for skill_id in ids if skill_id is not None]
+
+    # Reconstruit des skills {name, category} à partir d'IDs stockés
+    def _skills_from_ids(self, skill_ids: list[int]) -> list[dict]:
+        return [
+            {"name": self.taxonomy.names[i], "category": self.taxonomy.category_of_id(i)}
+            for i in skill_ids if i in self.taxonomy.names
+        ]
+
+    # Extrait les skills d'une page d'offres puis les enregistre dans le store local
+    async def _extract_and_store(self, query: str, city: str, province: str, jobs: list[dict], flow: ExtractionFlow | None = None) -> list[list[dict]]:
+        results = await self._extract_skills([job["job_description"] for job in jobs], flow)
+
+        # Ne stocker que des pages entièrement extraites (écriture SQLite hors de la boucle)
+        if len(results) == len(jobs) and all(skills is not None for skills in results):
+            await asyncio.to_thread(self.store.save, query, city, province, jobs, [self._skill_ids(skills) for skills in results])
+
+        return results
+
+    # Offres stockées du marché, filtre de quasi-doublons amorcé avec elles et celles qu'il retient.
+    # Lecture SQLite et signatures MinHash (~10 ms chacune) : à appeler dans un thread (asyncio.to_thread)
+    def _load_stored(self, query: str, city: str, province: str) -> tuple[list[dict], NearDuplicateFilter, list[dict]]:
+        stored = self.store.find(query, city, province)
+        near_duplicates = NearDuplicateFilter()
+        unique = [posting for posting in stored if not near_duplicates.is_duplicate(posting["description"])]
+        return stored, near_duplicates, unique
+
+    # Extrait et stocke les nouvelles offres de chaque page dès son arrivée (fetch et LLM
+    # se chevauchent). Les offres connues et les quasi-doublons n'atteignent pas le LLM.
+    # Retourne les clés des offres retenues et leurs skills.
+    async def _extract_new_pages(
+        self,
+        query: str,
+        city: str,
+        province: str,
+        pages: AsyncIterator[list[dict]],
+        known_keys: set[str],
+        near_duplicates: NearDuplicateFilter,
+        flow: ExtractionFlow | None = None,
+        since: float | None = None,
+    ) -> tuple[list[str], list[list[dict]]]:
+        new_keys = []
+        tasks = []
+        try:
+            async for jobs in pages:
+                # SerpAPI ne filtre pas par date : on écarte ce qui précède le snapshot
+                new_jobs = [
+                    job for job in jobs
+                    if job.get("job_description")
+                    and (since is None or (job.get("job_posted_at_timestamp") or since) >= since)
+                    and self.store.posting_key(job) not in known_keys
+                    and not near_duplicates.is_duplicate(job["job_description"])
+                ]
+                if not new_jobs:
+                    continue
+                new_keys.extend(self.store.posting_key(job) for job in new_jobs)
+                tasks.append(asyncio.create_task(self._extract_and_store(query, city, province, new_jobs, flow)))
+
+            extracted = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return new_keys, [skills for page in extracted for skills in page]
+
+    # Offres déjà stockées d'abord, puis providers pour le complément uniquement
+    async def _fetch_and_extract(self, query: str, city: str, province: str, num_pages: int, flow: ExtractionFlow | None = None) -> dict:
+        target_jobs = num_pages * self.JOBS_PER_PAGE
+
+        stored, near_duplicates, unique = await asyncio.to_thread(self._load_stored, query, city, province)
+        keys = [posting["key"] for posting in unique]
+        results = [self._skills_from_ids(posting["skill_ids"]) for posting in unique]
+
+        missing_pages = math.ceil((target_jobs - len(unique)) / self.JOBS_PER_PAGE)
+        if missing_pages <= 0:
+            print(f"MarketAnalyzer: {len(unique)} stored postings, no provider call")
+            return {
+                "total_jobs": len(keys),
+                "keys": keys,
+                "results": results,
+                "duplicates_removed": near_duplicates.removed,
+                "provider": "store",
+                "complete": False,
+            }
+
+        new_keys, new_results = await self._extract_new_pages(
+            query, city, province,
+            self.job_search.iter_jobs(query=query, location=f"{city}, {province}, Canada", num_pages=missing_pages),
+            {posting["key"] for posting in stored}, near_duplicates, flow,
+        )
+
+        provider = self.job_search.get_last_provider()
+        if unique:
+            provider = f"store+{provider}" if provider else "store"
+
+        return {
+            "total_jobs": len(keys) + len(new_keys),
+            "keys": keys + new_keys,
+            "results": results + new_results,
+            "duplicates_removed": near_duplicates.removed,
+            "provider": provider,
+            "complete": self.job_search.is_last_search_complete(),
+        }
+
+    # Rafraîchissement incrémental à partir du dernier snapshot : seules les offres
+    # publiées depuis sont demandées et extraites. None si un recalcul complet s'impose.
+    async def _refresh_incremental(self, query: str, city: str, province: str, num_pages: int, flow: ExtractionFlow | None = None) -> dict | None:
+        snapshot = await asyncio.to_thread(self.store.get_snapshot, query, city, province)
+        if not snapshot or snapshot["total_jobs"] <= 0:
+            return None
+
+        since = snapshot["refreshed_at"]
+        date_posted = self.job_search.jsearch.date_posted_window(time.time() - since)
+        if date_posted is None:
+            return None
+
+        stored, near_duplicates, unique = await asyncio.to_thread(self._load_stored, query, city, province)
+        new_keys, new_results = await self._extract_new_pages(
+            query, city, province,
+            self.job_search.iter_jobs(
+                query=query,
+                location=f"{city}, {province}, Canada",
+                num_pages=num_pages,
+                date_posted=date_posted
+            ),
+            {posting["key"] for posting in stored}, near_duplicates, flow, since,
+        )
+
+        provider = self.job_search.get_last_provider()
+        print(f"MarketAnalyzer: incremental refresh ({date_posted}), +{len(new_keys)} postings")
+        return {
+            "total_jobs": len(unique) + len(new_keys),
+            "keys": [posting["key"] for posting in unique] + new_keys,
+            "results": [self._skills_from_ids(posting["skill_ids"]) for posting in unique] + new_results,
+            "duplicates_removed": near_duplicates.removed,
+            "provider": f"snapshot+{provider}" if provider else "snapshot",
+            "complete": self.job_search.is_last_search_complete(),
+        }
+
+    # Résultat d'un marché à partir d'un vecteur de comptage par ID de skill
+    def _market_from_counts(self, total_jobs: int, counts: Counter, duplicates_removed: int, provider: str | None) -> dict:
+        return {
+            "total_jobs": total_jobs,
+            "skill_counts": Counter({self.taxonomy.names[i]: count for i, count in counts.items() if i in self.taxonomy.names}),
+            "skill_categories": {self.taxonomy.names[i]: self.taxonomy.category_of_id(i) for i in counts if i in self.taxonomy.names},
+            "duplicates_removed": duplicates_removed,
+            "provider": provider,
+        }
+
+    # Vecteur de comptage des offres retenues (sans quasi-doublons), relu dans le store :
+    # même dénominateur pour le recalcul complet et l'incrémental. Le snapshot, dont la date
+    # sert de départ au prochain delta, n'avance que si les providers ont répondu
+    # et que toutes les offres retenues sont stockées.
+    async def _count_market(self, query: str, city: str, province: str, fetched: dict) -> dict:
+        keys = set(fetched["keys"])
+        stored = await asyncio.to_thread(self.store.find, query, city, province)
+        postings = [posting for posting in stored if posting["key"] in keys]
+
+        if not postings:
+            # Store indisponible : comptage sur les seuls résultats de cette collecte
+            all_skills, skill_categories = self._process_skills_results(fetched["results"])
+            return {
+                "total_jobs": fetched["total_jobs"],
+                "skill_counts": Counter(all_skills),
+                "skill_categories": skill_categories,
+                "duplicates_removed": fetched["duplicates_removed"],
+                "provider": fetched["provider"],
+            }
+
+        counts = Counter(skill_id for posting in postings for skill_id in posting["skill_ids"])
+        if fetched["complete"] and len(postings) == len(keys):
+            await asyncio.to_thread(self.store.save_snapshot, query, city, province, len(postings), dict(counts))
+
+        return self._market_from_counts(len(postings), counts, fetched["duplicates_removed"], fetched["provider"])
+
+    # Comptage des skills du marché : incrémental si un snapshot récent existe, complet sinon.
+    # Un seul flux d'extraction pour toute l'analyse (équité entre analyses concurrentes)
+    async def _compute_market(self, query: str, city: str, province: str, num_pages: int, weight: int = 1) -> dict:
+        with self.scheduler.flow(weight) as flow:
+            fetched = await self._refresh_incremental(query, city, province, num_pages, flow)
+            if fetched is None:
+                fetched = await self._fetch_and_extract(query, city, province, num_pages, flow)
+
+        return await self._count_market(query, city, province, fetched)
+
+    # Une seule collecte par marché (clé canonique) : les demandes simultanées
+    # attendent le résultat de la première au lieu de relancer fetch + LLM
+    async def _collect_market(self, query: str, city: str, province: str, num_pages: int, weight: int = 1) -> dict:
+        key = (query_canonicalizer.key(query, city, province), num_pages)
+        return await self.flights.do(key, lambda: self._compute_market(query, city, province, num_pages, weight))
+
+    # Recalcule en arrière-plan un marché servi périmé, un seul recalcul à la fois par marché
+    def _refresh_in_background(self, analyze, query: str, city: str, province: str, **kwargs) -> None:
+        key = query_canonicalizer.key(query, city, province)
+        running = self._refreshes.get(key)
+        if running and not running.done():
+            return
+
+        async def refresh():
+            try:
+                await analyze(query, city, province, use_cache=False, **kwargs)
+            except Exception as e:
+                print(f"Background refresh error for {key}: {e}")
+
+        task = asyncio.create_task(refresh())
+        self._refreshes[key] = task
+        task.add_done_callback(lambda done: self._refreshes.pop(key, None) if self._refreshes.get(key) is done else None)
+
     # Traite les résultats d'extraction pour obtenir skills et catégories
     def _process_skills_results(self, results: list[list[dict]]) -> tuple[list, dict]:
         
@@ -55,7 +300,7 @@ class MarketAnalyzer:
         for skills_list in results:
             for skill_info in skills_list:
                 skill_name = skill_info["name"]
-                category = skill_info["category"]
+                category = skill_info.get("category") or self.taxonomy.category_of(skill_name)
                 all_skills.append(skill_name)
                 if skill_name not in skill_categories:
                     skill_categories[skill_name] = category
@@ -71,24 +316,28 @@ class MarketAnalyzer:
         top_n: int = 30,
         balanced: bool = True,
         num_pages: int = 3,
+        weight: int = 1,
+        use_cache: bool = True,
     ) -> dict:
         
 
         location = f"{city}, {province}, Canada"
-        # Verifier le cache
-        cached = self.cache.get_cache_results(query, city, province)
+        # Verifier le cache (un résultat périmé est servi tout de suite puis recalculé)
+        cached = self.cache.get_cache_results(query, city, province, allow_stale=True) if use_cache else None
         if cached:
             cached["from_cache"] = True
+            if cached.get("stale"):
+                self._refresh_in_background(
+                    self.analyze_market, query, city, province,
+                    top_n=top_n, balanced=balanced, num_pages=num_pages
+                )
             return cached
         
-        # Récupérer les descriptions des offres (JSearch ou SerpAPI fallback)
-        descriptions = await self.job_search.get_job_descriptions(
-            query=query,
-            location=location,
-            num_pages=num_pages
-        )
-
-        total_jobs = len(descriptions)
+        # Snapshot mis à jour par le delta, sinon offres stockées puis complément des providers
+        fetched = await self._collect_market(query, city, province, num_pages, weight)
+        total_jobs = fetched["total_jobs"]
+        skill_counts = fetched["skill_counts"]
+        skill_categories = fetched["skill_categories"]
 
         if total_jobs == 0:
             return {
@@ -100,13 +349,6 @@ class MarketAnalyzer:
                 "from_cache": False
             }
 
-        # Extraire les skills en parallèle avec Groq
-        results = await self.extractor.extract_all_skills(descriptions)
-        all_skills, skill_categories = self._process_skills_results(results)
-
-        # Compter et trier
-        skill_counts = Counter(all_skills)
-
         # Construire la liste des top skills
         top_skills = []
         category_counts = defaultdict(int)
@@ -138,6 +380,8 @@ class MarketAnalyzer:
             "location": location,
             "total_jobs_analyzed": total_jobs,
             "top_skills": top_skills,
+            "provider": fetched["provider"],
+            "duplicates_removed": fetched["duplicates_removed"],
             "from_cache": False
         }
 
@@ -152,24 +396,26 @@ class MarketAnalyzer:
         city: str,
         province: str,
         num_pages: int = 3,
+        weight: int = 1,
+        use_cache: bool = True,
     ) -> dict:
         """Analyse le marché avec Groq pour l'extraction"""
 
         location = f"{city}, {province}, Canada"
 
-        # Vérifier le cache
-        cached = self.cache.get_cache_results(query, city, province)
+        # Vérifier le cache (un résultat périmé est servi tout de suite puis recalculé)
+        cached = self.cache.get_cache_results(query, city, province, allow_stale=True) if use_cache else None
         if cached:
             cached["from_cache"] = True
+            if cached.get("stale"):
+                self._refresh_in_background(self.get_skills_by_category, query, city, province, num_pages=num_pages)
             return cached
 
-        descriptions = await self.job_search.get_job_descriptions(
-            query=query,
-            location=location,
-            num_pages=num_pages
-        )
-
-        total_jobs = len(descriptions)
+        # Extraction page par page, pendant que les pages suivantes se téléchargent
+        fetched = await self._collect_market(query, city, province, num_pages, weight)
+        total_jobs = fetched["total_jobs"]
+        skill_counts = fetched["skill_counts"]
+        skill_categories = fetched["skill_categories"]
 
         if total_jobs == 0:
             return {
@@ -181,13 +427,6 @@ class MarketAnalyzer:
                 "from_cache": False
             }
 
-        # Extraire les skills en parallèle avec Groq
-        results = await self.extractor.extract_all_skills(descriptions)
-        all_skills, skill_categories = self._process_skills_results(results)
-
-        # Compter les skills
-        skill_counts = Counter(all_skills)
-
         # Grouper par catégorie avec filtres
         by_category = defaultdict(list)
         for skill_name, count in skill_counts.most_common():
@@ -214,6 +453,8 @@ class MarketAnalyzer:
             "location": location,
             "total_jobs_analyzed": total_jobs,
             "skills_by_category": ordered,
+            "provider": fetched["provider"],
+            "duplicates_removed": fetched["duplicates_removed"],
             "from_cache": False
         }
 
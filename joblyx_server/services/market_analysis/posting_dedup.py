@@ -0,0 +1,118 @@
+import re
+import zlib
+import random
+import hashlib
+from config import NEAR_DUPLICATE_THRESHOLD
+from .skills_taxonomy import fold_text
+
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Permutations MinHash (a * x + b) mod p, fixes pour des signatures reproductibles
+_PRIME = (1 << 61) - 1
+_NUM_PERMUTATIONS = 64
+_rng = random.Random(17)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(_NUM_PERMUTATIONS)]
+
+
+def normalize_words(text: str) -> str:
+    """Minuscules sans accents ni ponctuation, espaces normalisés"""
+    return _NON_WORD.sub(" ", fold_text(text or "")).strip()
+
+
+def posting_fingerprint(job: dict) -> str:
+    """Empreinte titre + employeur + début de description, stable entre providers"""
+    title = normalize_words(job.get("job_title", ""))
+    employer = normalize_words(job.get("employer_name", ""))
+    # Les providers tronquent parfois la fin des descriptions : seul le début compte
+    description = " ".join(normalize_words(job.get("job_description", "")).split()[:PostingDeduplicator.DESCRIPTION_WORDS])
+    return hashlib.sha1(f"{title}|{employer}|{description}".encode("utf-8")).hexdigest()
+
+
+class PostingDeduplicator:
+    """Filtre les offres déjà vues, y compris la même offre venant d'un autre provider"""
+
+    DESCRIPTION_WORDS = 50
+
+    def __init__(self):
+        self._seen: set[str] = set()
+        self.duplicates = 0
+
+    def filter(self, jobs: list[dict]) -> list[dict]:
+        unique = []
+        for job in jobs:
+            fingerprint = posting_fingerprint(job)
+            if fingerprint in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen.add(fingerprint)
+            unique.append(job)
+        return unique
+
+
+class NearDuplicateFilter:
+    """
+    Filtre de quasi-doublons sur les descriptions (la même offre reprise par
+    un recruteur ou un autre site avec de petites retouches). Shingles de
+    mots, signature MinHash et LSH par bandes pour ne comparer que les
+    candidats ; la similarité de Jaccard estimée est comparée au seuil.
+    """
+
+    SHINGLE_SIZE = 5
+    NUM_PERMUTATIONS = _NUM_PERMUTATIONS
+    # 16 bandes de 4 lignes : paires à Jaccard >= 0.5 presque toujours candidates
+    BANDS = 16
+    ROWS = NUM_PERMUTATIONS // BANDS
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._signatures: list[tuple[int, ...]] = []
+        self._buckets: dict[tuple, list[int]] = {}
+        self.removed = 0
+
+    def _shingles(self, text: str) -> set[int]:
+        words = normalize_words(text).split()
+        size = min(self.SHINGLE_SIZE, len(words)) or 1
+        return {
+            zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+            for i in range(max(1, len(words) - size + 1))
+        }
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        """Signature MinHash d'une description"""
+        shingles = self._shingles(text)
+        return tuple(
+            min((a * x + b) % _PRIME for x in shingles)
+            for a, b in _PERMUTATIONS
+        )
+
+    @staticmethod
+    def similarity(first: tuple[int, ...], second: tuple[int, ...]) -> float:
+        """Jaccard estimé : part des minimums identiques"""
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+
+    def _bands(self, signature: tuple[int, ...]) -> list[tuple]:
+        return [
+            (band, signature[band * self.ROWS:(band + 1) * self.ROWS])
+            for band in range(self.BANDS)
+        ]
+
+    def is_duplicate(self, text: str) -> bool:
+        """Vrai si la description est proche d'une description déjà vue (sinon elle est retenue)"""
+        signature = self.signature(text)
+        bands = self._bands(signature)
+
+        candidates = {index for band in bands for index in self._buckets.get(band, ())}
+        for index in candidates:
+            if self.similarity(signature, self._signatures[index]) >= self.threshold:
+                self.removed += 1
+                return True
+
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for band in bands:
+            self._buckets.setdefault(band, []).append(index)
+        return False
+
+    def filter(self, descriptions: list[str]) -> list[str]:
+        return [d for d in descriptions if not self.is_duplicate(d)]
@@ -0,0 +1,172 @@
+import re
+import html
+from .skill_matcher import skill_matcher, fold_text
+
+
+# Titres de sections (texte sans accents, en minuscules), anglais et français
+SECTION_PATTERNS = {
+    "requirements": (
+        r"requirements?|qualifications?|what you(?:'ll| will)? (?:bring|need)|must[- ]haves?"
+        r"|(?:technical |required )?skills|you have|your profile|who you are|tech(?:nical)? stack"
+        r"|technologies|exigences|competences(?: requises)?|profil recherche|votre profil"
+        r"|ce que (?:vous apportez|nous recherchons)|qualifications requises"
+    ),
+    "nice_to_have": (
+        r"nice[- ]to[- ]haves?|bonus(?: points)?|assets?|preferred(?: qualifications)?|pluses"
+        r"|atouts?|un plus|serait un atout"
+    ),
+    "responsibilities": (
+        r"responsibilities|what you(?:'ll| will)? do|your role|the role|duties|key tasks"
+        r"|about (?:the|this) (?:role|position|job|opportunity)|a propos du (?:poste|role)"
+        r"|responsabilites|taches|vos mandats|mandats?|description du poste|votre role|le role"
+    ),
+    "boilerplate": (
+        r"about (?:us|the company|the team)|who we are|benefits|perks|what we offer|why join"
+        r"|equal (?:employment )?opportunit|diversity|accommodation|how to apply|salary|compensation"
+        r"|a propos|avantages|nous offrons|ce que nous offrons|pourquoi (?:nous )?rejoindre"
+        r"|equite|diversite|accommodement|remuneration|conditions de travail"
+    ),
+}
+
+# Lignes de boilerplate à supprimer où qu'elles apparaissent
+BOILERPLATE_LINE_PATTERN = re.compile(
+    r"equal (?:employment )?opportunity|without regard to|accommodations? (?:are|is) available"
+    r"|reasonable accommodation|we thank all applicants|only (?:those|candidates) selected"
+    r"|employeur souscrivant|egalite (?:d'acces|en emploi)|seules les personnes retenues"
+    r"|nous remercions tous les candidats|mesures d'adaptation"
+)
+
+# Titre suivi de ':' : le début suffit ("Requirements for this role:")
+_HEADING_REGEXES = {
+    kind: re.compile(rf"^(?:{pattern})\b")
+    for kind, pattern in SECTION_PATTERNS.items()
+}
+
+# Titre seul sur sa ligne : la ligne entière doit être un titre ("Benefits & Perks"),
+# sinon "Benefits include dental" ou "Salary based on experience" ouvriraient une section
+_BARE_HEADING_REGEXES = {
+    kind: re.compile(rf"(?:{pattern})(?:\s*(?:&|and|et|/|,)\s*(?:{pattern}))*[.!?]*")
+    for kind, pattern in SECTION_PATTERNS.items()
+}
+
+_BLOCK_TAGS = re.compile(r"<\s*(?:br|/?p|/?div|/?li|/?ul|/?ol|/?h\d)[^>]*>", re.IGNORECASE)
+_TAGS = re.compile(r"<[^>]+>")
+_BULLET = re.compile(r"^[\s\-*•·▪●◦>#]+")
+
+
+class PostingPreprocessor:
+    """
+    Prépare une offre avant l'envoi au LLM : retire le HTML et le
+    boilerplate, découpe en sections (titres anglais et français) et garde
+    les sections les plus riches en skills dans un budget de tokens.
+    """
+
+    # Poids des types de section (0 = envoyé seulement s'il contient des skills)
+    SECTION_WEIGHTS = {
+        "requirements": 3.0,
+        "nice_to_have": 2.0,
+        "responsibilities": 1.5,
+        "intro": 1.0,
+        "boilerplate": 0.0,
+    }
+    DEFAULT_TOKEN_BUDGET = 750
+    CHARS_PER_TOKEN = 4
+    # Un titre fait rarement plus de quelques mots
+    MAX_HEADING_WORDS = 6
+    # En dessous, inutile de tronquer une section pour remplir le budget
+    MIN_PARTIAL_TOKENS = 40
+
+    def __init__(self):
+        self.matcher = skill_matcher
+
+    def strip_html(self, text: str) -> str:
+        """Convertit le HTML en texte brut en gardant les sauts de ligne"""
+        text = _BLOCK_TAGS.sub("\n", text)
+        text = _TAGS.sub(" ", text)
+        text = html.unescape(text)
+        lines = (re.sub(r"[ \t\xa0]+", " ", line).strip() for line in text.splitlines())
+        return "\n".join(line for line in lines if line)
+
+    def _heading_kind(self, line: str) -> str | None:
+        """Détecte un titre de section (éventuellement suivi de contenu après ':')"""
+        stripped = _BULLET.sub("", line).strip()
+        heading, sep, _ = stripped.partition(":")
+        heading = heading.strip().strip("*_")
+        if not heading or len(heading.split()) > self.MAX_HEADING_WORDS:
+            return None
+
+        folded = fold_text(heading).strip()
+        regexes = _HEADING_REGEXES if sep else _BARE_HEADING_REGEXES
+        for kind, regex in regexes.items():
+            if (regex.match if sep else regex.fullmatch)(folded):
+                return kind
+
+        return None
+
+    def split_sections(self, text: str) -> list[dict]:
+        """Découpe une offre en sections {kind, text}"""
+        sections = [{"kind": "intro", "lines": []}]
+
+        for line in self.strip_html(text).splitlines():
+            if BOILERPLATE_LINE_PATTERN.search(fold_text(line)):
+                continue
+
+            kind = self._heading_kind(line)
+            if kind:
+                sections.append({"kind": kind, "lines": [line]})
+            else:
+                sections[-1]["lines"].append(line)
+
+        return [
+            {"kind": s["kind"], "text": "\n".join(s["lines"])}
+            for s in sections if s["lines"]
+        ]
+
+    def _score(self, section: dict) -> float:
+        """Poids du type de section × densité de skills"""
+        tokens = len(section["text"]) / self.CHARS_PER_TOKEN + 1
+        hits = len(self.matcher.find_matches(section["text"]))
+        return self.SECTION_WEIGHTS[section["kind"]] * (hits / tokens + 0.01)
+
+    def prepare(self, text: str, token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+        """Retourne le texte à envoyer au LLM, dans la limite du budget"""
+        char_budget = token_budget * self.CHARS_PER_TOKEN
+        sections = []
+        for section in self.split_sections(text):
+            if self.SECTION_WEIGHTS[section["kind"]] == 0:
+                # Titre mal classé : une section qui cite des skills n'est jamais retirée
+                if not self.matcher.find_matches(section["text"]):
+                    continue
+                section = {**section, "kind": "intro"}
+            sections.append(section)
+
+        # Offre sans section exploitable : repli sur une simple troncature
+        if not sections:
+            return self.strip_html(text)[:char_budget]
+
+        if sum(len(s["text"]) for s in sections) <= char_budget:
+            return "\n".join(s["text"] for s in sections)
+
+        ranked = sorted(range(len(sections)), key=lambda i: self._score(sections[i]), reverse=True)
+        kept = {}
+        remaining = char_budget
+
+        for i in ranked:
+            section_text = sections[i]["text"]
+            if len(section_text) <= remaining:
+                kept[i] = section_text
+                remaining -= len(section_text) + 1
+            elif remaining >= self.MIN_PARTIAL_TOKENS * self.CHARS_PER_TOKEN:
+                # Couper sur une fin de ligne si possible
+                cut = section_text[:remaining]
+                kept[i] = cut[:cut.rfind("\n")] if "\n" in cut else cut
+                remaining = 0
+
+            if remaining <= 0:
+                break
+
+        # Conserver l'ordre d'origine pour la lisibilité
+        return "\n".join(kept[i] for i in sorted(kept))
+
+
+posting_preprocessor = PostingPreprocessor()
@@ -0,0 +1,198 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from config import POSTING_STORE_MAX_AGE_DAYS
+from services.query_canonicalizer import query_canonicalizer
+from .posting_dedup import posting_fingerprint
+
+
+class PostingStore:
+    """
+    Stockage local des offres normalisées avec leurs skills extraits (IDs
+    de la taxonomie), indexé par ville et date de publication. Permet de
+    répondre à une nouvelle recherche sur la même ville sans rappeler les
+    providers ni le LLM pour les offres déjà connues.
+    """
+
+    DEFAULT_PATH = Path(__file__).parent.parent.parent / "data" / "postings.sqlite3"
+
+    def __init__(self, path: Path | str = DEFAULT_PATH, max_age_days: int = POSTING_STORE_MAX_AGE_DAYS):
+        self.path = Path(path)
+        self.max_age_days = max_age_days
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def posting_key(job: dict) -> str:
+        """ID du provider si disponible, sinon empreinte du contenu"""
+        if job.get("job_id"):
+            return f"{job.get('provider', 'jsearch')}:{job['job_id']}"
+        return f"fp:{posting_fingerprint(job)}"
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre la base au premier accès"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                "key TEXT PRIMARY KEY, provider TEXT, job_id TEXT, search_query TEXT NOT NULL, "
+                "title TEXT, employer TEXT, description TEXT NOT NULL, "
+                "city TEXT NOT NULL, province TEXT NOT NULL, "
+                "posted_at REAL NOT NULL, fetched_at REAL NOT NULL, skill_ids TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_location_date ON postings(city, province, posted_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_posted_at ON postings(posted_at)")
+            # Vecteurs de comptage par marché, mis à jour à chaque rafraîchissement
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS market_snapshots ("
+                "key TEXT PRIMARY KEY, refreshed_at REAL NOT NULL, "
+                "total_jobs INTEGER NOT NULL, skill_counts TEXT NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _cutoff(self, max_age_days: int | None) -> float:
+        return time.time() - (max_age_days or self.max_age_days) * 86400
+
+    @staticmethod
+    def _matches(query_words: list[str], search_query: str, title: str) -> bool:
+        """Offre trouvée par la même recherche ou dont le titre contient tous les mots"""
+        if search_query == " ".join(query_words):
+            return True
+        title_words = set(query_canonicalizer.canonical_query(title).split())
+        return all(word in title_words for word in query_words)
+
+    def _select(self, query: str, city: str, province: str, posted_from: float, posted_to: float | None = None) -> list[dict]:
+        """Offres de la ville correspondant à la recherche, publiées dans l'intervalle"""
+        query_words = query_canonicalizer.canonical_query(query).split()
+        sql = (
+            "SELECT key, search_query, title, description, posted_at, skill_ids FROM postings "
+            "WHERE city = ? AND province = ? AND posted_at >= ? AND skill_ids IS NOT NULL"
+        )
+        params = [query_canonicalizer.canonical_city(city), query_canonicalizer.canonical_province(province), posted_from]
+        if posted_to is not None:
+            sql += " AND posted_at < ?"
+            params.append(posted_to)
+
+        try:
+            with self._lock:
+                rows = self._connect().execute(sql + " ORDER BY posted_at DESC", params).fetchall()
+        except sqlite3.Error as e:
+            print(f"Posting store read error: {e}")
+            return []
+
+        return [
+            {
+                "key": key,
+                "description": description,
+                "posted_at": posted_at,
+                "skill_ids": json.loads(skill_ids),
+            }
+            for key, search_query, title, description, posted_at, skill_ids in rows
+            if self._matches(query_words, search_query, title or "")
+        ]
+
+    def find(self, query: str, city: str, province: str, max_age_days: int | None = None) -> list[dict]:
+        """Offres récentes de la ville correspondant à la recherche, avec leurs skills"""
+        return self._select(query, city, province, self._cutoff(max_age_days))
+
+    def get_snapshot(self, query: str, city: str, province: str) -> dict | None:
+        """Dernier vecteur de comptage du marché (IDs de skills -> nombre d'offres)"""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT refreshed_at, total_jobs, skill_counts FROM market_snapshots WHERE key = ?",
+                    (query_canonicalizer.key(query, city, province),)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Posting store read error: {e}")
+            return None
+
+        if not row:
+            return None
+        refreshed_at, total_jobs, skill_counts = row
+        return {
+            "refreshed_at": refreshed_at,
+            "total_jobs": total_jobs,
+            "skill_counts": {int(skill_id): count for skill_id, count in json.loads(skill_counts).items()},
+        }
+
+    def save_snapshot(self, query: str, city: str, province: str, total_jobs: int, skill_counts: dict[int, int]) -> None:
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO market_snapshots (key, refreshed_at, total_jobs, skill_counts) "
+                    "VALUES (?, ?, ?, ?)",
+                    (query_canonicalizer.key(query, city, province), time.time(), total_jobs, json.dumps(skill_counts))
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Posting store write error: {e}")
+
+    def save(self, query: str, city: str, province: str, jobs: list[dict], skill_ids: list[list[int]]) -> None:
+        """Enregistre des offres et leurs skills extraits"""
+        if not jobs:
+            return
+
+        now = time.time()
+        rows = [
+            (
+                self.posting_key(job),
+                job.get("provider"),
+                job.get("job_id"),
+                query_canonicalizer.canonical_query(query),
+                job.get("job_title"),
+                job.get("employer_name"),
+                job["job_description"],
+                query_canonicalizer.canonical_city(city),
+                query_canonicalizer.canonical_province(province),
+                float(job.get("job_posted_at_timestamp") or now),
+                now,
+                json.dumps(ids),
+            )
+            for job, ids in zip(jobs, skill_ids)
+        ]
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO postings (key, provider, job_id, search_query, title, employer, "
+                    "description, city, province, posted_at, fetched_at, skill_ids) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Posting store write error: {e}")
+
+    def purge(self, max_age_days: int | None = None) -> int:
+        """Supprime les offres trop anciennes, retourne le nombre supprimé"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                deleted = conn.execute("DELETE FROM postings WHERE posted_at < ?", (self._cutoff(max_age_days),)).rowcount
+                conn.commit()
+                return deleted
+        except sqlite3.Error as e:
+            print(f"Posting store purge error: {e}")
+            return 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM market_snapshots")
+            conn.commit()
+
+
+posting_store = PostingStore()
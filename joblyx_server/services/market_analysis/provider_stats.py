@@ -0,0 +1,42 @@
+from collections import defaultdict, deque
+
+
+class ProviderLatencyTracker:
+    """
+    Latences récentes des providers d'offres (temps jusqu'à la première
+    réponse exploitable), sur une fenêtre glissante par provider.
+    Sert à calculer le délai de hedging de JobSearchService.
+    """
+
+    WINDOW = 200
+    # En dessous, les percentiles ne sont pas significatifs
+    MIN_SAMPLES = 20
+
+    def __init__(self):
+        self._samples: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=self.WINDOW))
+
+    def record(self, provider: str, seconds: float) -> None:
+        self._samples[provider].append(seconds)
+
+    def percentile(self, provider: str, percentile: float) -> float | None:
+        """Percentile (0-100) des latences, None s'il n'y a pas assez d'échantillons"""
+        samples = self._samples.get(provider)
+        if not samples or len(samples) < self.MIN_SAMPLES:
+            return None
+
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, round(percentile / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def get_stats(self) -> dict:
+        return {
+            provider: {
+                "samples": len(samples),
+                "p50": self.percentile(provider, 50),
+                "p95": self.percentile(provider, 95),
+            }
+            for provider, samples in self._samples.items()
+        }
+
+
+provider_latency = ProviderLatencyTracker()
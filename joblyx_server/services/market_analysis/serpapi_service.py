@@ -1,31 +1,76 @@
-import unicodedata
+import re
+import time
 import asyncio
+import httpx
+from typing import AsyncIterator
 from config import SERPAPI_KEY
-from serpapi.google_search import GoogleSearch
+from services.http_client import http_client
+from services.query_canonicalizer import normalize_text
 
 
-def normalize_text(text: str) -> str:
-    normalized = unicodedata.normalize("NFD", text)
-    without_accents = "".join(c for c in normalized if unicodedata.category(c) != "Mn")
-    return without_accents
+_POSTED_AT_PATTERN = re.compile(r"(\d+)\+?\s*(minute|hour|day|week|month)")
+_POSTED_AT_UNITS = {"minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400, "month": 30 * 86400}
+
+
+def parse_posted_at(value: str | None) -> float | None:
+    """Convertit une date relative Google Jobs ("3 days ago") en timestamp"""
+    match = _POSTED_AT_PATTERN.search(value or "")
+    if not match:
+        return None
+    return time.time() - int(match.group(1)) * _POSTED_AT_UNITS[match.group(2)]
 
 
 class SerpAPIService:
+    BASE_URL = "https://serpapi.com/search"
 
     def __init__(self):
         self.api_key = SERPAPI_KEY
-
-    def _search_sync(self, params: dict) -> dict:
-        """Recherche synchrone avec GoogleSearch"""
-        search = GoogleSearch(params)
-        return search.get_dict()
-
-    async def search_jobs(self, query: str, location: str = "", num_results: int = 30, language: str = "en") -> list[dict]:
+        self.http = http_client
+
+    async def _fetch_page(self, params: dict) -> dict:
+        """Requête async vers le moteur google_jobs"""
+        response = await self.http.get(self.BASE_URL, params=params)
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            # Message sans l'URL (elle contient api_key), avec l'erreur détaillée par SerpAPI
+            raise httpx.HTTPStatusError(
+                f"SerpAPI HTTP {response.status_code}: {self._error_detail(response)}",
+                request=e.request,
+                response=response,
+            ) from None
+        return response.json()
+
+    @staticmethod
+    def _error_detail(response: httpx.Response) -> str:
+        """Champ error du corps JSON d'une réponse en échec"""
+        try:
+            return str(response.json().get("error", ""))
+        except (ValueError, AttributeError):
+            return ""
+
+    def _normalize_jobs(self, jobs: list[dict]) -> list[dict]:
+        """Convertit les résultats Google Jobs au format JSearch"""
+        return [
+            {
+                "job_id": job.get("job_id"),
+                "job_title": job.get("title", ""),
+                "job_description": job.get("description", ""),
+                "employer_name": job.get("company_name", ""),
+                "job_city": job.get("location", ""),
+                "job_country": "CA",
+                "job_posted_at_timestamp": parse_posted_at(job.get("detected_extensions", {}).get("posted_at")),
+            }
+            for job in jobs
+        ]
+
+    async def iter_pages(self, query: str, location: str = "", num_pages: int = 1, language: str = "en") -> AsyncIterator[list[dict]]:
+        """Produit les offres page par page ; la page suivante est préchargée pendant le traitement"""
         if not self.api_key:
             print("SerpAPI: API key not configured")
-            return []
+            return
 
-        all_jobs = []
+        collected = 0
 
         query = normalize_text(query)
         # Extraire juste la ville du format "City, Province, Canada"
@@ -42,10 +87,19 @@ class SerpAPIService:
         }
 
         page = 1
-        while len(all_jobs) < num_results:
-            try:
-                print(f"SerpAPI: Fetching page {page}...")
-                data = await asyncio.to_thread(self._search_sync, params)
+        pending = asyncio.create_task(self._fetch_page(params)) if num_pages > 0 else None
+        try:
+            while pending:
+                try:
+                    data = await pending
+                except (httpx.HTTPError, ValueError) as e:
+                    # Remonte au disjoncteur : une panne n'est pas un résultat vide.
+                    # Jamais l'URL dans les logs : elle contient api_key
+                    detail = e if isinstance(e, httpx.HTTPStatusError) else type(e).__name__
+                    print(f"SerpAPI error page {page}: {detail}")
+                    raise
+                finally:
+                    pending = None
 
                 if "error" in data:
                     print(f"SerpAPI error: {data['error']}")
@@ -53,41 +107,41 @@ class SerpAPIService:
 
                 jobs = data.get("jobs_results", [])
                 if not jobs:
-                    print(f"SerpAPI: No more jobs at page {page}, total collected={len(all_jobs)}")
+                    print(f"SerpAPI: No more jobs at page {page}, total collected={collected}")
                     break
 
-                for job in jobs:
-                    all_jobs.append({
-                        "job_title": job.get("title", ""),
-                        "job_description": job.get("description", ""),
-                        "employer_name": job.get("company_name", ""),
-                        "job_city": job.get("location", ""),
-                        "job_country": "CA"
-                    })
-
-                # Utiliser next_page_token pour la pagination
+                # Utiliser next_page_token pour la pagination, lancée avant la normalisation
                 next_page_token = data.get("serpapi_pagination", {}).get("next_page_token")
-                if not next_page_token:
-                    print(f"SerpAPI: No more pages, total collected={len(all_jobs)}")
-                    break
+                if next_page_token and page < num_pages:
+                    pending = asyncio.create_task(
+                        self._fetch_page({**params, "next_page_token": next_page_token})
+                    )
 
-                params["next_page_token"] = next_page_token
-                page += 1
+                page_jobs = self._normalize_jobs(jobs)
+                collected += len(page_jobs)
+                yield page_jobs
 
-            except Exception as e:
-                print(f"SerpAPI error: {e}")
-                break
+                page += 1
+        finally:
+            if pending:
+                pending.cancel()
 
         # Si aucun résultat et langue était français, réessayer en anglais
-        if not all_jobs and language == "fr":
+        if not collected and language == "fr":
             print("SerpAPI: No results in French, trying English...")
-            return await self.search_jobs(query, location, num_results, language="en")
+            async for page_jobs in self.iter_pages(query, location, num_pages, language="en"):
+                yield page_jobs
+
+    async def search_jobs(self, query: str, location: str = "", num_pages: int = 1, language: str = "en") -> list[dict]:
+        all_jobs = []
+
+        async for jobs in self.iter_pages(query, location, num_pages, language):
+            all_jobs.extend(jobs)
 
-        return all_jobs[:num_results]
+        return all_jobs
 
     async def get_job_descriptions(self, query: str, location: str = "", num_pages: int = 3) -> list[str]:
-        num_results = num_pages * 10  # ~10 résultats par page
-        jobs = await self.search_jobs(query, location, num_results)
+        jobs = await self.search_jobs(query, location, num_pages)
         descriptions = []
 
         for job in jobs:
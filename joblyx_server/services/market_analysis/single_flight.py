@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Flight:
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Regroupe les calculs identiques en cours : le premier appel lance la
+    tâche, les suivants attendent son résultat (ou son exception).
+    Un appelant annulé n'annule pas le calcul des autres ; la tâche n'est
+    annulée que lorsque plus personne ne l'attend.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+        self.coalesced = 0
+
+    def _start(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> _Flight:
+        flight = _Flight(asyncio.create_task(factory()))
+
+        def release(_task: asyncio.Task) -> None:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+        flight.task.add_done_callback(release)
+        self._flights[key] = flight
+        return flight
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        # Une tâche d'une autre boucle (tests, redémarrage) ne peut pas être attendue
+        if flight is None or flight.task.get_loop() is not asyncio.get_running_loop():
+            flight = self._start(key, factory)
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Retirée avant l'annulation : un nouvel appelant relance un calcul
+                # au lieu de rejoindre une tâche qui lèverait CancelledError
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    def in_flight(self) -> int:
+        return len(self._flights)
@@ -0,0 +1,148 @@
+from collections import deque
+from .skills_taxonomy import skills_taxonomy, fold_text
+
+
+# Caractères considérés comme faisant partie d'un mot (pour les frontières)
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+# Séparateurs acceptés autour des skills d'une seule lettre (C, R, D)
+_STRICT_BOUNDARIES = set(" ,;/()[]\n\t\r")
+
+
+class SkillMatcher:
+    """
+    Extracteur local de skills basé sur un automate Aho-Corasick.
+    Compile les noms et variantes de skills.json, respecte les frontières
+    de mots et garde la correspondance la plus longue (C++ plutôt que C).
+    """
+
+    # En dessous de cette longueur un terme doit respecter la casse exacte
+    CASE_SENSITIVE_MAX_LEN = 2
+
+    def __init__(self, taxonomy=skills_taxonomy):
+        self.taxonomy = taxonomy
+        self.skills_by_category = taxonomy.by_category
+        self.terms = self._build_terms()
+        self._build_automaton()
+
+    def _build_terms(self) -> dict:
+        """Construit la table terme -> (skill, sensible à la casse) depuis l'index de la taxonomie"""
+        terms = {}
+        # L'index (casse et accents ignorés) fait déjà gagner les noms canoniques sur les variantes
+        for key, skill_id in self.taxonomy.lookup.items():
+            skill_name = self.taxonomy.names[skill_id]
+            case_sensitive = len(key) <= self.CASE_SENSITIVE_MAX_LEN
+            term = key
+            if case_sensitive:
+                # Les variantes courtes (js, ts, ci...) sont trop ambiguës en minuscules
+                term = skill_name if fold_text(skill_name) == key else key.upper()
+            terms[key] = (term, skill_name, case_sensitive)
+
+        return terms
+
+    def _build_automaton(self):
+        """Construit le trie et les liens d'échec de l'automate"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self._patterns = []
+
+        for key, (term, skill_name, case_sensitive) in self.terms.items():
+            folded = fold_text(term)
+            node = 0
+            for c in folded:
+                nxt = self._goto[node].get(c)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][c] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (len(self._patterns),)
+            self._patterns.append((term, len(folded), skill_name, case_sensitive))
+
+        # Parcours en largeur pour les liens d'échec
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for c, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and c not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(c, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+
+    def _is_valid_match(self, text: str, start: int, end: int, term: str, case_sensitive: bool) -> bool:
+        """Vérifie la casse et les frontières de mots d'une correspondance"""
+        if case_sensitive and text[start:end] != term:
+            return False
+
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+
+        if len(term) == 1:
+            return before in _STRICT_BOUNDARIES and after in _STRICT_BOUNDARIES
+
+        if _is_word_char(term[0]) and _is_word_char(before):
+            return False
+        if _is_word_char(term[-1]) and _is_word_char(after):
+            return False
+        return True
+
+    def find_matches(self, text: str) -> list[tuple[int, int, str]]:
+        """Retourne les correspondances (début, fin, skill) sans chevauchement"""
+        folded = fold_text(text)
+        goto, fail, out = self._goto, self._fail, self._out
+
+        candidates = []
+        node = 0
+        for i, c in enumerate(folded):
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            for pattern_id in out[node]:
+                term, length, skill_name, case_sensitive = self._patterns[pattern_id]
+                start = i + 1 - length
+                if self._is_valid_match(text, start, i + 1, term, case_sensitive):
+                    candidates.append((start, i + 1, skill_name))
+
+        # Plus à gauche puis plus long d'abord, sans chevauchement
+        candidates.sort(key=lambda m: (m[0], m[0] - m[1]))
+        matches = []
+        last_end = 0
+        for start, end, skill_name in candidates:
+            if start >= last_end:
+                matches.append((start, end, skill_name))
+                last_end = end
+
+        return matches
+
+    def _get_category(self, skill_name: str) -> str:
+        """Trouve la catégorie d'un skill"""
+        return self.taxonomy.category_of(skill_name)
+
+    def extract_skills(self, job_description: str) -> list[str]:
+        """Extrait les skills d'une description, dans l'ordre d'apparition"""
+        seen = {}
+        for _, _, skill_name in self.find_matches(job_description):
+            seen.setdefault(skill_name, None)
+        return list(seen)
+
+    def extract_skills_list(self, job_description: str) -> list[dict]:
+        """Retourne une liste de skills avec leur catégorie"""
+        return [
+            {"name": skill, "category": self._get_category(skill)}
+            for skill in self.extract_skills(job_description)
+        ]
+
+    async def extract_all_skills(self, descriptions: list[str], weight: int = 1, flow=None) -> list[list[dict]]:
+        """Même interface que GroqSkillsExtractor (weight et flow ignorés, tout est local)"""
+        return [self.extract_skills_list(desc) for desc in descriptions]
+
+
+skill_matcher = SkillMatcher()
@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import pickle
+import hashlib
+import unicodedata
+from array import array
+from pathlib import Path
+
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+SKILLS_PATH = DATA_DIR / "skills.json"
+# Artefact compilé, régénéré automatiquement quand skills.json change
+ARTIFACT_PATH = DATA_DIR / "skills.taxonomy.pickle"
+
+
+class _FoldTable(dict):
+    """Table str.translate: minuscules sans accents, longueur préservée"""
+
+    def __missing__(self, codepoint: int) -> str:
+        c = chr(codepoint)
+        if c in "-_\n\t\r":
+            folded = " "
+        else:
+            folded = unicodedata.normalize("NFD", c)[0].lower()[:1] or c
+        self[codepoint] = folded
+        return folded
+
+
+_FOLD_TABLE = _FoldTable()
+
+
+def fold_text(text: str) -> str:
+    return text.translate(_FOLD_TABLE)
+
+
+class SkillsTaxonomy:
+    """
+    Index compilé de skills.json, construit une fois et partagé par
+    l'extracteur, le matcher et l'analyseur : noms internés, table
+    nom/variante (casse et accents ignorés) -> ID canonique, catégorie par
+    ID, bitmask d'IDs par catégorie et skills par catégorie dans l'ordre du fichier.
+    """
+
+    FORMAT_VERSION = 3
+
+    def __init__(self, data: dict):
+        self.version = data["version"]
+        self.categories = data["categories"]
+        self.names = {skill_id: sys.intern(name) for skill_id, name in data["names"].items()}
+        self.variants = data["variants"]
+        self.lookup = data["lookup"]
+        self.category_masks = data["category_masks"]
+
+        # ID -> index de catégorie (-1 pour les IDs inutilisés)
+        self.skill_category = array("h", data["skill_category"])
+        # Un même nom figure parfois dans deux catégories (Swift, Figma, Snowflake...) :
+        # le premier déclaré, dans sa catégorie principale, l'emporte
+        self.ids = {}
+        for skill_id in data["order"]:
+            self.ids.setdefault(self.names[skill_id], skill_id)
+        self.by_category = {category: [] for category in self.categories}
+        for skill_id in data["order"]:
+            self.by_category[self.category_of_id(skill_id)].append(self.names[skill_id])
+
+    @staticmethod
+    def source_version(source: Path = SKILLS_PATH) -> str:
+        """Hash de skills.json, sert aussi de version de taxonomie"""
+        return hashlib.sha256(source.read_bytes()).hexdigest()[:12]
+
+    @classmethod
+    def compile(cls, source: Path = SKILLS_PATH) -> dict:
+        """Compile skills.json en structures prêtes à charger"""
+        raw = source.read_bytes()
+        it_skills = json.loads(raw.decode("utf-8")).get("IT", {})
+
+        categories = list(it_skills)
+        names, variants, order = {}, {}, []
+        category_of = {}
+
+        for category_index, skills in enumerate(it_skills.values()):
+            for skill in skills:
+                names[skill["id"]] = skill["name"]
+                variants[skill["id"]] = tuple(skill.get("variants", []))
+                category_of[skill["id"]] = category_index
+                order.append(skill["id"])
+
+        # Un nom canonique l'emporte sur la variante d'un autre skill
+        lookup = {}
+        for skill_id in order:
+            lookup.setdefault(fold_text(names[skill_id]).strip(), skill_id)
+        for skill_id in order:
+            for variant in variants[skill_id]:
+                lookup.setdefault(fold_text(variant).strip(), skill_id)
+
+        skill_category = [-1] * (max(names, default=0) + 1)
+        category_masks = {category: 0 for category in categories}
+        for skill_id, category_index in category_of.items():
+            skill_category[skill_id] = category_index
+            category_masks[categories[category_index]] |= 1 << skill_id
+
+        return {
+            "format": cls.FORMAT_VERSION,
+            "version": hashlib.sha256(raw).hexdigest()[:12],
+            "categories": categories,
+            "names": names,
+            "variants": variants,
+            "order": order,
+            "lookup": lookup,
+            "skill_category": skill_category,
+            "category_masks": category_masks,
+        }
+
+    @classmethod
+    def load(cls, source: Path = SKILLS_PATH, artifact: Path = ARTIFACT_PATH) -> "SkillsTaxonomy":
+        """Charge l'artefact binaire s'il est à jour, sinon recompile et le réécrit"""
+        version = cls.source_version(source)
+
+        try:
+            with open(artifact, "rb") as f:
+                data = pickle.load(f)
+            if data.get("format") == cls.FORMAT_VERSION and data.get("version") == version:
+                return cls(data)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+        data = cls.compile(source)
+        # Fichier temporaire puis renommage atomique : un autre worker qui
+        # charge en même temps ne lit jamais un artefact à moitié écrit
+        tmp_path = artifact.with_name(f"{artifact.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, artifact)
+        except OSError as e:
+            print(f"Taxonomy artifact not written: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+        return cls(data)
+
+    def category_of_id(self, skill_id: int) -> str:
+        if 0 <= skill_id < len(self.skill_category) and self.skill_category[skill_id] >= 0:
+            return self.categories[self.skill_category[skill_id]]
+        return "other"
+
+    def category_of(self, skill_name: str) -> str:
+        """Catégorie d'un nom ou d'une variante, "other" si inconnu"""
+        skill_id = self.resolve(skill_name)
+        return self.category_of_id(skill_id) if skill_id is not None else "other"
+
+    def resolve(self, term: str) -> int | None:
+        """ID canonique d'un nom ou d'une variante (casse et accents ignorés)"""
+        return self.lookup.get(fold_text(term).strip())
+
+    def mask_of(self, skill_ids) -> int:
+        """Bitmask d'un ensemble d'IDs"""
+        mask = 0
+        for skill_id in skill_ids:
+            mask |= 1 << skill_id
+        return mask
+
+    def categories_of_mask(self, mask: int) -> list[str]:
+        """Catégories qui contiennent au moins un ID du bitmask"""
+        return [category for category, category_mask in self.category_masks.items() if category_mask & mask]
+
+    def in_category(self, skill_id: int, category: str) -> bool:
+        return bool(self.category_masks.get(category, 0) >> skill_id & 1)
+
+    def ids_in_category(self, category: str) -> list[int]:
+        mask = self.category_masks.get(category, 0)
+        return [skill_id for skill_id in self.names if mask >> skill_id & 1]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+skills_taxonomy = SkillsTaxonomy.load()
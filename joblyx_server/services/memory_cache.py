@@ -0,0 +1,100 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+from config import CACHE_MEMORY_MAX_BYTES, CACHE_MEMORY_MAX_TTL
+
+
+class MemoryCache:
+    """
+    Cache LRU en mémoire, borné en octets, avec une durée de vie par entrée.
+    Mémorise aussi les absences (valeur None) pour ne pas réinterroger
+    Supabase à chaque recherche non encore calculée.
+    """
+
+    # Coût fixe d'une entrée (clé, tuple, horodatage) en plus de sa valeur
+    ENTRY_OVERHEAD = 64
+
+    def __init__(self, max_bytes: int = CACHE_MEMORY_MAX_BYTES, max_ttl: float = CACHE_MEMORY_MAX_TTL):
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self._entries: OrderedDict[str, tuple[float, int, dict | None]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _size(self, key: str, value: dict | None) -> int:
+        size = len(key) + self.ENTRY_OVERHEAD
+        if value is not None:
+            size += len(json.dumps(value, default=str))
+        return size
+
+    def get(self, key: str) -> tuple[bool, dict | None]:
+        """(trouvé, valeur) ; une absence mémorisée donne (True, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expires_at, size, value = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key: str, value: dict | None, ttl: float | None = None) -> None:
+        """Enregistre une valeur (None pour une absence), durée bornée par max_ttl"""
+        ttl = self.max_ttl if ttl is None else min(ttl, self.max_ttl)
+        size = self._size(key, value)
+
+        with self._lock:
+            self._remove(key)
+            # Entrée expirée ou plus grosse que tout le cache : pas d'admission
+            if ttl <= 0 or size > self.max_bytes:
+                return
+
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def set_miss(self, key: str, ttl: float) -> None:
+        self.set(key, None, ttl)
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[1]
+        return True
+
+    def invalidate(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,145 @@
+import re
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    normalized = unicodedata.normalize("NFD", text)
+    without_accents = "".join(c for c in normalized if unicodedata.category(c) != "Mn")
+    return without_accents
+
+
+_NON_WORD = re.compile(r"[^a-z0-9+#]+")
+
+
+class QueryCanonicalizer:
+    """
+    Forme canonique d'une recherche (poste, ville, province) : accents,
+    abréviations, codes de province, niveau de séniorité et mots vides.
+    "Sr. Software Dev / Québec" et "Software Developer Senior / QC" donnent
+    la même clé, partagée par le cache, l'historique et le single-flight.
+    """
+
+    ABBREVIATIONS = {
+        "sr": "senior",
+        "snr": "senior",
+        "jr": "junior",
+        "jnr": "junior",
+        "mid": "intermediate",
+        "intermediaire": "intermediate",
+        "dev": "developer",
+        "devs": "developer",
+        "developpeur": "developer",
+        "developpeuse": "developer",
+        "eng": "engineer",
+        "engr": "engineer",
+        "ingenieur": "engineer",
+        "ingenieure": "engineer",
+        "mgr": "manager",
+        "gestionnaire": "manager",
+        "admin": "administrator",
+        "sysadmin": "system administrator",
+        "analyste": "analyst",
+        "swe": "software engineer",
+        "sde": "software developer",
+        "fullstack": "full stack",
+        "frontend": "front end",
+        "backend": "back end",
+        "ml": "machine learning",
+        "ai": "artificial intelligence",
+        "ia": "artificial intelligence",
+        "qa": "quality assurance",
+        "pm": "project manager",
+        "ux": "user experience",
+        "ui": "user interface",
+        "logiciel": "software",
+        "donnees": "data",
+        "stagiaire": "intern",
+        "stage": "intern",
+    }
+
+    # Niveaux placés en tête, dans cet ordre, quelle que soit leur position
+    SENIORITY = ("intern", "junior", "intermediate", "senior", "lead", "principal", "staff")
+
+    STOP_WORDS = frozenset({
+        "a", "an", "and", "the", "of", "for", "in", "at", "with",
+        "de", "du", "des", "d", "la", "le", "les", "l", "et", "en", "au", "pour",
+    })
+
+    PROVINCES = {
+        "ab": "alberta",
+        "alberta": "alberta",
+        "bc": "british columbia",
+        "british columbia": "british columbia",
+        "colombie britannique": "british columbia",
+        "mb": "manitoba",
+        "manitoba": "manitoba",
+        "nb": "new brunswick",
+        "new brunswick": "new brunswick",
+        "nouveau brunswick": "new brunswick",
+        "nl": "newfoundland and labrador",
+        "newfoundland and labrador": "newfoundland and labrador",
+        "newfoundland": "newfoundland and labrador",
+        "terre neuve et labrador": "newfoundland and labrador",
+        "ns": "nova scotia",
+        "nova scotia": "nova scotia",
+        "nouvelle ecosse": "nova scotia",
+        "nt": "northwest territories",
+        "northwest territories": "northwest territories",
+        "territoires du nord ouest": "northwest territories",
+        "nu": "nunavut",
+        "nunavut": "nunavut",
+        "on": "ontario",
+        "ont": "ontario",
+        "ontario": "ontario",
+        "pe": "prince edward island",
+        "pei": "prince edward island",
+        "prince edward island": "prince edward island",
+        "ile du prince edouard": "prince edward island",
+        "qc": "quebec",
+        "que": "quebec",
+        "pq": "quebec",
+        "quebec": "quebec",
+        "sk": "saskatchewan",
+        "sask": "saskatchewan",
+        "saskatchewan": "saskatchewan",
+        "yt": "yukon",
+        "yukon": "yukon",
+    }
+
+    CITY_PREFIXES = {"st": "saint", "ste": "sainte", "mt": "mount"}
+
+    def words(self, text: str) -> list[str]:
+        """Mots en minuscules sans accents ni ponctuation (C++ et C# conservés)"""
+        return _NON_WORD.sub(" ", normalize_text(text or "").lower()).split()
+
+    def canonical_query(self, query: str) -> str:
+        tokens = []
+        for word in self.words(query):
+            tokens.extend(self.ABBREVIATIONS.get(word, word).split())
+
+        seniority = [level for level in self.SENIORITY if level in tokens]
+        rest = []
+        for token in tokens:
+            if token in self.SENIORITY or token in self.STOP_WORDS or token in rest:
+                continue
+            rest.append(token)
+
+        return " ".join(seniority + rest)
+
+    def canonical_city(self, city: str) -> str:
+        return " ".join(self.CITY_PREFIXES.get(word, word) for word in self.words(city))
+
+    def canonical_province(self, province: str) -> str:
+        name = " ".join(self.words(province))
+        return self.PROVINCES.get(name, name)
+
+    def canonical(self, query: str, city: str, province: str) -> tuple[str, str, str]:
+        """(poste, ville, province) canoniques"""
+        return self.canonical_query(query), self.canonical_city(city), self.canonical_province(province)
+
+    def key(self, query: str, city: str, province: str) -> str:
+        """Clé unique d'une recherche de marché"""
+        return "|".join(self.canonical(query, city, province))
+
+
+query_canonicalizer = QueryCanonicalizer()
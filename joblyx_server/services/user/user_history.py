@@ -1,9 +1,29 @@
 from config import supabase
+from services.query_canonicalizer import query_canonicalizer
 
 class UserHistory:
     # Enregistre une recherche (trigger SQL limite a 10 automatiquement)
     def record_search(self, user_id: str, query: str, city: str, province: str, results: dict, total_jobs: int) -> bool:
         try:
+            # La même recherche répétée (clé canonique) met à jour l'entrée la plus récente
+            latest = supabase.table("user_history")\
+                    .select("id, query, city, province")\
+                    .eq("user_id", user_id)\
+                    .order("created_at", desc=True)\
+                    .limit(1)\
+                    .execute()
+
+            search_key = query_canonicalizer.key(query, city, province)
+            for entry in (latest.data or [])[:1]:
+                if query_canonicalizer.key(entry["query"], entry["city"], entry["province"]) == search_key:
+                    supabase.table("user_history")\
+                        .update({"results": results, "total_jobs": total_jobs})\
+                        .eq("user_id", user_id)\
+                        .eq("id", entry["id"])\
+                        .execute()
+                    print(f"Search updated for: {query} - {city} ({province})")
+                    return True
+
             supabase.table("user_history").insert(
                 {
                     "user_id": user_id,
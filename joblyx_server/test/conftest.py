@@ -4,6 +4,23 @@ from unittest.mock import MagicMock
 pytest_plugins = ('pytest_asyncio',)
 
 
+@pytest.fixture(autouse=True)
+def isolated_posting_store(tmp_path, monkeypatch):
+    """Chaque test utilise un stockage d'offres vide et temporaire"""
+    from services.market_analysis.posting_store import posting_store
+    monkeypatch.setattr(posting_store, "path", tmp_path / "postings.sqlite3")
+    monkeypatch.setattr(posting_store, "_conn", None)
+
+
+@pytest.fixture(autouse=True)
+def empty_memory_cache():
+    """Le cache mémoire du singleton ne doit pas fuir d'un test à l'autre"""
+    from services.cache_service import cache_service
+    cache_service.invalidate_all()
+    yield
+    cache_service.invalidate_all()
+
+
 @pytest.fixture
 def mock_user_id():
     return "user-123-test"
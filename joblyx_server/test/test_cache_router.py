@@ -49,3 +49,13 @@ class TestCacheCleanup:
         assert response.status_code == 200
         data = response.json()
         assert data["deleted_entries"] == 0
+
+
+class TestCacheInvalidate:
+
+    @patch('routers.cache.cache_service.invalidate_all')
+    def test_invalidate_memory_cache(self, mock_invalidate):
+        response = client.post("/cache/invalidate")
+
+        assert response.status_code == 200
+        mock_invalidate.assert_called_once()
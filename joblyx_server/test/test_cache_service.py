@@ -1,7 +1,10 @@
+import time
 import pytest
-from unittest.mock import Mock, MagicMock, patch
-from datetime import datetime
+import asyncio
+from unittest.mock import Mock, MagicMock, AsyncMock, patch
+from datetime import datetime, timedelta
 from services.cache_service import CacheService
+from services.memory_cache import MemoryCache
 
 
 class TestGetCacheResults:
@@ -20,7 +23,7 @@ class TestGetCacheResults:
         }
 
         # Mock pour le SELECT
-        mock_supabase.table.return_value.select.return_value.ilike.return_value.ilike.return_value.ilike.return_value.gte.return_value.maybe_single.return_value.execute.return_value = mock_result
+        mock_supabase.table.return_value.select.return_value.eq.return_value.gte.return_value.maybe_single.return_value.execute.return_value = mock_result
         # Mock pour le UPDATE (trigger hit_count)
         mock_supabase.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock()
 
@@ -30,12 +33,21 @@ class TestGetCacheResults:
         assert result is not None
         assert result["query"] == "Python"
 
+    @patch('services.cache_service.supabase')
+    def test_reads_by_canonical_search_key(self, mock_supabase):
+        mock_supabase.table.return_value.select.return_value.eq.return_value.gte.return_value.maybe_single.return_value.execute.return_value = MagicMock(data=None)
+
+        CacheService().get_cache_results("Sr. Python Dev", "Montréal", "QC")
+
+        mock_supabase.table.return_value.select.return_value.eq.assert_called_once_with("search_key", "senior python developer|montreal|quebec")
+        mock_supabase.table.return_value.select.return_value.ilike.assert_not_called()
+
     @patch('services.cache_service.supabase')
     def test_cache_miss(self, mock_supabase):
         mock_result = MagicMock()
         mock_result.data = None
 
-        mock_supabase.table.return_value.select.return_value.ilike.return_value.ilike.return_value.ilike.return_value.gte.return_value.maybe_single.return_value.execute.return_value = mock_result
+        mock_supabase.table.return_value.select.return_value.eq.return_value.gte.return_value.maybe_single.return_value.execute.return_value = mock_result
 
         service = CacheService()
         result = service.get_cache_results("Python", "Toronto", "Ontario")
@@ -52,6 +64,193 @@ class TestGetCacheResults:
         assert result is None
 
 
+class TestMemoryTier:
+
+    @staticmethod
+    def mock_select(mock_supabase, data):
+        result = MagicMock()
+        result.data = data
+        mock_supabase.table.return_value.select.return_value.eq.return_value.gte.return_value.maybe_single.return_value.execute.return_value = result
+        return mock_supabase.table.return_value.select
+
+    @patch('services.cache_service.supabase')
+    def test_second_hit_served_from_memory(self, mock_supabase):
+        select = self.mock_select(mock_supabase, {
+            "id": "cache-123",
+            "results": {"query": "Python", "total_jobs_analyzed": 10},
+            "expires_at": "2099-01-01T00:00:00",
+        })
+
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        first = service.get_cache_results("Python", "Toronto", "Ontario")
+        first["from_cache"] = True
+        second = service.get_cache_results("python", "TORONTO", "ON")
+
+        assert select.call_count == 1
+        assert second == {"query": "Python", "total_jobs_analyzed": 10}
+
+    @patch('services.cache_service.supabase')
+    def test_miss_is_remembered(self, mock_supabase):
+        select = self.mock_select(mock_supabase, None)
+
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        assert service.get_cache_results("Python", "Toronto", "Ontario") is None
+        assert service.get_cache_results("Python", "Toronto", "Ontario") is None
+
+        assert select.call_count == 1
+
+    @patch('services.cache_service.supabase')
+    def test_expired_entry_not_kept_in_memory(self, mock_supabase):
+        self.mock_select(mock_supabase, {
+            "id": "cache-123",
+            "results": {"query": "Python"},
+            "expires_at": "2000-01-01T00:00:00+00:00",
+        })
+
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        service.get_cache_results("Python", "Toronto", "Ontario")
+
+        assert len(service.memory) == 0
+
+    @patch('services.cache_service.supabase')
+    def test_save_replaces_remembered_miss(self, mock_supabase):
+        self.mock_select(mock_supabase, None)
+
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        service.get_cache_results("Python", "Toronto", "Ontario")
+        service.save_to_cache("Python", "Toronto", "Ontario", {"total_jobs_analyzed": 5}, 5)
+
+        cached = service.get_cache_results("Python", "Toronto", "Ontario")
+        assert cached["total_jobs_analyzed"] == 5
+        assert cached["cache_age"] == 0
+
+    def test_invalidate(self):
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        service.memory.set("python|toronto|ontario", {"total_jobs_analyzed": 5})
+
+        assert service.invalidate("Python", "Toronto", "ON") is True
+        assert len(service.memory) == 0
+
+
+class TestStaleWhileRevalidate:
+
+    @patch('services.cache_service.supabase')
+    def test_expired_entry_served_as_stale(self, mock_supabase):
+        cached_at = time.time() - 3 * 86400
+        expired = (datetime.now() - timedelta(hours=2)).isoformat()
+        TestMemoryTier.mock_select(mock_supabase, {
+            "id": "cache-123",
+            "results": {"query": "Python", "cached_at": cached_at},
+            "expires_at": expired,
+        })
+
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60), stale_window=86400)
+        result = service.get_cache_results("Python", "Toronto", "Ontario", allow_stale=True)
+
+        assert result["stale"] is True
+        assert result["cache_age"] >= 3 * 86400
+        # Pas de trigger hit_count / TTL : l'entrée doit rester expirée jusqu'au recalcul
+        mock_supabase.table.return_value.update.assert_not_called()
+
+    @patch('services.cache_service.supabase')
+    def test_stale_refused_without_allow_stale(self, mock_supabase):
+        expired = (datetime.now() - timedelta(hours=2)).isoformat()
+        TestMemoryTier.mock_select(mock_supabase, {
+            "id": "cache-123",
+            "results": {"query": "Python"},
+            "expires_at": expired,
+        })
+
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60), stale_window=86400)
+
+        assert service.get_cache_results("Python", "Toronto", "Ontario") is None
+        # Gardée en mémoire pour les lecteurs qui acceptent le périmé
+        assert service.get_cache_results("Python", "Toronto", "Ontario", allow_stale=True)["stale"] is True
+
+    @patch('services.cache_service.supabase')
+    def test_fresh_entry_not_stale(self, mock_supabase):
+        TestMemoryTier.mock_select(mock_supabase, {
+            "id": "cache-123",
+            "results": {"query": "Python"},
+            "expires_at": (datetime.now() + timedelta(hours=2)).isoformat(),
+        })
+
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        result = service.get_cache_results("Python", "Toronto", "Ontario", allow_stale=True)
+
+        assert "stale" not in result
+
+
+class TestWriteBehindHits:
+
+    @patch('services.cache_service.supabase')
+    def test_hits_counted_without_writes(self, mock_supabase):
+        TestMemoryTier.mock_select(mock_supabase, {
+            "id": "cache-123",
+            "results": {"query": "Python"},
+            "expires_at": (datetime.now() + timedelta(hours=2)).isoformat(),
+        })
+
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        service.get_cache_results("Python", "Toronto", "Ontario")
+        service.get_cache_results("python", "Toronto", "ON")
+
+        mock_supabase.table.return_value.update.assert_not_called()
+        assert service._pending_hits == {"python|toronto|ontario": 2}
+
+    @patch('services.cache_service.supabase')
+    def test_flush_sends_one_bulk_rpc(self, mock_supabase):
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        service._record_hit("python|toronto|ontario")
+        service._record_hit("python|toronto|ontario")
+        service._record_hit("java|montreal|quebec")
+
+        assert service.flush_hits() == 3
+        mock_supabase.rpc.assert_called_once_with("record_cache_hits", {"hits": [
+            {"search_key": "python|toronto|ontario", "hits": 2},
+            {"search_key": "java|montreal|quebec", "hits": 1},
+        ]})
+        assert service.flush_hits() == 0
+        assert mock_supabase.rpc.call_count == 1
+
+    @patch('services.cache_service.supabase')
+    def test_failed_flush_keeps_hits(self, mock_supabase):
+        mock_supabase.rpc.side_effect = Exception("RPC Error")
+
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        service._record_hit("python|toronto|ontario")
+
+        assert service.flush_hits() == 0
+        assert service._pending_hits == {"python|toronto|ontario": 1}
+
+    @pytest.mark.asyncio
+    async def test_flusher_runs_periodically(self):
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        service.flush_hits = Mock(return_value=0)
+
+        flusher = asyncio.create_task(service.run_hit_flusher(interval=0.01))
+        await asyncio.sleep(0.05)
+        flusher.cancel()
+        await asyncio.gather(flusher, return_exceptions=True)
+
+        assert service.flush_hits.call_count >= 2
+
+    @patch('app.cache_service')
+    @patch('app.http_client')
+    def test_final_flush_on_shutdown(self, mock_http_client, mock_cache_service):
+        from fastapi.testclient import TestClient
+        from app import app
+
+        mock_http_client.get_client = AsyncMock()
+        mock_http_client.aclose = AsyncMock()
+        mock_cache_service.run_hit_flusher = AsyncMock()
+
+        with TestClient(app):
+            mock_cache_service.flush_hits.assert_not_called()
+
+        mock_cache_service.flush_hits.assert_called_once()
+
+
 class TestSaveToCache:
 
     @patch('services.cache_service.supabase')
@@ -97,6 +296,54 @@ class TestSaveToCache:
 
         assert result is False
 
+    @patch('services.cache_service.supabase')
+    def test_save_is_single_upsert_on_canonical_key(self, mock_supabase):
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        service.save_to_cache("Sr. Python Dev", "Montréal", "QC", {"top_skills": []}, 10)
+
+        upsert = mock_supabase.table.return_value.upsert
+        upsert.assert_called_once()
+        assert upsert.call_args.kwargs["on_conflict"] == "search_key"
+        assert upsert.call_args.args[0]["search_key"] == "senior python developer|montreal|quebec"
+        mock_supabase.table.return_value.select.assert_not_called()
+        mock_supabase.table.return_value.insert.assert_not_called()
+
+
+class TestSaveManyToCache:
+
+    @patch('services.cache_service.supabase')
+    def test_batch_is_one_upsert(self, mock_supabase):
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        result = service.save_many_to_cache([
+            {"query": "Python", "city": "Toronto", "province": "ON", "results": {"v": 1}, "total_jobs": 10},
+            {"query": "Java", "city": "Montreal", "province": "QC", "results": {"v": 1}, "total_jobs": 8},
+            {"query": "python", "city": "toronto", "province": "Ontario", "results": {"v": 2}, "total_jobs": 12},
+        ])
+
+        assert result is True
+        upsert = mock_supabase.table.return_value.upsert
+        upsert.assert_called_once()
+        assert upsert.call_args.kwargs["on_conflict"] == "search_key"
+        rows = upsert.call_args.args[0]
+        assert [row["search_key"] for row in rows] == ["python|toronto|ontario", "java|montreal|quebec"]
+        assert rows[0]["results"]["v"] == 2
+        assert service.get_cache_results("Java", "Montréal", "Quebec")["v"] == 1
+
+    def test_empty_batch(self):
+        assert CacheService().save_many_to_cache([]) is True
+
+    @patch('services.cache_service.supabase')
+    def test_batch_error_returns_false(self, mock_supabase):
+        mock_supabase.table.return_value.upsert.side_effect = Exception("DB Error")
+
+        service = CacheService(MemoryCache(max_bytes=10_000, max_ttl=60))
+        result = service.save_many_to_cache([
+            {"query": "Python", "city": "Toronto", "province": "ON", "results": {}, "total_jobs": 10},
+        ])
+
+        assert result is False
+        assert len(service.memory) == 0
+
 
 class TestClearExpired:
 
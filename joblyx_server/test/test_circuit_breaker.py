@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import patch
+from services.market_analysis.circuit_breaker import CircuitBreaker
+
+
+class TestCircuitBreaker:
+
+    def test_starts_closed(self):
+        breaker = CircuitBreaker("jsearch")
+
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow()
+
+    def test_opens_on_error_rate(self):
+        breaker = CircuitBreaker("jsearch", min_calls=4, error_threshold=0.5)
+        breaker.record_success()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_rate_limit_opens_until_reset(self):
+        breaker = CircuitBreaker("jsearch")
+
+        with patch("services.market_analysis.circuit_breaker.time.monotonic", return_value=100.0):
+            breaker.record_failure(retry_after=30)
+            assert breaker.state == CircuitBreaker.OPEN
+
+        with patch("services.market_analysis.circuit_breaker.time.monotonic", return_value=131.0):
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    def test_half_open_allows_single_probe(self):
+        breaker = CircuitBreaker("jsearch", open_seconds=0)
+        breaker.record_failure(retry_after=0)
+
+        assert breaker.allow()
+        assert not breaker.allow()
+
+        breaker.record_success()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow()
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("jsearch", open_seconds=30)
+        breaker.record_failure(retry_after=0)
+
+        assert breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_cancelled_probe_frees_slot(self):
+        breaker = CircuitBreaker("jsearch")
+        breaker.record_failure(retry_after=0)
+
+        assert breaker.allow()
+        breaker.record_cancelled()
+
+        assert breaker.allow()
@@ -0,0 +1,140 @@
+import pytest
+import threading
+from unittest.mock import AsyncMock, patch
+from services.market_analysis import GroqSkillsExtractor
+from services.market_analysis.extraction_cache import ExtractionCache, normalize_description
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractionCache(tmp_path / "extraction_cache.sqlite3", max_entries=10)
+
+
+class TestNormalizeDescription:
+
+    def test_collapses_whitespace_and_case(self):
+        assert normalize_description("  Python\n\n  Developer ") == "python developer"
+
+    def test_removes_accents(self):
+        assert normalize_description("Développeur") == "developpeur"
+
+
+class TestMakeKey:
+
+    def test_same_text_same_key(self):
+        key1 = ExtractionCache.make_key("Python  developer", "model", "v1")
+        key2 = ExtractionCache.make_key("python developer", "model", "v1")
+        assert key1 == key2
+
+    def test_model_changes_key(self):
+        assert ExtractionCache.make_key("text", "model-a", "v1") != ExtractionCache.make_key("text", "model-b", "v1")
+
+    def test_taxonomy_version_changes_key(self):
+        assert ExtractionCache.make_key("text", "model", "v1") != ExtractionCache.make_key("text", "model", "v2")
+
+
+class TestExtractionCache:
+
+    def test_miss_returns_empty(self, cache):
+        assert cache.get_many(["unknown"]) == {}
+
+    def test_set_and_get(self, cache):
+        cache.set_many({"a": ["Python"], "b": []})
+
+        found = cache.get_many(["a", "b", "c"])
+
+        assert found == {"a": ["Python"], "b": []}
+
+    def test_persists_on_disk(self, tmp_path):
+        path = tmp_path / "cache.sqlite3"
+        ExtractionCache(path).set_many({"a": ["Java"]})
+
+        assert ExtractionCache(path).get_many(["a"]) == {"a": ["Java"]}
+
+    def test_evicts_least_recently_used(self, cache):
+        cache.set_many({f"key{i}": ["Python"] for i in range(10)})
+        # key0 redevient récent
+        cache.get_many(["key0"])
+
+        cache.set_many({"key10": ["Go"]})
+
+        assert len(cache) <= cache.max_entries
+        assert "key0" in cache.get_many(["key0"])
+        assert cache.get_many(["key1"]) == {}
+
+    def test_clear(self, cache):
+        cache.set_many({"a": ["Python"]})
+        cache.clear()
+        assert len(cache) == 0
+
+
+class TestExtractAllSkillsWithCache:
+
+    @pytest.mark.asyncio
+    async def test_only_misses_sent_to_llm(self, cache):
+        extractor = GroqSkillsExtractor()
+        extractor.cache = cache
+        cache.set_many({
+            cache.make_key("Cached posting", extractor.MODEL, extractor.taxonomy_version): ["Python"]
+        })
+
+        with patch.object(extractor, "_request_batch_async", new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = {0: ["Java"]}
+
+            results = await extractor.extract_all_skills(["Cached posting", "New posting", "New  posting"])
+
+        mock_request.assert_called_once()
+        assert [r[0]["name"] for r in results] == ["Python", "Java", "Java"]
+
+    @pytest.mark.asyncio
+    async def test_failures_not_cached(self, cache):
+        extractor = GroqSkillsExtractor()
+        extractor.cache = cache
+
+        with patch.object(extractor, "_request_batch_async", new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = None
+
+            results = await extractor.extract_all_skills(["Some posting"])
+
+        # L'échec garde sa position
+        assert results == [None]
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_failures_keep_their_position(self, cache):
+        extractor = GroqSkillsExtractor()
+        extractor.cache = cache
+        cache.set_many({
+            cache.make_key("Cached posting", extractor.MODEL, extractor.taxonomy_version): ["Python"]
+        })
+
+        with patch.object(extractor, "_request_batch_async", new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = None
+
+            results = await extractor.extract_all_skills(["Failed posting", "Cached posting"])
+
+        assert results[0] is None
+        assert results[1][0]["name"] == "Python"
+
+    @pytest.mark.asyncio
+    async def test_cache_access_off_the_event_loop(self, cache):
+        extractor = GroqSkillsExtractor()
+        extractor.cache = cache
+        threads = []
+        get_many, set_many = cache.get_many, cache.set_many
+
+        def spy_get(keys):
+            threads.append(threading.current_thread())
+            return get_many(keys)
+
+        def spy_set(entries):
+            threads.append(threading.current_thread())
+            return set_many(entries)
+
+        with patch.object(cache, "get_many", spy_get), patch.object(cache, "set_many", spy_set), \
+                patch.object(extractor, "_request_batch_async", new_callable=AsyncMock) as mock_request:
+            mock_request.return_value = {0: ["Java"]}
+            await extractor.extract_all_skills(["New posting"])
+
+        assert len(threads) == 2
+        assert threading.main_thread() not in threads
@@ -0,0 +1,132 @@
+import asyncio
+import pytest
+from services.market_analysis import ExtractionScheduler, extraction_scheduler
+
+
+class TestExtractionScheduler:
+
+    def test_instance_created(self):
+        assert isinstance(extraction_scheduler, ExtractionScheduler)
+
+    def test_flow_registration(self):
+        scheduler = ExtractionScheduler(max_concurrent=2)
+
+        with scheduler.flow(weight=2):
+            assert scheduler.get_stats()["active_flows"] == 1
+
+        assert scheduler.get_stats()["active_flows"] == 0
+
+    @pytest.mark.asyncio
+    async def test_run_returns_result(self):
+        scheduler = ExtractionScheduler(max_concurrent=1)
+
+        async def call():
+            return 42
+
+        with scheduler.flow() as flow:
+            assert await scheduler.run(flow, call) == 42
+
+        assert scheduler.get_stats()["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_cap(self):
+        scheduler = ExtractionScheduler(max_concurrent=2)
+        running = 0
+        peak = 0
+
+        async def call():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        with scheduler.flow() as flow_a, scheduler.flow() as flow_b:
+            await asyncio.gather(
+                *(scheduler.run(flow_a, call) for _ in range(5)),
+                *(scheduler.run(flow_b, call) for _ in range(5)),
+            )
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_round_robin_between_flows(self):
+        scheduler = ExtractionScheduler(max_concurrent=1)
+        order = []
+
+        def call(name):
+            async def inner():
+                order.append(name)
+                await asyncio.sleep(0)
+            return inner
+
+        with scheduler.flow() as flow_a, scheduler.flow() as flow_b:
+            # Le flux A arrive en premier avec beaucoup d'appels
+            tasks_a = [scheduler.run(flow_a, call("a")) for _ in range(4)]
+            tasks_b = [scheduler.run(flow_b, call("b")) for _ in range(2)]
+            await asyncio.gather(*tasks_a, *tasks_b)
+
+        # B n'attend pas la fin de A
+        assert order.index("b") < 3
+        assert order[:4].count("b") == 2
+
+    @pytest.mark.asyncio
+    async def test_weighted_flow_gets_more_turns(self):
+        scheduler = ExtractionScheduler(max_concurrent=1)
+        order = []
+
+        def call(name):
+            async def inner():
+                order.append(name)
+                await asyncio.sleep(0)
+            return inner
+
+        with scheduler.flow(weight=1) as light, scheduler.flow(weight=2) as heavy:
+            await asyncio.gather(
+                *(scheduler.run(light, call("light")) for _ in range(4)),
+                *(scheduler.run(heavy, call("heavy")) for _ in range(4)),
+            )
+
+        # Sur les 6 premiers créneaux, le flux de poids 2 en obtient plus
+        assert order[:6].count("heavy") > order[:6].count("light")
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        scheduler = ExtractionScheduler(max_concurrent=1)
+        release = asyncio.Event()
+
+        async def blocking():
+            await release.wait()
+
+        async def quick():
+            return "done"
+
+        with scheduler.flow() as flow:
+            first = asyncio.create_task(scheduler.run(flow, blocking))
+            await asyncio.sleep(0)
+            waiting = asyncio.create_task(scheduler.run(flow, quick))
+            await asyncio.sleep(0)
+
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+
+            release.set()
+            await first
+
+            assert await scheduler.run(flow, quick) == "done"
+
+        assert scheduler.get_stats()["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_release_slot(self):
+        scheduler = ExtractionScheduler(max_concurrent=1)
+
+        async def failing():
+            raise ValueError("boom")
+
+        with scheduler.flow() as flow:
+            with pytest.raises(ValueError):
+                await scheduler.run(flow, failing)
+
+        assert scheduler.get_stats()["running"] == 0
@@ -0,0 +1,115 @@
+import pytest
+from unittest.mock import patch
+from services.market_analysis.groq_rate_limiter import GroqRateLimiter, groq_rate_limiter, parse_duration
+
+
+class TestParseDuration:
+
+    def test_seconds(self):
+        assert parse_duration("7.66s") == pytest.approx(7.66)
+
+    def test_minutes_and_seconds(self):
+        assert parse_duration("2m59.56s") == pytest.approx(179.56)
+
+    def test_milliseconds(self):
+        assert parse_duration("120ms") == pytest.approx(0.12)
+
+    def test_plain_number(self):
+        assert parse_duration("3") == 3.0
+
+    def test_invalid(self):
+        assert parse_duration(None) is None
+        assert parse_duration("soon") is None
+
+
+class TestGroqRateLimiter:
+
+    def test_instance_created(self):
+        assert isinstance(groq_rate_limiter, GroqRateLimiter)
+
+    def test_no_wait_within_budget(self):
+        limiter = GroqRateLimiter(requests_per_minute=30, tokens_per_minute=10000)
+
+        assert limiter.reserve(1000) == 0
+
+    def test_waits_when_tokens_exhausted(self):
+        limiter = GroqRateLimiter(requests_per_minute=30, tokens_per_minute=6000)
+        limiter.reserve(6000)
+
+        # 600 tokens manquants à 100 tokens/seconde
+        assert limiter.reserve(600) == pytest.approx(6, abs=0.1)
+
+    def test_waits_when_requests_exhausted(self):
+        limiter = GroqRateLimiter(requests_per_minute=2, tokens_per_minute=100000)
+        limiter.reserve(10)
+        limiter.reserve(10)
+
+        assert limiter.reserve(10) == pytest.approx(30, abs=0.1)
+
+    def test_headers_resync_remaining_tokens(self):
+        limiter = GroqRateLimiter(requests_per_minute=30, tokens_per_minute=6000)
+
+        limiter.update_from_headers({
+            "x-ratelimit-limit-tokens": "6000",
+            "x-ratelimit-remaining-tokens": "0",
+        })
+
+        assert limiter.reserve(600) == pytest.approx(6, abs=0.1)
+
+    def test_headers_account_for_in_flight(self):
+        limiter = GroqRateLimiter(requests_per_minute=30, tokens_per_minute=6000)
+        limiter.reserve(3000)
+
+        limiter.update_from_headers({"x-ratelimit-remaining-tokens": "6000"})
+
+        assert limiter.reserve(3000) == 0
+        assert limiter.reserve(600) > 0
+
+    def test_daily_quota_exhausted_blocks_until_reset(self):
+        limiter = GroqRateLimiter()
+
+        limiter.update_from_headers({
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "1m",
+        })
+
+        assert limiter.reserve(10) == pytest.approx(60, abs=0.1)
+
+    def test_rate_limited_honors_retry_after(self):
+        limiter = GroqRateLimiter()
+
+        delay = limiter.on_rate_limited({"retry-after": "12"})
+
+        assert delay == 12
+        assert limiter.reserve(10) == pytest.approx(12, abs=0.1)
+
+    def test_rate_limited_without_headers_uses_default(self):
+        limiter = GroqRateLimiter()
+
+        assert limiter.on_rate_limited({}) == GroqRateLimiter.DEFAULT_BACKOFF
+
+    @pytest.mark.asyncio
+    async def test_acquire_sleeps_for_reserved_delay(self):
+        limiter = GroqRateLimiter(requests_per_minute=30, tokens_per_minute=6000)
+        limiter.reserve(6000)
+
+        with patch("services.market_analysis.groq_rate_limiter.asyncio.sleep") as mock_sleep:
+            await limiter.acquire(600)
+
+        mock_sleep.assert_awaited()
+        assert mock_sleep.await_args_list[0].args[0] == pytest.approx(6, abs=0.1)
+
+    @pytest.mark.asyncio
+    async def test_acquire_gives_up_beyond_max_wait(self):
+        limiter = GroqRateLimiter(requests_per_minute=30, tokens_per_minute=6000, max_wait=5)
+        # Quota journalier épuisé : reprise dans une heure
+        limiter.update_from_headers({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1h"})
+
+        with patch("services.market_analysis.groq_rate_limiter.asyncio.sleep") as mock_sleep:
+            acquired = await limiter.acquire(600)
+
+        assert acquired is False
+        mock_sleep.assert_not_awaited()
+        # La réservation abandonnée est rendue
+        assert limiter._in_flight_tokens == 0
+        assert limiter._tokens == pytest.approx(6000, abs=1)
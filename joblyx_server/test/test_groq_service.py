@@ -1,8 +1,27 @@
+import json
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
+from groq import RateLimitError
 from services.market_analysis import GroqSkillsExtractor, groq_extractor
 
 
+def skill_ids_json(*names: str) -> str:
+    # Réponse JSON-mode du modèle : IDs du codebook
+    return json.dumps({"skills": [groq_extractor.skill_ids[name] for name in names]})
+
+
+def mock_async_client(content: str, headers: dict | None = None) -> MagicMock:
+    # Client AsyncGroq simulé pour with_raw_response.create
+    response = MagicMock()
+    response.choices[0].message.content = content
+    raw = MagicMock()
+    raw.headers = headers or {}
+    raw.parse = AsyncMock(return_value=response)
+    client = MagicMock()
+    client.chat.completions.with_raw_response.create = AsyncMock(return_value=raw)
+    return client
+
+
 class TestGroqSkillsExtractor:
 
     def test_instance_created(self):
@@ -10,13 +29,13 @@ class TestGroqSkillsExtractor:
         assert isinstance(groq_extractor, GroqSkillsExtractor)
 
     def test_skills_loaded(self):
-        assert len(groq_extractor.skills_list) > 0
+        assert len(groq_extractor.skill_ids) > 0
         assert len(groq_extractor.skills_by_category) > 0
 
-    def test_skills_list_contains_common_skills(self):
-        assert "Python" in groq_extractor.skills_list
-        assert "JavaScript" in groq_extractor.skills_list
-        assert "React" in groq_extractor.skills_list
+    def test_codebook_contains_common_skills(self):
+        assert "Python" in groq_extractor.skill_ids
+        assert "JavaScript" in groq_extractor.skill_ids
+        assert "React" in groq_extractor.skill_ids
 
     def test_skills_by_category_structure(self):
         assert "programming_languages" in groq_extractor.skills_by_category
@@ -49,7 +68,7 @@ class TestExtractSkills:
     def test_extract_skills_success(self, mock_groq_class):
         mock_client = MagicMock()
         mock_response = MagicMock()
-        mock_response.choices[0].message.content = '["Python", "React", "PostgreSQL"]'
+        mock_response.choices[0].message.content = skill_ids_json("Python", "React", "PostgreSQL")
         mock_client.chat.completions.create.return_value = mock_response
         mock_groq_class.return_value = mock_client
 
@@ -60,10 +79,10 @@ class TestExtractSkills:
         assert "React" in skills
 
     @patch('services.market_analysis.groq_service.Groq')
-    def test_extract_skills_with_markdown(self, mock_groq_class):
+    def test_extract_skills_uses_json_mode(self, mock_groq_class):
         mock_client = MagicMock()
         mock_response = MagicMock()
-        mock_response.choices[0].message.content = '```json\n["Python", "JavaScript"]\n```'
+        mock_response.choices[0].message.content = skill_ids_json("Python", "JavaScript")
         mock_client.chat.completions.create.return_value = mock_response
         mock_groq_class.return_value = mock_client
 
@@ -72,21 +91,25 @@ class TestExtractSkills:
 
         assert "Python" in skills
         assert "JavaScript" in skills
+        call_kwargs = mock_client.chat.completions.create.call_args.kwargs
+        assert call_kwargs["response_format"] == {"type": "json_object"}
 
     @patch('services.market_analysis.groq_service.Groq')
     def test_extract_skills_filters_invalid(self, mock_groq_class):
         mock_client = MagicMock()
         mock_response = MagicMock()
-        mock_response.choices[0].message.content = '["Python", "FakeSkill123", "React"]'
+        python_id = groq_extractor.skill_ids["Python"]
+        react_id = groq_extractor.skill_ids["React"]
+        mock_response.choices[0].message.content = json.dumps(
+            {"skills": [python_id, 999999, "FakeSkill123", str(react_id), react_id]}
+        )
         mock_client.chat.completions.create.return_value = mock_response
         mock_groq_class.return_value = mock_client
 
         extractor = GroqSkillsExtractor()
         skills = extractor.extract_skills("Some job description")
 
-        assert "Python" in skills
-        assert "React" in skills
-        assert "FakeSkill123" not in skills
+        assert skills == ["Python", "React"]
 
     @patch('services.market_analysis.groq_service.Groq')
     def test_extract_skills_error_returns_empty(self, mock_groq_class):
@@ -130,3 +153,228 @@ class TestExtractSkillsList:
         result = groq_extractor.extract_skills_list("Job description")
 
         assert result == []
+
+
+class TestCodebook:
+
+    def test_ids_unique(self):
+        assert len(set(groq_extractor.skill_ids.values())) == len(groq_extractor.skill_ids)
+
+    def test_id_lookup(self):
+        python_id = groq_extractor.skill_ids["Python"]
+        assert groq_extractor._to_skills_list(groq_extractor._ids_to_skills([python_id])) == [
+            {"name": "Python", "category": "programming_languages"}
+        ]
+
+    def test_duplicate_names_map_to_primary_category(self):
+        # 1016 est l'ID secondaire de Figma (design_tools) dans skills.json
+        figma_ids = [i for i, name in groq_extractor.taxonomy.names.items() if name == "Figma"]
+
+        assert len(figma_ids) == 2
+        assert groq_extractor._to_skills_list(groq_extractor._ids_to_skills(figma_ids)) == [
+            {"name": "Figma", "category": "collaboration_tools"}
+        ]
+        assert groq_extractor.skill_ids["Swift"] == 11
+
+    def test_ids_to_skills_strict(self):
+        python_id = groq_extractor.skill_ids["Python"]
+
+        assert groq_extractor._ids_to_skills([python_id, True, 1.0, "1", python_id]) == ["Python"]
+        assert groq_extractor._ids_to_skills("not a list") is None
+
+    def test_parse_single_rejects_non_object(self):
+        assert groq_extractor._parse_single("[1, 2]") is None
+        assert groq_extractor._parse_single("garbage") is None
+
+    def test_prompt_uses_codebook(self):
+        prompt = groq_extractor._build_prompt("Python developer")
+
+        assert f'{groq_extractor.skill_ids["Python"]}=Python' in prompt
+
+
+class TestCandidateSkills:
+
+    def test_includes_lexical_hits(self):
+        candidates = groq_extractor._candidate_skills("Python and PostgreSQL required")
+
+        assert "Python" in candidates
+        assert "PostgreSQL" in candidates
+
+    def test_adds_category_co_occurrers(self):
+        candidates = groq_extractor._candidate_skills("PostgreSQL required")
+
+        databases = groq_extractor.skills_by_category["databases"]
+        for skill in databases[:GroqSkillsExtractor.CANDIDATES_PER_CATEGORY]:
+            assert skill in candidates
+
+    def test_excludes_unrelated_categories(self):
+        candidates = groq_extractor._candidate_skills("Python and PostgreSQL required")
+
+        assert "Solidity" not in candidates
+
+    def test_default_candidates_without_hits(self):
+        candidates = groq_extractor._candidate_skills("Nothing technical here")
+
+        assert len(candidates) > 0
+        assert len(candidates) < len(groq_extractor.skill_ids)
+
+
+class TestBuildPrompt:
+
+    def test_prompt_much_shorter_than_full_list(self, sample_job_description_en):
+        prompt = groq_extractor._build_prompt(sample_job_description_en)
+
+        assert len(prompt) * 5 < len(", ".join(groq_extractor.skill_ids))
+
+    def test_prompt_contains_job_posting(self):
+        prompt = groq_extractor._build_prompt("Looking for a Rust engineer")
+
+        assert "Looking for a Rust engineer" in prompt
+        assert "Rust" in prompt.split("JOB POSTING:")[0]
+
+
+class TestPlanBatches:
+
+    def test_small_postings_share_a_batch(self):
+        postings = ["Python developer"] * 3
+
+        batches = groq_extractor._plan_batches(postings)
+
+        assert batches == [[0, 1, 2]]
+
+    def test_respects_max_batch_size(self):
+        postings = ["Python developer"] * (GroqSkillsExtractor.MAX_BATCH_SIZE + 1)
+
+        batches = groq_extractor._plan_batches(postings)
+
+        assert len(batches) == 2
+        assert all(len(b) <= GroqSkillsExtractor.MAX_BATCH_SIZE for b in batches)
+
+    def test_respects_token_budget(self):
+        extractor = GroqSkillsExtractor()
+        extractor.BATCH_TOKEN_BUDGET = 2000
+        long_posting = "Python developer. " * 200
+        postings = [long_posting] * 6
+
+        batches = extractor._plan_batches(postings)
+
+        assert len(batches) > 1
+        assert sorted(i for b in batches for i in b) == list(range(6))
+
+
+class TestBatchExtraction:
+
+    @pytest.mark.asyncio
+    async def test_parses_keyed_json_object(self):
+        extractor = GroqSkillsExtractor()
+        python_id = groq_extractor.skill_ids["Python"]
+        java_id = groq_extractor.skill_ids["Java"]
+        extractor.async_client = mock_async_client(json.dumps({"0": [python_id, 999999], "1": [java_id], "x": [1]}))
+
+        parsed = await extractor._request_batch_async(["Python job", "Java job"])
+
+        assert parsed == {0: ["Python"], 1: ["Java"]}
+
+    @pytest.mark.asyncio
+    async def test_invalid_json_returns_empty(self):
+        extractor = GroqSkillsExtractor()
+        extractor.async_client = mock_async_client('not json')
+
+        assert await extractor._request_batch_async(["Python job"]) == {}
+
+    @pytest.mark.asyncio
+    async def test_unparsed_batch_is_split(self):
+        extractor = GroqSkillsExtractor()
+
+        async def fake_request(postings):
+            if len(postings) > 1:
+                return {}
+            return {0: [postings[0]]}
+
+        with patch.object(extractor, "_request_batch_async", side_effect=fake_request) as mock_request:
+            with extractor.scheduler.flow() as flow:
+                results = await extractor._extract_batch(["Python", "Java", "Go"], flow)
+
+        assert results == [["Python"], ["Java"], ["Go"]]
+        assert mock_request.call_count > 3
+
+    @pytest.mark.asyncio
+    async def test_partial_batch_retries_only_missing(self):
+        extractor = GroqSkillsExtractor()
+        calls = []
+
+        async def fake_request(postings):
+            calls.append(list(postings))
+            if len(calls) == 1:
+                return {0: ["Python"]}
+            return {i: [p] for i, p in enumerate(postings)}
+
+        with patch.object(extractor, "_request_batch_async", side_effect=fake_request):
+            with extractor.scheduler.flow() as flow:
+                results = await extractor._extract_batch(["Python", "Java", "Go"], flow)
+
+        assert results == [["Python"], ["Java"], ["Go"]]
+        assert calls[1] == ["Java", "Go"]
+
+    @pytest.mark.asyncio
+    async def test_failed_call_is_not_split(self):
+        extractor = GroqSkillsExtractor()
+
+        with patch.object(extractor, "_request_batch_async", new_callable=AsyncMock) as mock_request:
+            # Erreur API ou refus du limiteur
+            mock_request.return_value = None
+            with extractor.scheduler.flow() as flow:
+                results = await extractor._extract_batch([f"Posting {i}" for i in range(8)], flow)
+
+        assert results == [None] * 8
+        mock_request.assert_called_once()
+
+
+class TestChatAsyncRateLimit:
+
+    @pytest.mark.asyncio
+    async def test_updates_limiter_from_headers(self):
+        extractor = GroqSkillsExtractor()
+        extractor.rate_limiter = Mock()
+        extractor.rate_limiter.acquire = AsyncMock()
+        headers = {"x-ratelimit-remaining-tokens": "1000"}
+        extractor.async_client = mock_async_client('["Python"]', headers)
+
+        content = await extractor._chat_async("prompt", 100)
+
+        assert content == '["Python"]'
+        extractor.rate_limiter.acquire.assert_awaited_once()
+        extractor.rate_limiter.update_from_headers.assert_called_once_with(headers)
+
+    @pytest.mark.asyncio
+    async def test_skips_call_when_wait_too_long(self):
+        extractor = GroqSkillsExtractor()
+        extractor.rate_limiter = Mock()
+        extractor.rate_limiter.acquire = AsyncMock(return_value=False)
+        extractor.async_client = mock_async_client('["Python"]')
+
+        assert await extractor._chat_async("prompt", 100) is None
+        extractor.async_client.chat.completions.with_raw_response.create.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_retries_after_rate_limit_error(self):
+        extractor = GroqSkillsExtractor()
+        extractor.rate_limiter = Mock()
+        extractor.rate_limiter.acquire = AsyncMock()
+        extractor.rate_limiter.on_rate_limited.return_value = 0.5
+
+        error_response = Mock()
+        error_response.status_code = 429
+        error_response.headers = {"retry-after": "0.5"}
+        rate_limit_error = RateLimitError("Rate limit", response=error_response, body=None)
+
+        client = mock_async_client('["Python"]')
+        raw = await client.chat.completions.with_raw_response.create()
+        client.chat.completions.with_raw_response.create = AsyncMock(side_effect=[rate_limit_error, raw])
+        extractor.async_client = client
+
+        content = await extractor._chat_async("prompt", 100)
+
+        assert content == '["Python"]'
+        extractor.rate_limiter.on_rate_limited.assert_called_once_with(error_response.headers)
+        assert extractor.rate_limiter.acquire.await_count == 2
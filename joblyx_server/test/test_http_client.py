@@ -0,0 +1,67 @@
+import pytest
+import asyncio
+from unittest.mock import patch, AsyncMock
+from services.http_client import SharedHttpClient, http_client
+
+
+class TestSharedHttpClient:
+
+    def test_instance_created(self):
+        assert isinstance(http_client, SharedHttpClient)
+
+    @pytest.mark.asyncio
+    async def test_client_reused_across_requests(self):
+        shared = SharedHttpClient()
+
+        first = await shared.get_client()
+        second = await shared.get_client()
+
+        assert first is second
+        await shared.aclose()
+
+    @pytest.mark.asyncio
+    async def test_http2_and_pool_limits(self):
+        shared = SharedHttpClient()
+
+        with patch('httpx.AsyncClient') as mock_client_class:
+            mock_client_class.return_value.__aenter__ = AsyncMock(return_value=AsyncMock())
+            await shared.get_client()
+
+            kwargs = mock_client_class.call_args.kwargs
+            assert kwargs["http2"] is True
+            assert kwargs["limits"].max_keepalive_connections > 0
+
+    @pytest.mark.asyncio
+    async def test_aclose_closes_and_resets(self):
+        shared = SharedHttpClient()
+        client = await shared.get_client()
+
+        await shared.aclose()
+
+        assert client.is_closed
+        assert shared._client is None
+        # Un appel après fermeture rouvre un nouveau client
+        assert await shared.get_client() is not client
+        await shared.aclose()
+
+    @pytest.mark.asyncio
+    async def test_per_host_limit(self):
+        shared = SharedHttpClient()
+        in_flight = 0
+        peak = 0
+
+        async def slow_get(url, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        mock_client = AsyncMock()
+        mock_client.get.side_effect = slow_get
+        shared.get_client = AsyncMock(return_value=mock_client)
+
+        with patch('services.http_client.HTTP_MAX_CONNECTIONS_PER_HOST', 2):
+            await asyncio.gather(*(shared.get("https://jsearch.p.rapidapi.com/search") for _ in range(6)))
+
+        assert peak == 2
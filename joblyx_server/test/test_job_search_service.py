@@ -1,7 +1,14 @@
 import pytest
+import asyncio
 from unittest.mock import patch, Mock, AsyncMock
 import httpx
 from services.market_analysis import JobSearchService, job_search_service
+from services.market_analysis.provider_stats import ProviderLatencyTracker
+
+
+async def descriptions(pages) -> list[list[str]]:
+    """Descriptions de chaque page produite par iter_jobs"""
+    return [[job["job_description"] for job in jobs] async for jobs in pages]
 
 
 class TestJobSearchService:
@@ -141,6 +148,389 @@ class TestGetJobDescriptions:
         assert descriptions == []
 
 
+class TestIterJobs:
+
+    @pytest.mark.asyncio
+    async def test_yields_jsearch_pages(self):
+        service = JobSearchService()
+
+        async def jsearch_pages(*args):
+            yield [{"job_description": "Python developer"}, {"job_description": ""}]
+            yield [{"job_description": "Java developer"}]
+
+        service.jsearch.iter_pages = jsearch_pages
+        service.serpapi.iter_pages = Mock()
+
+        batches = await descriptions(service.iter_jobs("Developer", "Toronto", 2))
+
+        assert batches == [["Python developer", ""], ["Java developer"]]
+        assert service.get_last_provider() == "jsearch"
+        service.serpapi.iter_pages.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_serpapi_before_first_page(self):
+        service = JobSearchService()
+
+        async def jsearch_pages(*args):
+            raise Exception("JSearch down")
+            yield
+
+        async def serpapi_pages(*args):
+            yield [{"job_description": "SerpAPI job"}]
+
+        service.jsearch.iter_pages = jsearch_pages
+        service.serpapi.iter_pages = serpapi_pages
+
+        batches = await descriptions(service.iter_jobs("Developer", "Toronto", 1))
+
+        assert batches == [["SerpAPI job"]]
+        assert service.get_last_provider() == "serpapi"
+
+    @pytest.mark.asyncio
+    async def test_keeps_jsearch_pages_after_mid_stream_error(self):
+        service = JobSearchService()
+
+        async def jsearch_pages(*args):
+            yield [{"job_description": "Page 1 job"}]
+            raise Exception("JSearch down")
+
+        service.jsearch.iter_pages = jsearch_pages
+        service.serpapi.iter_pages = Mock()
+
+        batches = await descriptions(service.iter_jobs("Developer", "Toronto", 3))
+
+        assert batches == [["Page 1 job"]]
+        service.serpapi.iter_pages.assert_not_called()
+        assert not service.is_last_search_complete()
+
+    @pytest.mark.asyncio
+    async def test_search_complete_when_provider_answers_empty(self):
+        service = JobSearchService()
+
+        async def no_pages(*args):
+            return
+            yield
+
+        service.jsearch.iter_pages = no_pages
+        service.serpapi.iter_pages = no_pages
+
+        batches = await descriptions(service.iter_jobs("Developer", "Toronto", 1))
+
+        assert batches == []
+        assert service.is_last_search_complete()
+
+    @pytest.mark.asyncio
+    async def test_search_incomplete_when_both_providers_fail(self):
+        service = JobSearchService()
+
+        async def down(*args):
+            raise Exception("Provider down")
+            yield
+
+        service.jsearch.iter_pages = down
+        service.serpapi.iter_pages = down
+
+        batches = await descriptions(service.iter_jobs("Developer", "Toronto", 1))
+
+        assert batches == []
+        assert not service.is_last_search_complete()
+
+
+class TestHedging:
+
+    @pytest.mark.asyncio
+    async def test_hedges_with_serpapi_when_jsearch_slow(self):
+        service = JobSearchService()
+        service.latency = ProviderLatencyTracker()
+        service.get_hedge_delay = Mock(return_value=0.01)
+        jsearch_cancelled = asyncio.Event()
+
+        async def slow_jsearch(*args):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                jsearch_cancelled.set()
+                raise
+
+        service.jsearch.search_jobs = slow_jsearch
+        service.serpapi.search_jobs = AsyncMock(return_value=[{"job_description": "SerpAPI job"}])
+
+        result = await service.search_jobs("Developer", "Toronto", 1)
+
+        assert result == [{"job_description": "SerpAPI job"}]
+        assert service.get_last_provider() == "serpapi"
+        assert jsearch_cancelled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_jsearch_still_wins_after_hedge(self):
+        service = JobSearchService()
+        service.latency = ProviderLatencyTracker()
+        service.get_hedge_delay = Mock(return_value=0.01)
+
+        async def jsearch(*args):
+            await asyncio.sleep(0.02)
+            return [{"job_description": "JSearch job"}]
+
+        async def slow_serpapi(*args):
+            await asyncio.sleep(10)
+
+        service.jsearch.search_jobs = jsearch
+        service.serpapi.search_jobs = slow_serpapi
+
+        result = await service.search_jobs("Developer", "Toronto", 1)
+
+        assert result == [{"job_description": "JSearch job"}]
+        assert service.get_last_provider() == "jsearch"
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_when_disabled(self):
+        service = JobSearchService()
+        service.latency = ProviderLatencyTracker()
+        service.hedging = False
+        service.get_hedge_delay = Mock(return_value=0.0)
+
+        async def jsearch(*args):
+            await asyncio.sleep(0.02)
+            return [{"job_description": "JSearch job"}]
+
+        service.jsearch.search_jobs = jsearch
+        service.serpapi.search_jobs = AsyncMock()
+
+        await service.search_jobs("Developer", "Toronto", 1)
+
+        service.serpapi.search_jobs.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_streaming_hedge_closes_loser(self):
+        service = JobSearchService()
+        service.latency = ProviderLatencyTracker()
+        service.get_hedge_delay = Mock(return_value=0.01)
+        jsearch_closed = asyncio.Event()
+
+        async def jsearch_pages(*args):
+            try:
+                await asyncio.sleep(10)
+                yield [{"job_description": "JSearch job"}]
+            finally:
+                jsearch_closed.set()
+
+        async def serpapi_pages(*args):
+            yield [{"job_description": "SerpAPI page 1"}]
+            yield [{"job_description": "SerpAPI page 2"}]
+
+        service.jsearch.iter_pages = jsearch_pages
+        service.serpapi.iter_pages = serpapi_pages
+
+        batches = await descriptions(service.iter_jobs("Developer", "Toronto", 2))
+
+        assert batches == [["SerpAPI page 1"], ["SerpAPI page 2"]]
+        assert jsearch_closed.is_set()
+
+    def test_hedge_delay_follows_latency_percentile(self):
+        service = JobSearchService()
+        service.latency = ProviderLatencyTracker()
+
+        with patch('services.market_analysis.job_search_service.JOB_SEARCH_HEDGE_DELAY', 8.0):
+            assert service.get_hedge_delay() == 8.0
+
+            for i in range(1, 101):
+                service.latency.record("jsearch", i / 10)
+
+            assert service.get_hedge_delay() == pytest.approx(9.5)
+
+
+class TestCircuitBreakerRouting:
+
+    @staticmethod
+    def rate_limit_error(headers=None):
+        request = httpx.Request("GET", "https://jsearch.p.rapidapi.com/search")
+        response = httpx.Response(429, request=request, headers=headers or {})
+        return httpx.HTTPStatusError("429", request=request, response=response)
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_jsearch_is_skipped(self):
+        service = JobSearchService()
+        service.jsearch.search_jobs = AsyncMock(side_effect=self.rate_limit_error({"x-ratelimit-requests-reset": "120"}))
+        service.serpapi.search_jobs = AsyncMock(return_value=[{"job_description": "SerpAPI job"}])
+
+        await service.search_jobs("Developer", "Toronto", 1)
+        await service.search_jobs("Developer", "Toronto", 1)
+
+        assert service.jsearch.search_jobs.call_count == 1
+        assert service.serpapi.search_jobs.call_count == 2
+        assert service.breakers["jsearch"].state == "open"
+        assert service.get_provider_health()["jsearch"]["retry_in"] > 100
+
+    @pytest.mark.asyncio
+    async def test_all_providers_open_returns_empty(self):
+        service = JobSearchService()
+        for breaker in service.breakers.values():
+            breaker.record_failure(retry_after=60)
+        service.jsearch.search_jobs = AsyncMock()
+        service.serpapi.search_jobs = AsyncMock()
+
+        result = await service.search_jobs("Developer", "Toronto", 1)
+
+        assert result == []
+        assert service.get_last_provider() is None
+        service.jsearch.search_jobs.assert_not_called()
+        service.serpapi.search_jobs.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_transport_failures_reach_breakers(self):
+        service = JobSearchService()
+
+        def jsearch_transport(request):
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        def serpapi_transport(request):
+            return httpx.Response(503, request=request)
+
+        service.jsearch.http = httpx.AsyncClient(transport=httpx.MockTransport(jsearch_transport))
+        service.serpapi.http = httpx.AsyncClient(transport=httpx.MockTransport(serpapi_transport))
+
+        for fan_out in (False, True):
+            pages = [jobs async for jobs in service.iter_jobs("Developer", "Toronto", 1, fan_out=fan_out)]
+            assert pages == []
+
+        for provider in service.PROVIDERS:
+            assert service.breakers[provider].get_stats()["error_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_provider_is_per_request(self):
+        service = JobSearchService()
+
+        async def jsearch(query, *args):
+            if query == "Slow":
+                await asyncio.sleep(0.02)
+                return []
+            return [{"job_description": "JSearch job"}]
+
+        service.jsearch.search_jobs = jsearch
+        service.serpapi.search_jobs = AsyncMock(return_value=[{"job_description": "SerpAPI job"}])
+
+        async def search(query):
+            await service.search_jobs(query, "Toronto", 1)
+            await asyncio.sleep(0.03)
+            return service.get_last_provider()
+
+        providers = await asyncio.gather(search("Slow"), search("Fast"))
+
+        assert providers == ["serpapi", "jsearch"]
+
+
+class TestFanOut:
+
+    @staticmethod
+    def job(title, employer="Acme", description="Python and Docker"):
+        return {"job_title": title, "employer_name": employer, "job_description": description}
+
+    @pytest.mark.asyncio
+    async def test_merges_providers_and_dedupes(self):
+        service = JobSearchService()
+
+        async def jsearch_pages(*args):
+            yield [self.job("Backend Developer"), self.job("Data Engineer")]
+
+        async def serpapi_pages(*args):
+            await asyncio.sleep(0)
+            # Même offre que JSearch, casse et accents différents
+            yield [self.job("BACKEND developer", "ACME"), self.job("DevOps Engineer")]
+
+        service.jsearch.iter_pages = jsearch_pages
+        service.serpapi.iter_pages = serpapi_pages
+
+        pages = [jobs async for jobs in service.iter_jobs("Developer", "Gaspé", 1, fan_out=True, target_jobs=10)]
+        titles = [job["job_title"] for jobs in pages for job in jobs]
+
+        assert sorted(titles) == ["Backend Developer", "Data Engineer", "DevOps Engineer"]
+        assert service.get_last_provider() == "jsearch+serpapi"
+
+    @pytest.mark.asyncio
+    async def test_stops_at_target_and_cancels_providers(self):
+        service = JobSearchService()
+        serpapi_cancelled = asyncio.Event()
+
+        async def jsearch_pages(*args):
+            yield [self.job(f"Job {i}") for i in range(5)]
+
+        async def serpapi_pages(*args):
+            try:
+                await asyncio.sleep(10)
+                yield [self.job("Late job")]
+            except asyncio.CancelledError:
+                serpapi_cancelled.set()
+                raise
+
+        service.jsearch.iter_pages = jsearch_pages
+        service.serpapi.iter_pages = serpapi_pages
+
+        pages = [jobs async for jobs in service.iter_jobs("Developer", "Toronto", 1, fan_out=True, target_jobs=3)]
+
+        assert sum(len(jobs) for jobs in pages) == 3
+        assert serpapi_cancelled.is_set()
+        assert service.get_last_provider() == "jsearch"
+
+    @pytest.mark.asyncio
+    async def test_provider_failure_keeps_other_results(self):
+        service = JobSearchService()
+
+        async def jsearch_pages(*args):
+            raise Exception("JSearch down")
+            yield
+
+        async def serpapi_pages(*args):
+            yield [self.job("Only SerpAPI")]
+
+        service.jsearch.iter_pages = jsearch_pages
+        service.serpapi.iter_pages = serpapi_pages
+
+        batches = await descriptions(service.iter_jobs("Developer", "Toronto", 1, fan_out=True))
+
+        assert batches == [["Python and Docker"]]
+        assert service.get_last_provider() == "serpapi"
+        assert service.breakers["jsearch"].get_stats()["error_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_skips_open_circuit(self):
+        service = JobSearchService()
+        service.breakers["serpapi"].record_failure(retry_after=60)
+
+        async def jsearch_pages(*args):
+            yield [self.job("JSearch job")]
+
+        service.jsearch.iter_pages = jsearch_pages
+        service.serpapi.iter_pages = Mock()
+
+        pages = [jobs async for jobs in service.iter_jobs("Developer", "Toronto", 1, fan_out=True)]
+
+        assert len(pages) == 1
+        service.serpapi.iter_pages.assert_not_called()
+
+
+class TestProviderLatencyTracker:
+
+    def test_needs_min_samples(self):
+        tracker = ProviderLatencyTracker()
+        for _ in range(ProviderLatencyTracker.MIN_SAMPLES - 1):
+            tracker.record("jsearch", 1.0)
+
+        assert tracker.percentile("jsearch", 95) is None
+
+        tracker.record("jsearch", 1.0)
+        assert tracker.percentile("jsearch", 95) == 1.0
+
+    def test_window_drops_old_samples(self):
+        tracker = ProviderLatencyTracker()
+        for _ in range(ProviderLatencyTracker.WINDOW):
+            tracker.record("serpapi", 10.0)
+        for _ in range(ProviderLatencyTracker.WINDOW):
+            tracker.record("serpapi", 1.0)
+
+        assert tracker.percentile("serpapi", 99) == 1.0
+        assert tracker.get_stats()["serpapi"]["samples"] == ProviderLatencyTracker.WINDOW
+
+
 class TestGetLastProvider:
 
     @pytest.mark.asyncio
@@ -1,4 +1,5 @@
 import pytest
+import asyncio
 from unittest.mock import patch, Mock, AsyncMock
 import httpx
 from services.market_analysis import JSearchService, jsearch_service
@@ -90,9 +91,9 @@ class TestSearchJobs:
             mock_client.get.side_effect = httpx.RequestError("API Error")
             mock_client_class.return_value.__aenter__.return_value = mock_client
 
-            jobs = await service.search_jobs("Developer", "Toronto", num_pages=1)
-
-            assert jobs == []
+            # L'erreur remonte jusqu'au disjoncteur du provider
+            with pytest.raises(httpx.RequestError):
+                await service.search_jobs("Developer", "Toronto", num_pages=1)
 
     @pytest.mark.asyncio
     async def test_search_jobs_params(self):
@@ -160,3 +161,132 @@ class TestGetJobDescriptions:
             descriptions = await service.get_job_descriptions("Rare Job", "Small Town")
 
             assert descriptions == []
+
+
+class TestPageWindows:
+
+    def test_plan_windows_do_not_overlap(self):
+        service = JSearchService()
+
+        assert service.plan_windows(1) == [(1, 1)]
+        assert service.plan_windows(3) == [(1, 3)]
+        assert service.plan_windows(7) == [(1, 3), (4, 3), (7, 1)]
+        assert service.plan_windows(0) == []
+
+    @pytest.mark.asyncio
+    async def test_fetches_remaining_windows_and_dedupes(self):
+        service = JSearchService()
+        full_window = [{"job_id": f"a{i}"} for i in range(30)]
+        responses = {
+            "1": full_window,
+            "4": [{"job_id": "a0"}, {"job_id": "b1"}, {"job_id": "b2"}],
+        }
+
+        async def fake_get(url, headers=None, params=None):
+            response = Mock()
+            response.raise_for_status = Mock()
+            response.json.return_value = {"data": responses[params["page"]]}
+            return response
+
+        service.http = Mock()
+        service.http.get = AsyncMock(side_effect=fake_get)
+
+        jobs = await service.search_jobs("Developer", "Toronto", num_pages=6)
+
+        assert service.http.get.call_count == 2
+        assert len(jobs) == 32
+        assert len({job["job_id"] for job in jobs}) == 32
+        pages = sorted(call.kwargs["params"]["page"] for call in service.http.get.call_args_list)
+        assert pages == ["1", "4"]
+
+    def test_date_posted_window(self):
+        service = JSearchService()
+
+        assert service.date_posted_window(3600) == "today"
+        assert service.date_posted_window(2 * 86400) == "3days"
+        assert service.date_posted_window(5 * 86400) == "week"
+        assert service.date_posted_window(10 * 86400) is None
+
+    @pytest.mark.asyncio
+    async def test_date_posted_forwarded(self):
+        service = JSearchService()
+
+        response = Mock()
+        response.raise_for_status = Mock()
+        response.json.return_value = {"data": []}
+        service.http = Mock()
+        service.http.get = AsyncMock(return_value=response)
+
+        async for _ in service.iter_pages("Developer", "Toronto", num_pages=3, date_posted="3days"):
+            pass
+
+        assert service.http.get.call_args.kwargs["params"]["date_posted"] == "3days"
+
+    @pytest.mark.asyncio
+    async def test_stops_after_partial_first_window(self):
+        service = JSearchService()
+
+        response = Mock()
+        response.raise_for_status = Mock()
+        response.json.return_value = {"data": [{"job_id": "only"}]}
+        service.http = Mock()
+        service.http.get = AsyncMock(return_value=response)
+
+        jobs = await service.search_jobs("Rare Job", "Small Town", num_pages=9)
+
+        assert len(jobs) == 1
+        service.http.get.assert_called_once()
+        assert service.http.get.call_args.kwargs["params"]["num_pages"] == "3"
+
+    @pytest.mark.asyncio
+    async def test_concurrency_bounded_per_search(self):
+        service = JSearchService()
+        in_flight = 0
+        peak = 0
+
+        async def fake_get(url, headers=None, params=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            response = Mock()
+            response.raise_for_status = Mock()
+            response.json.return_value = {"data": [{"job_id": f"{params['page']}-{i}"} for i in range(30)]}
+            return response
+
+        service.http = Mock()
+        service.http.get = AsyncMock(side_effect=fake_get)
+
+        await service.search_jobs("Developer", "Toronto", num_pages=15)
+
+        assert service.http.get.call_count == 5
+        assert peak == JSearchService.MAX_CONCURRENT_REQUESTS
+
+    @pytest.mark.asyncio
+    async def test_searches_do_not_share_the_bound(self):
+        service = JSearchService()
+        searches = JSearchService.MAX_CONCURRENT_REQUESTS + 1
+        all_in_flight = asyncio.Event()
+        in_flight = 0
+
+        async def fake_get(url, headers=None, params=None):
+            nonlocal in_flight
+            in_flight += 1
+            if in_flight == searches:
+                all_in_flight.set()
+            # Ne répond qu'une fois toutes les recherches en vol en même temps
+            await all_in_flight.wait()
+            response = Mock()
+            response.raise_for_status = Mock()
+            response.json.return_value = {"data": [{"job_id": params["query"]}]}
+            return response
+
+        service.http = Mock()
+        service.http.get = AsyncMock(side_effect=fake_get)
+
+        results = await asyncio.wait_for(asyncio.gather(*(
+            service.search_jobs(f"Developer {i}", "Toronto", num_pages=1) for i in range(searches)
+        )), timeout=1)
+
+        assert all(len(jobs) == 1 for jobs in results)
@@ -1,7 +1,19 @@
+import time
 import pytest
+import threading
+import asyncio
 from unittest.mock import Mock, patch, AsyncMock
 from collections import Counter
 from services.market_analysis import MarketAnalyzer, market_analyzer
+from services.market_analysis.posting_dedup import NearDuplicateFilter
+
+
+def pages(*batches):
+    """Simule iter_jobs : une page d'offres par liste de descriptions"""
+    async def iterate(**kwargs):
+        for batch in batches:
+            yield [{"job_description": description} for description in batch]
+    return iterate
 
 
 class TestMarketAnalyzer:
@@ -37,7 +49,7 @@ class TestAnalyzeMarket:
     async def test_no_jobs_found(self):
         analyzer = MarketAnalyzer()
         analyzer.job_search = Mock()
-        analyzer.job_search.get_job_descriptions = AsyncMock(return_value=[])
+        analyzer.job_search.iter_jobs = pages()
         analyzer.cache = Mock()
         analyzer.cache.get_cache_results.return_value = None
 
@@ -51,9 +63,7 @@ class TestAnalyzeMarket:
     async def test_analyze_returns_structure(self):
         analyzer = MarketAnalyzer()
         analyzer.job_search = Mock()
-        analyzer.job_search.get_job_descriptions = AsyncMock(
-            return_value=["Python and React developer needed."]
-        )
+        analyzer.job_search.iter_jobs = pages(["Python and React developer needed."])
         analyzer.cache = Mock()
         analyzer.cache.get_cache_results.return_value = None
         analyzer.cache.save_to_cache.return_value = True
@@ -78,9 +88,7 @@ class TestAnalyzeMarket:
     async def test_skill_counting(self):
         analyzer = MarketAnalyzer()
         analyzer.job_search = Mock()
-        analyzer.job_search.get_job_descriptions = AsyncMock(
-            return_value=["Job 1", "Job 2", "Job 3"]
-        )
+        analyzer.job_search.iter_jobs = pages(["Job 1", "Job 2", "Job 3"])
         analyzer.cache = Mock()
         analyzer.cache.get_cache_results.return_value = None
         analyzer.cache.save_to_cache.return_value = True
@@ -123,7 +131,7 @@ class TestAnalyzeMarket:
     async def test_balanced_limits_per_category(self):
         analyzer = MarketAnalyzer()
         analyzer.job_search = Mock()
-        analyzer.job_search.get_job_descriptions = AsyncMock(return_value=["Job"] * 5)
+        analyzer.job_search.iter_jobs = pages([f"Job {i}" for i in range(5)])
         analyzer.cache = Mock()
         analyzer.cache.get_cache_results.return_value = None
         analyzer.cache.save_to_cache.return_value = True
@@ -138,6 +146,622 @@ class TestAnalyzeMarket:
         lang_skills = [s for s in result["top_skills"] if s["category"] == "programming_languages"]
         assert len(lang_skills) <= MarketAnalyzer.MAX_PER_CATEGORY
 
+    @pytest.mark.asyncio
+    async def test_falls_back_to_local_matcher_when_llm_fails(self):
+        analyzer = MarketAnalyzer()
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = pages(["Python developer", "Python and Docker"])
+        analyzer.cache = Mock()
+        analyzer.cache.get_cache_results.return_value = None
+        analyzer.cache.save_to_cache.return_value = True
+
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock(return_value=[None, None])
+
+        result = await analyzer.analyze_market("Developer", "Toronto", "Ontario")
+
+        names = [s["name"] for s in result["top_skills"]]
+        assert "Python" in names
+
+    @pytest.mark.asyncio
+    async def test_local_fallback_only_for_failed_postings(self):
+        analyzer = MarketAnalyzer()
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock(return_value=[
+            [{"name": "Kubernetes", "category": "devops_tools"}],
+            None,
+        ])
+        analyzer.local_extractor = Mock()
+        analyzer.local_extractor.extract_all_skills = AsyncMock(return_value=[
+            [{"name": "Docker", "category": "devops_tools"}],
+        ])
+        jobs = [{"job_description": "Kubernetes operator"}, {"job_description": "Docker everywhere"}]
+
+        results = await analyzer._extract_and_store("Developer", "Toronto", "Ontario", jobs)
+
+        analyzer.local_extractor.extract_all_skills.assert_awaited_once_with(["Docker everywhere"])
+        assert results == [
+            [{"name": "Kubernetes", "category": "devops_tools"}],
+            [{"name": "Docker", "category": "devops_tools"}],
+        ]
+        # Page complète après repli : elle est stockée
+        assert len(analyzer.store.find("Developer", "Toronto", "Ontario")) == 2
+
+
+class TestStreamingPipeline:
+
+    @pytest.mark.asyncio
+    async def test_extraction_starts_before_next_page(self):
+        analyzer = MarketAnalyzer()
+        first_page_extracting = asyncio.Event()
+
+        async def iterate(**kwargs):
+            yield [{"job_description": "Python developer"}]
+            # La page 2 n'arrive qu'une fois la page 1 en cours d'extraction
+            await asyncio.wait_for(first_page_extracting.wait(), timeout=1)
+            yield [{"job_description": "Java developer"}, {"job_description": "Go developer"}]
+
+        async def extract(descriptions, **kwargs):
+            first_page_extracting.set()
+            return [[{"name": d.split()[0], "category": "programming_languages"}] for d in descriptions]
+
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = iterate
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = extract
+
+        fetched = await analyzer._fetch_and_extract("Developer", "Toronto", "Ontario", 2)
+
+        assert fetched["total_jobs"] == 3
+        assert [r[0]["name"] for r in fetched["results"]] == ["Python", "Java", "Go"]
+
+    @pytest.mark.asyncio
+    async def test_pending_extractions_cancelled_on_fetch_error(self):
+        analyzer = MarketAnalyzer()
+        cancelled = asyncio.Event()
+
+        async def iterate(**kwargs):
+            yield [{"job_description": "Python developer"}]
+            await asyncio.sleep(0)
+            raise RuntimeError("provider down")
+
+        async def extract(descriptions, **kwargs):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = iterate
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = extract
+
+        with pytest.raises(RuntimeError):
+            await analyzer._fetch_and_extract("Developer", "Toronto", "Ontario", 2)
+
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_one_scheduler_flow_per_analysis(self):
+        analyzer = MarketAnalyzer()
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = pages(["Python developer"], ["Java developer"], ["Go developer"])
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        flows = []
+
+        async def extract(descriptions, **kwargs):
+            flows.append((kwargs["flow"], analyzer.scheduler.get_stats()["active_flows"]))
+            return [[] for _ in descriptions]
+
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = extract
+
+        await analyzer._compute_market("Developer", "Toronto", "Ontario", 3, weight=2)
+
+        assert len(flows) == 3
+        assert len({id(flow) for flow, _ in flows}) == 1
+        assert flows[0][0].weight == 2
+        assert all(active == 1 for _, active in flows)
+
+
+class TestNearDuplicates:
+
+    @pytest.mark.asyncio
+    async def test_reposted_jobs_counted_once(self):
+        analyzer = MarketAnalyzer()
+        posting = "Senior Python developer to build Django APIs on AWS with Docker and PostgreSQL for our Montreal team."
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = pages(
+            [posting, "Java developer with Spring Boot and Kafka experience for payments."],
+            [posting + " Apply now!"]
+        )
+        analyzer.cache = Mock()
+        analyzer.cache.get_cache_results.return_value = None
+
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock(
+            side_effect=lambda descriptions, **kwargs: [[{"name": "Python", "category": "programming_languages"}] for _ in descriptions]
+        )
+
+        result = await analyzer.analyze_market("Developer", "Montreal", "Quebec", balanced=False)
+
+        assert result["total_jobs_analyzed"] == 2
+        assert result["duplicates_removed"] == 1
+        # Seule la première page a été envoyée au LLM
+        analyzer.extractor.extract_all_skills.assert_called_once()
+
+
+class TestPostingStore:
+
+    @staticmethod
+    def job(i):
+        return {
+            "job_id": f"job-{i}",
+            "provider": "jsearch",
+            "job_title": "Python Developer",
+            "job_description": f"Posting number {i} for a python developer with unique requirement {i * 7919}",
+        }
+
+    @pytest.mark.asyncio
+    async def test_answers_from_store_without_providers(self):
+        analyzer = MarketAnalyzer()
+        python_id = analyzer.taxonomy.ids["Python"]
+        jobs = [self.job(i) for i in range(10)]
+        analyzer.store.save("Python Developer", "Toronto", "Ontario", jobs, [[python_id]] * 10)
+
+        analyzer.job_search = Mock()
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock()
+
+        fetched = await analyzer._fetch_and_extract("Python Developer", "Toronto", "Ontario", 1)
+
+        assert fetched["total_jobs"] == 10
+        assert fetched["provider"] == "store"
+        assert fetched["results"][0] == [{"name": "Python", "category": "programming_languages"}]
+        analyzer.job_search.iter_jobs.assert_not_called()
+        analyzer.extractor.extract_all_skills.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_store_access_off_the_event_loop(self):
+        analyzer = MarketAnalyzer()
+        threads = []
+        store = analyzer.store
+
+        def spy(method):
+            def call(*args, **kwargs):
+                threads.append(threading.current_thread())
+                return method(*args, **kwargs)
+            return call
+
+        with patch.object(store, "find", spy(store.find)), patch.object(store, "save", spy(store.save)), \
+                patch.object(store, "get_snapshot", spy(store.get_snapshot)), \
+                patch.object(store, "save_snapshot", spy(store.save_snapshot)):
+            analyzer.job_search = Mock()
+            analyzer.job_search.iter_jobs = pages(["Python developer"])
+            analyzer.job_search.get_last_provider.return_value = "jsearch"
+            analyzer.job_search.is_last_search_complete.return_value = True
+            analyzer.extractor = Mock()
+            analyzer.extractor.extract_all_skills = AsyncMock(return_value=[
+                [{"name": "Python", "category": "programming_languages"}],
+            ])
+
+            market = await analyzer._compute_market("Python Developer", "Toronto", "Ontario", 1)
+
+        assert market["total_jobs"] == 1
+        # get_snapshot, find, save, find, save_snapshot
+        assert len(threads) == 5
+        assert threading.main_thread() not in threads
+
+    @pytest.mark.asyncio
+    async def test_signs_stored_postings_off_the_event_loop(self):
+        analyzer = MarketAnalyzer()
+        python_id = analyzer.taxonomy.ids["Python"]
+        jobs = [self.job(i) for i in range(25)]
+        analyzer.store.save("Python Developer", "Toronto", "Ontario", jobs, [[python_id]] * 25)
+        analyzer.job_search = Mock()
+        signature = NearDuplicateFilter.signature
+        threads = []
+
+        def spy(self, text):
+            threads.append(threading.current_thread())
+            return signature(self, text)
+
+        with patch.object(NearDuplicateFilter, "signature", spy):
+            fetched = await analyzer._fetch_and_extract("Python Developer", "Toronto", "Ontario", 1)
+
+        assert fetched["total_jobs"] == 25
+        assert len(threads) == 25
+        assert threading.main_thread() not in threads
+
+    @pytest.mark.asyncio
+    async def test_fetches_only_delta_and_stores_new_postings(self):
+        analyzer = MarketAnalyzer()
+        python_id = analyzer.taxonomy.ids["Python"]
+        analyzer.store.save("Python Developer", "Toronto", "Ontario", [self.job(0)], [[python_id]])
+        requested_pages = []
+
+        async def iterate(query, location, num_pages):
+            requested_pages.append(num_pages)
+            # La première offre est déjà stockée : elle ne doit pas repartir au LLM
+            yield [self.job(0), self.job(1), self.job(2)]
+
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = iterate
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock(return_value=[
+            [{"name": "Docker", "category": "devops_tools"}],
+            [{"name": "Docker", "category": "devops_tools"}],
+        ])
+
+        fetched = await analyzer._fetch_and_extract("Python Developer", "Toronto", "Ontario", 2)
+
+        assert requested_pages == [2]
+        assert fetched["total_jobs"] == 3
+        assert fetched["provider"] == "store+jsearch"
+        descriptions = analyzer.extractor.extract_all_skills.call_args.args[0]
+        assert len(descriptions) == 2
+        assert len(analyzer.store.find("Python Developer", "Toronto", "Ontario")) == 3
+
+
+class TestIncrementalRefresh:
+
+    @staticmethod
+    def job(i, posted_days_ago=0):
+        return {
+            "job_id": f"job-{i}",
+            "provider": "jsearch",
+            "job_title": "Python Developer",
+            "job_description": f"Posting number {i} for a python developer with unique requirement {i * 7919}",
+            "job_posted_at_timestamp": time.time() - posted_days_ago * 86400,
+        }
+
+    @staticmethod
+    def mock_cache(analyzer):
+        analyzer.cache = Mock()
+        analyzer.cache.get_cache_results.return_value = None
+        analyzer.cache.save_to_cache.return_value = True
+
+    @staticmethod
+    def postings(*batches):
+        """Simule iter_jobs avec des offres complètes"""
+        async def iterate(**kwargs):
+            for batch in batches:
+                yield batch
+        return iterate
+
+    @staticmethod
+    def backdate(analyzer, seconds):
+        """Recule la date du dernier snapshot"""
+        conn = analyzer.store._connect()
+        conn.execute("UPDATE market_snapshots SET refreshed_at = refreshed_at - ?", (seconds,))
+
+    @pytest.mark.asyncio
+    async def test_full_run_saves_snapshot(self):
+        analyzer = MarketAnalyzer()
+        self.mock_cache(analyzer)
+        jobs = [self.job(0), self.job(1)]
+
+        async def iterate(**kwargs):
+            yield jobs
+
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = iterate
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock(return_value=[
+            [{"name": "Python", "category": "programming_languages"}],
+            [{"name": "Python", "category": "programming_languages"}, {"name": "Docker", "category": "devops_tools"}],
+        ])
+
+        await analyzer.analyze_market("Python Developer", "Toronto", "Ontario", num_pages=1)
+
+        snapshot = analyzer.store.get_snapshot("Python Developer", "Toronto", "Ontario")
+        assert snapshot["total_jobs"] == 2
+        assert snapshot["skill_counts"] == {analyzer.taxonomy.ids["Python"]: 2, analyzer.taxonomy.ids["Docker"]: 1}
+
+    @pytest.mark.asyncio
+    async def test_fetches_and_extracts_only_new_postings(self):
+        analyzer = MarketAnalyzer()
+        self.mock_cache(analyzer)
+        python_id = analyzer.taxonomy.ids["Python"]
+        docker_id = analyzer.taxonomy.ids["Docker"]
+        stored = [self.job(i, posted_days_ago=5) for i in range(3)]
+        analyzer.store.save("Python Developer", "Toronto", "Ontario", stored, [[python_id]] * 3)
+        analyzer.store.save_snapshot("Python Developer", "Toronto", "Ontario", 3, {python_id: 3})
+        requests = []
+
+        async def iterate(query, location, num_pages, date_posted):
+            requests.append(date_posted)
+            # Une offre déjà connue, une nouvelle, une antérieure au snapshot (SerpAPI sans filtre)
+            yield [self.job(0, posted_days_ago=5), self.job(3), self.job(4, posted_days_ago=2)]
+
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = iterate
+        analyzer.job_search.jsearch.date_posted_window.return_value = "today"
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock(return_value=[
+            [{"name": "Docker", "category": "devops_tools"}],
+        ])
+
+        result = await analyzer.analyze_market("Python Developer", "Toronto", "Ontario", num_pages=1)
+
+        assert requests == ["today"]
+        assert len(analyzer.extractor.extract_all_skills.call_args.args[0]) == 1
+        assert result["total_jobs_analyzed"] == 4
+        assert result["provider"] == "snapshot+jsearch"
+        counts = {skill["name"]: skill["count"] for skill in result["top_skills"]}
+        assert counts == {"Python": 3, "Docker": 1}
+        snapshot = analyzer.store.get_snapshot("Python Developer", "Toronto", "Ontario")
+        assert snapshot["skill_counts"] == {python_id: 3, docker_id: 1}
+
+    @pytest.mark.asyncio
+    async def test_aged_out_postings_leave_the_counts(self):
+        analyzer = MarketAnalyzer()
+        python_id = analyzer.taxonomy.ids["Python"]
+        docker_id = analyzer.taxonomy.ids["Docker"]
+        analyzer.store.save("Python Developer", "Toronto", "Ontario", [
+            self.job(0, posted_days_ago=10),
+            self.job(1, posted_days_ago=analyzer.store.max_age_days + 0.5),
+        ], [[python_id], [python_id, docker_id]])
+        analyzer.store.save_snapshot("Python Developer", "Toronto", "Ontario", 2, {python_id: 2, docker_id: 1})
+        # Snapshot pris il y a un jour, quand la seconde offre était encore dans la fenêtre
+        self.backdate(analyzer, 86400)
+
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = pages()
+        analyzer.job_search.jsearch.date_posted_window.return_value = "today"
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock()
+
+        market = await analyzer._collect_market("Python Developer", "Toronto", "Ontario", 1)
+
+        assert market["total_jobs"] == 1
+        assert market["skill_counts"] == Counter({"Python": 1})
+        analyzer.extractor.extract_all_skills.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stored_near_duplicates_are_not_extracted(self):
+        analyzer = MarketAnalyzer()
+        python_id = analyzer.taxonomy.ids["Python"]
+        stored = self.job(0, posted_days_ago=2)
+        analyzer.store.save("Python Developer", "Toronto", "Ontario", [stored], [[python_id]])
+        analyzer.store.save_snapshot("Python Developer", "Toronto", "Ontario", 1, {python_id: 1})
+        self.backdate(analyzer, 3600)
+
+        async def iterate(**kwargs):
+            # Même offre republiée sous un autre ID
+            yield [{**stored, "job_id": "repost", "job_posted_at_timestamp": time.time()}]
+
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = iterate
+        analyzer.job_search.jsearch.date_posted_window.return_value = "today"
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock()
+
+        market = await analyzer._collect_market("Python Developer", "Toronto", "Ontario", 1)
+
+        assert market["total_jobs"] == 1
+        analyzer.extractor.extract_all_skills.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_full_and_incremental_share_denominator(self):
+        analyzer = MarketAnalyzer()
+        python_id = analyzer.taxonomy.ids["Python"]
+        # Moins d'offres stockées que l'échantillon demandé (2 pages)
+        stored = [self.job(i, posted_days_ago=3) for i in range(15)]
+        analyzer.store.save("Python Developer", "Toronto", "Ontario", stored, [[python_id]] * 15)
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = pages()
+        analyzer.job_search.jsearch.date_posted_window.return_value = "today"
+        analyzer.job_search.get_last_provider.return_value = None
+        analyzer.job_search.is_last_search_complete.return_value = True
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock()
+
+        full = await analyzer._compute_market("Python Developer", "Toronto", "Ontario", 2)
+        self.backdate(analyzer, 3600)
+        incremental = await analyzer._compute_market("Python Developer", "Toronto", "Ontario", 2)
+
+        assert full["provider"] == "store"
+        assert incremental["provider"] == "snapshot"
+        assert full["total_jobs"] == incremental["total_jobs"] == 15
+        assert full["skill_counts"] == incremental["skill_counts"] == Counter({"Python": 15})
+
+    @pytest.mark.asyncio
+    async def test_posting_resaved_by_another_query_is_counted_once(self):
+        analyzer = MarketAnalyzer()
+        self.mock_cache(analyzer)
+        jobs = [{**self.job(i, posted_days_ago=1), "job_title": "Backend Software Developer"} for i in range(2)]
+        skills = [[{"name": "Python", "category": "programming_languages"}]] * 2
+        analyzer.job_search = Mock()
+        analyzer.job_search.jsearch.date_posted_window.return_value = "today"
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.job_search.is_last_search_complete.return_value = True
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock(return_value=skills)
+
+        analyzer.job_search.iter_jobs = self.postings(jobs)
+        await analyzer._compute_market("Software Developer", "Toronto", "Ontario", 1)
+        # Une autre requête réenregistre une des deux offres (fetched_at et search_query écrasés)
+        analyzer.store.save("Backend Developer", "Toronto", "Ontario", jobs[:1], [[analyzer.taxonomy.ids["Python"]]])
+        self.backdate(analyzer, 3600)
+        analyzer.job_search.iter_jobs = pages()
+        market = await analyzer._compute_market("Software Developer", "Toronto", "Ontario", 1)
+
+        assert market["provider"] == "snapshot+jsearch"
+        assert market["total_jobs"] == 2
+        assert market["skill_counts"] == Counter({"Python": 2})
+
+    @pytest.mark.asyncio
+    async def test_incomplete_search_keeps_the_watermark(self):
+        analyzer = MarketAnalyzer()
+        python_id = analyzer.taxonomy.ids["Python"]
+        analyzer.store.save("Python Developer", "Toronto", "Ontario", [self.job(0, posted_days_ago=2)], [[python_id]])
+        analyzer.store.save_snapshot("Python Developer", "Toronto", "Ontario", 1, {python_id: 1})
+        self.backdate(analyzer, 3600)
+        refreshed_at = analyzer.store.get_snapshot("Python Developer", "Toronto", "Ontario")["refreshed_at"]
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = pages()
+        analyzer.job_search.jsearch.date_posted_window.return_value = "today"
+        analyzer.job_search.get_last_provider.return_value = None
+        # Les deux providers en panne
+        analyzer.job_search.is_last_search_complete.return_value = False
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock()
+
+        market = await analyzer._compute_market("Python Developer", "Toronto", "Ontario", 1)
+
+        assert market["total_jobs"] == 1
+        assert analyzer.store.get_snapshot("Python Developer", "Toronto", "Ontario")["refreshed_at"] == refreshed_at
+
+    @pytest.mark.asyncio
+    async def test_unstored_page_keeps_the_watermark(self):
+        analyzer = MarketAnalyzer()
+        python_id = analyzer.taxonomy.ids["Python"]
+        analyzer.store.save("Python Developer", "Toronto", "Ontario", [self.job(0, posted_days_ago=2)], [[python_id]])
+        analyzer.store.save_snapshot("Python Developer", "Toronto", "Ontario", 1, {python_id: 1})
+        self.backdate(analyzer, 3600)
+        refreshed_at = analyzer.store.get_snapshot("Python Developer", "Toronto", "Ontario")["refreshed_at"]
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = self.postings([self.job(1), self.job(2)])
+        analyzer.job_search.jsearch.date_posted_window.return_value = "today"
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.job_search.is_last_search_complete.return_value = True
+        analyzer.extractor = Mock()
+        # Extraction partielle : la page n'est pas stockée
+        analyzer.extractor.extract_all_skills = AsyncMock(return_value=[
+            [{"name": "Docker", "category": "devops_tools"}],
+        ])
+
+        await analyzer._compute_market("Python Developer", "Toronto", "Ontario", 1)
+
+        assert analyzer.store.get_snapshot("Python Developer", "Toronto", "Ontario")["refreshed_at"] == refreshed_at
+
+    @pytest.mark.asyncio
+    async def test_stored_near_duplicates_are_not_counted(self):
+        analyzer = MarketAnalyzer()
+        python_id = analyzer.taxonomy.ids["Python"]
+        job = self.job(0, posted_days_ago=2)
+        analyzer.store.save("Python Developer", "Toronto", "Ontario", [job], [[python_id]])
+        # Même description stockée sous une autre requête et un autre ID
+        analyzer.store.save("Senior Python Developer", "Toronto", "Ontario", [{**job, "job_id": "repost"}], [[python_id]])
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = pages()
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.job_search.is_last_search_complete.return_value = True
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock()
+
+        market = await analyzer._compute_market("Python Developer", "Toronto", "Ontario", 2)
+
+        assert market["total_jobs"] == 1
+        assert market["duplicates_removed"] == 1
+        assert market["skill_counts"] == Counter({"Python": 1})
+
+    @pytest.mark.asyncio
+    async def test_old_snapshot_triggers_full_recompute(self):
+        analyzer = MarketAnalyzer()
+        analyzer.store.save_snapshot("Python Developer", "Toronto", "Ontario", 5, {1: 5})
+        analyzer.job_search = Mock()
+        analyzer.job_search.jsearch.date_posted_window.return_value = None
+
+        assert await analyzer._refresh_incremental("Python Developer", "Toronto", "Ontario", 1) is None
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_run_one_pipeline(self):
+        analyzer = MarketAnalyzer()
+        analyzer.cache = Mock()
+        analyzer.cache.get_cache_results.return_value = None
+        analyzer.cache.save_to_cache.return_value = True
+        release = asyncio.Event()
+        fetches = 0
+
+        async def iterate(**kwargs):
+            nonlocal fetches
+            fetches += 1
+            await release.wait()
+            yield [{"job_description": "Python developer"}]
+
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = iterate
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock(return_value=[
+            [{"name": "Python", "category": "programming_languages"}]
+        ])
+
+        requests = [
+            asyncio.create_task(analyzer.analyze_market("Data Analyst", "Montréal", "QC")),
+            asyncio.create_task(analyzer.analyze_market("data analyst", "Montreal", "Quebec")),
+            asyncio.create_task(analyzer.get_skills_by_category("Data Analyst", "Montreal", "Québec")),
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(*requests)
+
+        assert fetches == 1
+        analyzer.extractor.extract_all_skills.assert_called_once()
+        assert all(result["total_jobs_analyzed"] == 1 for result in results)
+
+
+class TestStaleWhileRevalidate:
+
+    @pytest.mark.asyncio
+    async def test_stale_result_served_and_refreshed_once(self):
+        analyzer = MarketAnalyzer()
+        analyzer.cache = Mock()
+        analyzer.cache.get_cache_results.side_effect = lambda *args, **kwargs: {
+            "query": "Python", "total_jobs_analyzed": 3, "top_skills": [], "stale": True, "cache_age": 90000
+        }
+        analyzer.cache.save_to_cache.return_value = True
+        release = asyncio.Event()
+
+        async def iterate(**kwargs):
+            await release.wait()
+            yield [{"job_description": "Python developer"}]
+
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = iterate
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.extractor = Mock()
+        analyzer.extractor.extract_all_skills = AsyncMock(return_value=[
+            [{"name": "Python", "category": "programming_languages"}]
+        ])
+
+        first = await analyzer.analyze_market("Python", "Toronto", "Ontario")
+        second = await analyzer.analyze_market("Python", "Toronto", "ON")
+
+        assert first["stale"] is True
+        assert first["from_cache"] is True
+        assert second["stale"] is True
+        assert len(analyzer._refreshes) == 1
+
+        release.set()
+        await asyncio.gather(*analyzer._refreshes.values())
+
+        analyzer.extractor.extract_all_skills.assert_called_once()
+        analyzer.cache.save_to_cache.assert_called_once()
+        assert analyzer.cache.save_to_cache.call_args.args[3]["from_cache"] is False
+
+    @pytest.mark.asyncio
+    async def test_fresh_hit_does_not_refresh(self):
+        analyzer = MarketAnalyzer()
+        analyzer.cache = Mock()
+        analyzer.cache.get_cache_results.return_value = {"query": "Python", "total_jobs_analyzed": 3}
+
+        await analyzer.get_skills_by_category("Python", "Toronto", "Ontario")
+
+        assert analyzer._refreshes == {}
+        analyzer.cache.get_cache_results.assert_called_once_with("Python", "Toronto", "Ontario", allow_stale=True)
+
 
 class TestGetSkillsByCategory:
 
@@ -145,7 +769,7 @@ class TestGetSkillsByCategory:
     async def test_no_jobs_found(self):
         analyzer = MarketAnalyzer()
         analyzer.job_search = Mock()
-        analyzer.job_search.get_job_descriptions = AsyncMock(return_value=[])
+        analyzer.job_search.iter_jobs = pages()
         analyzer.cache = Mock()
         analyzer.cache.get_cache_results.return_value = None
 
@@ -158,7 +782,7 @@ class TestGetSkillsByCategory:
     async def test_groups_by_category(self):
         analyzer = MarketAnalyzer()
         analyzer.job_search = Mock()
-        analyzer.job_search.get_job_descriptions = AsyncMock(return_value=["Job description"])
+        analyzer.job_search.iter_jobs = pages(["Job description"])
         analyzer.cache = Mock()
         analyzer.cache.get_cache_results.return_value = None
         analyzer.cache.save_to_cache.return_value = True
@@ -177,11 +801,33 @@ class TestGetSkillsByCategory:
 
         assert "skills_by_category" in result
 
+    @pytest.mark.asyncio
+    async def test_duplicate_skill_names_stay_in_ordered_categories(self):
+        analyzer = MarketAnalyzer()
+        analyzer.job_search = Mock()
+        analyzer.job_search.iter_jobs = pages([
+            f"iOS engineer {i}: Swift, Figma mockups and Snowflake reporting" for i in range(3)
+        ])
+        analyzer.job_search.get_last_provider.return_value = "jsearch"
+        analyzer.cache = Mock()
+        analyzer.cache.get_cache_results.return_value = None
+        analyzer.extractor = analyzer.local_extractor
+
+        result = await analyzer.get_skills_by_category("iOS Developer", "Toronto", "Ontario")
+
+        names = {
+            category: [skill["name"] for skill in skills]
+            for category, skills in result["skills_by_category"].items()
+        }
+        assert "Swift" in names["programming_languages"]
+        assert "Figma" in names["collaboration_tools"]
+        assert "Snowflake" in names["databases"]
+
     @pytest.mark.asyncio
     async def test_respects_category_order(self):
         analyzer = MarketAnalyzer()
         analyzer.job_search = Mock()
-        analyzer.job_search.get_job_descriptions = AsyncMock(return_value=["Job"])
+        analyzer.job_search.iter_jobs = pages(["Job"])
         analyzer.cache = Mock()
         analyzer.cache.get_cache_results.return_value = None
         analyzer.cache.save_to_cache.return_value = True
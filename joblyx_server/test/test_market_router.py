@@ -3,6 +3,7 @@ from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 from app import app
 from services.auth import get_user_id_from_token
+from services.market_analysis import ExtractionScheduler
 
 client = TestClient(app)
 
@@ -67,6 +68,23 @@ class TestAnalyzeMarketEndpoint:
             assert call_kwargs["top_n"] == 20
             assert call_kwargs["balanced"] is False
 
+    def test_analyze_market_anonymous_default_weight(self):
+        with patch('routers.market_analysis.market_analyzer.analyze_market', new_callable=AsyncMock) as mock_analyze:
+            mock_analyze.return_value = {
+                "query": "Java Developer",
+                "location": "Montreal, Quebec, Canada",
+                "total_jobs_analyzed": 0,
+                "top_skills": [],
+                "from_cache": False
+            }
+
+            client.get(
+                "/market/analyze",
+                params={"job": "Java Developer", "city": "Montreal", "province": "Quebec"}
+            )
+
+            assert mock_analyze.call_args.kwargs["weight"] == ExtractionScheduler.DEFAULT_WEIGHT
+
     def test_analyze_market_authenticated_records_quota(self):
         app.dependency_overrides[get_user_id_from_token] = mock_get_user_id
 
@@ -250,3 +268,14 @@ class TestQuotaEndpoint:
         app.dependency_overrides.clear()
         response = client.get("/market/quota")
         assert response.status_code == 422  # Missing required header
+
+
+class TestProvidersEndpoint:
+
+    def test_get_providers_health(self):
+        response = client.get("/market/providers")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data) == {"jsearch", "serpapi"}
+        assert data["jsearch"]["state"] in ("closed", "open", "half_open")
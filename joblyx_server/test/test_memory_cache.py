@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import patch
+from services.memory_cache import MemoryCache
+
+
+class TestMemoryCache:
+
+    def test_set_and_get(self):
+        cache = MemoryCache(max_bytes=10_000, max_ttl=60)
+        cache.set("python|toronto|ontario", {"total_jobs_analyzed": 10})
+
+        assert cache.get("python|toronto|ontario") == (True, {"total_jobs_analyzed": 10})
+        assert cache.get("java|toronto|ontario") == (False, None)
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_negative_entry(self):
+        cache = MemoryCache(max_bytes=10_000, max_ttl=60)
+        cache.set_miss("python|toronto|ontario", ttl=30)
+
+        assert cache.get("python|toronto|ontario") == (True, None)
+
+    @patch('services.memory_cache.time.monotonic')
+    def test_entry_expires(self, mock_time):
+        mock_time.return_value = 1000.0
+        cache = MemoryCache(max_bytes=10_000, max_ttl=60)
+        cache.set("key", {"a": 1}, ttl=10)
+
+        mock_time.return_value = 1009.0
+        assert cache.get("key") == (True, {"a": 1})
+
+        mock_time.return_value = 1010.0
+        assert cache.get("key") == (False, None)
+        assert len(cache) == 0
+
+    @patch('services.memory_cache.time.monotonic')
+    def test_ttl_capped_by_max_ttl(self, mock_time):
+        mock_time.return_value = 1000.0
+        cache = MemoryCache(max_bytes=10_000, max_ttl=60)
+        cache.set("key", {"a": 1}, ttl=86400)
+
+        mock_time.return_value = 1061.0
+        assert cache.get("key") == (False, None)
+
+    def test_expired_ttl_not_admitted(self):
+        cache = MemoryCache(max_bytes=10_000, max_ttl=60)
+        cache.set("key", {"a": 1}, ttl=-5)
+
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used_when_over_budget(self):
+        value = {"payload": "x" * 100}
+        entry_size = MemoryCache()._size("a", value)
+        cache = MemoryCache(max_bytes=entry_size * 2, max_ttl=60)
+
+        cache.set("a", value)
+        cache.set("b", value)
+        cache.get("a")
+        cache.set("c", value)
+
+        assert cache.get("b") == (False, None)
+        assert cache.get("a")[0] is True
+        assert cache.get("c")[0] is True
+        assert cache.evictions == 1
+        assert cache.get_stats()["bytes"] <= cache.max_bytes
+
+    def test_oversized_value_rejected(self):
+        cache = MemoryCache(max_bytes=100, max_ttl=60)
+        cache.set("key", {"payload": "x" * 1000})
+
+        assert len(cache) == 0
+        assert cache.get_stats()["bytes"] == 0
+
+    def test_invalidate_and_clear(self):
+        cache = MemoryCache(max_bytes=10_000, max_ttl=60)
+        cache.set("a", {"a": 1})
+        cache.set("b", {"b": 1})
+
+        assert cache.invalidate("a") is True
+        assert cache.invalidate("a") is False
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.get_stats()["bytes"] == 0
@@ -0,0 +1,80 @@
+import pytest
+from services.market_analysis.posting_dedup import PostingDeduplicator, NearDuplicateFilter, posting_fingerprint
+
+
+def job(title="Python Developer", employer="Acme Inc.", description="We need Python and Docker."):
+    return {"job_title": title, "employer_name": employer, "job_description": description}
+
+
+class TestPostingFingerprint:
+
+    def test_ignores_case_accents_and_punctuation(self):
+        assert posting_fingerprint(job("Développeur Python")) == posting_fingerprint(job("DEVELOPPEUR - python"))
+
+    def test_differs_by_employer(self):
+        assert posting_fingerprint(job(employer="Acme")) != posting_fingerprint(job(employer="Globex"))
+
+    def test_ignores_truncated_description_tail(self):
+        words = " ".join(f"word{i}" for i in range(PostingDeduplicator.DESCRIPTION_WORDS))
+        full = job(description=words + " and a long tail the other provider cut")
+
+        assert posting_fingerprint(full) == posting_fingerprint(job(description=words + "..."))
+
+    def test_handles_missing_fields(self):
+        assert posting_fingerprint({}) == posting_fingerprint({"job_title": None})
+
+
+class TestPostingDeduplicator:
+
+    def test_filters_across_calls(self):
+        dedup = PostingDeduplicator()
+
+        assert len(dedup.filter([job(), job("Java Developer")])) == 2
+        assert dedup.filter([job("python developer", "ACME inc")]) == []
+        assert dedup.duplicates == 1
+
+
+POSTING = (
+    "We are looking for a backend developer to design and maintain REST APIs in Python "
+    "with Django, deploy services on AWS using Docker and Kubernetes, write automated tests "
+    "and collaborate with product managers in an agile team based in Toronto."
+)
+
+
+class TestNearDuplicateFilter:
+
+    def test_identical_signatures(self):
+        near = NearDuplicateFilter()
+
+        assert near.signature(POSTING) == near.signature(POSTING.upper())
+        assert len(near.signature(POSTING)) == NearDuplicateFilter.NUM_PERMUTATIONS
+
+    def test_minor_edit_is_duplicate(self):
+        near = NearDuplicateFilter(threshold=0.7)
+        repost = POSTING.replace("Toronto", "Toronto, Ontario") + " Apply through our recruiting partner."
+
+        assert near.filter([POSTING, repost]) == [POSTING]
+        assert near.removed == 1
+
+    def test_different_posting_kept(self):
+        near = NearDuplicateFilter()
+        other = (
+            "Join our mobile team as an iOS engineer building Swift applications, "
+            "integrating GraphQL services and shipping features every two weeks."
+        )
+
+        assert near.filter([POSTING, other]) == [POSTING, other]
+        assert near.removed == 0
+
+    def test_threshold_is_tunable(self):
+        edited = POSTING.replace("REST APIs", "GraphQL services").replace("Toronto", "Ottawa")
+        strict = NearDuplicateFilter(threshold=1.0)
+        loose = NearDuplicateFilter(threshold=0.5)
+
+        assert strict.filter([POSTING, edited]) == [POSTING, edited]
+        assert loose.filter([POSTING, edited]) == [POSTING]
+
+    def test_short_descriptions(self):
+        near = NearDuplicateFilter()
+
+        assert near.filter(["Python", "Java", "Python"]) == ["Python", "Java"]
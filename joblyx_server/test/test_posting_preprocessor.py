@@ -0,0 +1,107 @@
+import pytest
+from services.market_analysis.posting_preprocessor import PostingPreprocessor, posting_preprocessor
+
+
+@pytest.fixture
+def html_posting():
+    return (
+        "<p>About us</p><p>" + "Acme builds widgets and loves its customers. " * 60 + "</p>"
+        "<h3>What you'll do</h3><ul><li>Build APIs with Django</li><li>Maintain services</li></ul>"
+        "<h3>Benefits</h3><ul><li>Dental &amp; health</li></ul>"
+        "<b>Requirements:</b><ul><li>Python, PostgreSQL, Docker</li><li>AWS and Kubernetes</li></ul>"
+        "<p>Acme is an equal opportunity employer.</p>"
+    )
+
+
+class TestStripHtml:
+
+    def test_removes_tags_and_entities(self):
+        text = posting_preprocessor.strip_html("<ul><li>Dental &amp; health</li><li>Gym</li></ul>")
+        assert text == "Dental & health\nGym"
+
+    def test_plain_text_unchanged(self):
+        assert posting_preprocessor.strip_html("Python developer") == "Python developer"
+
+
+class TestSplitSections:
+
+    def test_detects_english_headings(self, html_posting):
+        kinds = [s["kind"] for s in posting_preprocessor.split_sections(html_posting)]
+
+        assert kinds == ["boilerplate", "responsibilities", "boilerplate", "requirements"]
+
+    def test_detects_french_headings(self, sample_job_description_fr):
+        kinds = [s["kind"] for s in posting_preprocessor.split_sections(sample_job_description_fr)]
+
+        assert "requirements" in kinds
+        assert "nice_to_have" in kinds
+
+    def test_inline_heading(self):
+        sections = posting_preprocessor.split_sections("Intro line\nQualifications: Python, Go")
+
+        assert sections[-1]["kind"] == "requirements"
+        assert "Python, Go" in sections[-1]["text"]
+
+    def test_long_sentence_is_not_heading(self):
+        sections = posting_preprocessor.split_sections("Skills and passion matter a lot to our wonderful growing team")
+
+        assert sections[0]["kind"] == "intro"
+
+    def test_about_the_role_is_responsibilities(self):
+        sections = posting_preprocessor.split_sections("About Us\nAcme builds widgets.\nAbout the Role\nBuild APIs with Django")
+
+        assert [s["kind"] for s in sections] == ["boilerplate", "responsibilities"]
+
+    def test_bullets_starting_with_heading_words_are_content(self):
+        posting = "Requirements\n- Python and Docker\n- Benefits analysis experience\nSalary negotiation skills\n- AWS"
+        sections = posting_preprocessor.split_sections(posting)
+
+        assert [s["kind"] for s in sections] == ["requirements"]
+
+    def test_combined_bare_heading(self):
+        sections = posting_preprocessor.split_sections("Intro line\nBenefits & Perks\nDental")
+
+        assert sections[-1]["kind"] == "boilerplate"
+
+    def test_drops_eeo_lines(self, html_posting):
+        text = "\n".join(s["text"] for s in posting_preprocessor.split_sections(html_posting))
+
+        assert "equal opportunity" not in text
+
+
+class TestPrepare:
+
+    def test_short_posting_kept_without_boilerplate(self, html_posting):
+        prepared = posting_preprocessor.prepare(html_posting, token_budget=2000)
+
+        assert "Python, PostgreSQL, Docker" in prepared
+        assert "Dental" not in prepared
+        assert "Acme builds widgets" not in prepared
+
+    def test_requirements_kept_under_tight_budget(self):
+        posting = (
+            "Join us!\n" + "We are a fast growing company with great culture.\n" * 40
+            + "Requirements:\n- Python and PostgreSQL\n- Docker, AWS"
+        )
+
+        prepared = posting_preprocessor.prepare(posting, token_budget=60)
+
+        assert "Python and PostgreSQL" in prepared
+        assert len(prepared) <= 60 * PostingPreprocessor.CHARS_PER_TOKEN
+
+    def test_respects_budget(self, sample_job_description_en):
+        prepared = posting_preprocessor.prepare(sample_job_description_en * 10, token_budget=100)
+
+        assert len(prepared) <= 100 * PostingPreprocessor.CHARS_PER_TOKEN
+
+    def test_keeps_skills_under_boilerplate_heading(self):
+        posting = "Requirements:\n- Python\nWhat we offer\n- Mentoring on Kubernetes and Terraform\n- Dental"
+
+        prepared = posting_preprocessor.prepare(posting, token_budget=500)
+
+        assert "Kubernetes and Terraform" in prepared
+
+    def test_all_boilerplate_falls_back_to_truncation(self):
+        prepared = posting_preprocessor.prepare("About us\nWe use Python everywhere", token_budget=100)
+
+        assert "Python" in prepared
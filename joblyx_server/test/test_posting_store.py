@@ -0,0 +1,93 @@
+import time
+import pytest
+from services.market_analysis.posting_store import PostingStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PostingStore(tmp_path / "postings.sqlite3", max_age_days=30)
+
+
+def job(job_id, title="Python Developer", description="Python and Django", posted_days_ago=1, provider="jsearch"):
+    return {
+        "job_id": job_id,
+        "provider": provider,
+        "job_title": title,
+        "employer_name": "Acme",
+        "job_description": description,
+        "job_posted_at_timestamp": time.time() - posted_days_ago * 86400,
+    }
+
+
+class TestPostingKey:
+
+    def test_uses_provider_and_job_id(self):
+        assert PostingStore.posting_key(job("abc")) == "jsearch:abc"
+        assert PostingStore.posting_key(job("abc", provider="serpapi")) == "serpapi:abc"
+
+    def test_falls_back_to_fingerprint(self):
+        key = PostingStore.posting_key({"job_title": "Dev", "job_description": "Python"})
+        assert key.startswith("fp:")
+
+
+class TestPostingStore:
+
+    def test_save_and_find_by_location(self, store):
+        store.save("Python Developer", "Montréal", "Québec", [job("1"), job("2")], [[1, 2], [1]])
+
+        found = store.find("python developer", "Montreal", "Quebec")
+
+        assert len(found) == 2
+        assert sorted(p["skill_ids"] for p in found) == [[1], [1, 2]]
+        assert store.find("Python Developer", "Toronto", "Ontario") == []
+
+    def test_find_matches_title_words_for_new_query(self, store):
+        store.save("Software Engineer", "Toronto", "Ontario", [
+            job("1", title="Senior Python Developer"),
+            job("2", title="Java Developer"),
+        ], [[1], [2]])
+
+        found = store.find("Python Developer", "Toronto", "Ontario")
+
+        assert [p["key"] for p in found] == ["jsearch:1"]
+
+    def test_find_skips_old_postings(self, store):
+        store.save("Python Developer", "Toronto", "Ontario", [
+            job("recent", posted_days_ago=2),
+            job("old", posted_days_ago=45),
+        ], [[1], [1]])
+
+        found = store.find("Python Developer", "Toronto", "Ontario")
+
+        assert [p["key"] for p in found] == ["jsearch:recent"]
+
+    def test_purge_old_postings(self, store):
+        store.save("Python Developer", "Toronto", "Ontario", [
+            job("recent", posted_days_ago=2),
+            job("old", posted_days_ago=45),
+        ], [[1], [1]])
+
+        assert store.purge() == 1
+        assert len(store) == 1
+
+    def test_save_replaces_existing_posting(self, store):
+        store.save("Python Developer", "Toronto", "Ontario", [job("1")], [[1]])
+        store.save("Python Developer", "Toronto", "Ontario", [job("1")], [[1, 3]])
+
+        assert len(store) == 1
+        assert store.find("Python Developer", "Toronto", "Ontario")[0]["skill_ids"] == [1, 3]
+
+
+class TestMarketSnapshots:
+
+    def test_save_and_get_snapshot(self, store):
+        store.save_snapshot("Python Developer", "Montréal", "Québec", 12, {1: 5, 3: 2})
+
+        snapshot = store.get_snapshot("python developer", "Montreal", "Quebec")
+
+        assert snapshot["total_jobs"] == 12
+        assert snapshot["skill_counts"] == {1: 5, 3: 2}
+        assert snapshot["refreshed_at"] <= time.time()
+
+    def test_missing_snapshot(self, store):
+        assert store.get_snapshot("Python Developer", "Toronto", "Ontario") is None
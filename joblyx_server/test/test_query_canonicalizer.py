@@ -0,0 +1,65 @@
+import pytest
+from services.query_canonicalizer import QueryCanonicalizer, normalize_text
+from services.market_analysis.jsearch_service import normalize_text as jsearch_normalize_text
+from services.market_analysis.serpapi_service import normalize_text as serpapi_normalize_text
+
+
+@pytest.fixture
+def canonicalizer():
+    return QueryCanonicalizer()
+
+
+class TestNormalizeText:
+
+    def test_strips_accents(self):
+        assert normalize_text("Développeur Québec") == "Developpeur Quebec"
+
+    def test_still_importable_from_providers(self):
+        assert jsearch_normalize_text is normalize_text
+        assert serpapi_normalize_text is normalize_text
+
+
+class TestCanonicalQuery:
+
+    def test_abbreviations_and_seniority_order(self, canonicalizer):
+        expected = "senior software developer"
+
+        assert canonicalizer.canonical_query("Sr. Software Dev") == expected
+        assert canonicalizer.canonical_query("senior software developer") == expected
+        assert canonicalizer.canonical_query("Software Developer Senior") == expected
+
+    def test_french_titles_and_stop_words(self, canonicalizer):
+        assert canonicalizer.canonical_query("Analyste de données") == "analyst data"
+        assert canonicalizer.canonical_query("Développeur Jr") == "junior developer"
+
+    def test_keeps_language_symbols(self, canonicalizer):
+        assert canonicalizer.canonical_query("C++ Developer") == "c++ developer"
+        assert canonicalizer.canonical_query("C# dev") == "c# developer"
+
+
+class TestCanonicalLocation:
+
+    @pytest.mark.parametrize("province", ["Québec", "QC", "quebec", " Que. "])
+    def test_province_codes_and_names(self, canonicalizer, province):
+        assert canonicalizer.canonical_province(province) == "quebec"
+
+    def test_french_province_name(self, canonicalizer):
+        assert canonicalizer.canonical_province("Colombie-Britannique") == "british columbia"
+
+    def test_unknown_province_kept(self, canonicalizer):
+        assert canonicalizer.canonical_province("Atlantis") == "atlantis"
+
+    def test_city_saint_prefix(self, canonicalizer):
+        assert canonicalizer.canonical_city("St-Jérôme") == canonicalizer.canonical_city("Saint Jerome")
+
+
+class TestKey:
+
+    def test_equivalent_searches_share_key(self, canonicalizer):
+        first = canonicalizer.key("Sr. Software Dev", "Montréal", "QC")
+        second = canonicalizer.key("Software Developer Senior", "montreal", "Québec")
+
+        assert first == second == "senior software developer|montreal|quebec"
+
+    def test_different_markets_differ(self, canonicalizer):
+        assert canonicalizer.key("Data Analyst", "Toronto", "ON") != canonicalizer.key("Data Analyst", "Ottawa", "ON")
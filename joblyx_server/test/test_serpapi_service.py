@@ -1,8 +1,9 @@
 import pytest
+import asyncio
 from unittest.mock import patch, Mock, AsyncMock
 import httpx
 from services.market_analysis import SerpAPIService, serpapi_service
-from services.market_analysis.serpapi_service import normalize_text
+from services.market_analysis.serpapi_service import normalize_text, parse_posted_at
 
 
 class TestNormalizeText:
@@ -15,6 +16,21 @@ class TestNormalizeText:
         assert normalize_text("Developer") == "Developer"
 
 
+class TestParsePostedAt:
+
+    def test_relative_dates(self):
+        import time
+        now = time.time()
+
+        assert parse_posted_at("3 days ago") == pytest.approx(now - 3 * 86400, abs=5)
+        assert parse_posted_at("30+ days ago") == pytest.approx(now - 30 * 86400, abs=5)
+        assert parse_posted_at("5 hours ago") == pytest.approx(now - 5 * 3600, abs=5)
+
+    def test_unknown_format(self):
+        assert parse_posted_at(None) is None
+        assert parse_posted_at("Full-time") is None
+
+
 class TestSerpAPIService:
 
     def test_instance_created(self):
@@ -89,9 +105,9 @@ class TestSearchJobs:
             mock_client.get.side_effect = httpx.RequestError("API Error")
             mock_client_class.return_value.__aenter__.return_value = mock_client
 
-            jobs = await service.search_jobs("Developer", "Toronto", num_pages=1)
-
-            assert jobs == []
+            # L'erreur remonte jusqu'au disjoncteur du provider
+            with pytest.raises(httpx.RequestError):
+                await service.search_jobs("Developer", "Toronto", num_pages=1)
 
     @pytest.mark.asyncio
     async def test_search_jobs_params(self):
@@ -116,6 +132,77 @@ class TestSearchJobs:
             assert "Python Developer" in params["q"]
 
 
+class TestPagination:
+
+    @staticmethod
+    def page(title, next_page_token=None):
+        data = {"jobs_results": [{"title": title, "description": f"{title} description"}]}
+        if next_page_token:
+            data["serpapi_pagination"] = {"next_page_token": next_page_token}
+        return data
+
+    @pytest.mark.asyncio
+    async def test_prefetches_next_page_before_consumer_resumes(self):
+        service = SerpAPIService()
+        pages = {None: self.page("Page 1", "tok2"), "tok2": self.page("Page 2")}
+        requested = []
+
+        async def fetch(params):
+            requested.append(params.get("next_page_token"))
+            return pages[params.get("next_page_token")]
+
+        service._fetch_page = fetch
+        iterator = service.iter_pages("Developer", "Toronto", num_pages=2)
+
+        first = await iterator.__anext__()
+        # Laisser tourner la tâche de préchargement sans consommer la page 2
+        await asyncio.sleep(0)
+
+        assert first[0]["job_title"] == "Page 1"
+        assert requested == [None, "tok2"]
+
+        rest = [jobs async for jobs in iterator]
+        assert rest[0][0]["job_title"] == "Page 2"
+
+    @pytest.mark.asyncio
+    async def test_respects_num_pages(self):
+        service = SerpAPIService()
+        service._fetch_page = AsyncMock(return_value=self.page("Job", "next"))
+
+        jobs = await service.search_jobs("Developer", "Toronto", num_pages=3)
+
+        assert len(jobs) == 3
+        assert service._fetch_page.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_http_status_error_propagates(self):
+        service = SerpAPIService()
+        request = httpx.Request("GET", SerpAPIService.BASE_URL)
+        error = httpx.HTTPStatusError("Unauthorized", request=request, response=httpx.Response(401, request=request))
+        service._fetch_page = AsyncMock(side_effect=error)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await service.search_jobs("Developer", "Toronto", num_pages=2)
+        assert service._fetch_page.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_client_error_reports_body_without_api_key(self, capsys):
+        service = SerpAPIService()
+        service.api_key = "secret-key"
+
+        def transport(request):
+            return httpx.Response(401, request=request, json={"error": "Invalid API key."})
+
+        service.http = httpx.AsyncClient(transport=httpx.MockTransport(transport))
+
+        with pytest.raises(httpx.HTTPStatusError) as error:
+            await service.search_jobs("Developer", "Toronto", num_pages=1)
+
+        assert "Invalid API key." in str(error.value)
+        assert "secret-key" not in str(error.value)
+        assert "secret-key" not in capsys.readouterr().out
+
+
 class TestGetJobDescriptions:
 
     @pytest.mark.asyncio
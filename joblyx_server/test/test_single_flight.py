@@ -0,0 +1,126 @@
+import pytest
+import asyncio
+from services.market_analysis.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_computation(self):
+        flights = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"total_jobs": 10}
+
+        waiters = [asyncio.create_task(flights.do("data analyst|montreal|quebec", compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert calls == 1
+        assert flights.coalesced == 4
+        assert all(result == {"total_jobs": 10} for result in results)
+        assert flights.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_all_waiters(self):
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            raise RuntimeError("provider down")
+
+        waiters = [asyncio.create_task(flights.do("key", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flights.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_next_call_recomputes_after_completion(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flights.do("key", compute) == 1
+        assert await flights.do("key", compute) == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "done"
+
+        leader = asyncio.create_task(flights.do("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("key", compute))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await follower == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    @pytest.mark.asyncio
+    async def test_computation_cancelled_when_nobody_waits(self):
+        flights = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def compute():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flights.do("key", compute))
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_join_during_cancellation_recomputes(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            call = calls
+            try:
+                await asyncio.sleep(0.05)
+            except asyncio.CancelledError:
+                # Nettoyage lent : la tâche annulée n'est pas encore terminée
+                await asyncio.sleep(0.05)
+                raise
+            return call
+
+        waiter = asyncio.create_task(flights.do("key", compute))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        assert await flights.do("key", compute) == 2
+        assert flights.coalesced == 0
+
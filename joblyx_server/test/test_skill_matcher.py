@@ -0,0 +1,119 @@
+import pytest
+from services.market_analysis import SkillMatcher, skill_matcher
+from services.market_analysis.skill_matcher import fold_text
+
+
+class TestFoldText:
+
+    def test_removes_accents_and_lowercases(self):
+        assert fold_text("Résolution") == "resolution"
+
+    def test_preserves_length(self):
+        text = "Développeur C++ / Node.js — Montréal"
+        assert len(fold_text(text)) == len(text)
+
+    def test_hyphen_becomes_space(self):
+        assert fold_text("problem-solving") == "problem solving"
+
+
+class TestSkillMatcher:
+
+    def test_instance_created(self):
+        assert skill_matcher is not None
+        assert isinstance(skill_matcher, SkillMatcher)
+
+    def test_terms_loaded(self):
+        assert len(skill_matcher.terms) > len(skill_matcher.taxonomy)
+
+    def test_terms_come_from_taxonomy_index(self):
+        for key, (term, skill_name, case_sensitive) in skill_matcher.terms.items():
+            assert skill_matcher.taxonomy.names[skill_matcher.taxonomy.lookup[key]] == skill_name
+
+    def test_short_variants_are_case_sensitive(self):
+        assert "JavaScript" in skill_matcher.extract_skills("Strong JS skills")
+        assert "JavaScript" not in skill_matcher.extract_skills("let js = 1")
+
+    def test_extracts_english_description(self, sample_job_description_en):
+        skills = skill_matcher.extract_skills(sample_job_description_en)
+
+        for expected in ["Python", "JavaScript", "React", "Node.js", "PostgreSQL", "Docker", "Git"]:
+            assert expected in skills
+
+    def test_extracts_french_description(self, sample_job_description_fr):
+        skills = skill_matcher.extract_skills(sample_job_description_fr)
+
+        assert "Java" in skills
+        assert "Spring Boot" in skills
+        assert "MySQL" in skills
+
+    def test_variants_map_to_canonical(self):
+        skills = skill_matcher.extract_skills("Experience with golang and python3")
+
+        assert "Go" in skills
+        assert "Python" in skills
+
+    def test_word_boundaries(self):
+        skills = skill_matcher.extract_skills("Strong JavaScript skills")
+
+        assert "JavaScript" in skills
+        assert "Java" not in skills
+
+    def test_longest_match_wins(self):
+        skills = skill_matcher.extract_skills("Modern C++ developer")
+
+        assert "C++" in skills
+        assert "C" not in skills
+
+    def test_single_letters_need_strict_boundaries(self):
+        skills = skill_matcher.extract_skills("Join our R&D team, Ph.D. preferred")
+
+        assert "R" not in skills
+        assert "D" not in skills
+
+    def test_ambiguous_names(self, sample_job_description_ambiguous):
+        skills = skill_matcher.extract_skills(sample_job_description_ambiguous)
+
+        for expected in ["C", "Go", "R", "Rust", "Swift"]:
+            assert expected in skills
+
+    def test_short_variants_are_case_sensitive(self):
+        assert "TypeScript" in skill_matcher.extract_skills("Stack: JS / TS")
+        assert "TypeScript" not in skill_matcher.extract_skills("the ts file")
+
+    def test_no_duplicates(self):
+        skills = skill_matcher.extract_skills("Python, python, PYTHON and py3k")
+        assert skills.count("Python") == 1
+
+    def test_empty_text(self):
+        assert skill_matcher.extract_skills("") == []
+
+
+class TestExtractSkillsList:
+
+    def test_format_and_categories(self):
+        result = skill_matcher.extract_skills_list("Python and React with PostgreSQL")
+
+        skill_map = {s["name"]: s["category"] for s in result}
+        assert skill_map["Python"] == "programming_languages"
+        assert skill_map["React"] == "frontend_frameworks"
+        assert skill_map["PostgreSQL"] == "databases"
+
+    def test_duplicate_names_keep_primary_category(self):
+        # Swift, Figma et Snowflake sont déclarés dans deux catégories de skills.json
+        result = skill_matcher.extract_skills_list("Swift, Figma and Snowflake")
+
+        skill_map = {s["name"]: s["category"] for s in result}
+        assert skill_map == {
+            "Swift": "programming_languages",
+            "Figma": "collaboration_tools",
+            "Snowflake": "databases",
+        }
+
+    @pytest.mark.asyncio
+    async def test_extract_all_skills(self):
+        results = await skill_matcher.extract_all_skills(["Python developer", "Java developer", ""])
+
+        assert len(results) == 3
+        assert results[0][0]["name"] == "Python"
+        assert results[1][0]["name"] == "Java"
+        assert results[2] == []
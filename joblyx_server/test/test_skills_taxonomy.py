@@ -0,0 +1,139 @@
+import os
+import json
+import pickle
+from pathlib import Path
+import pytest
+from services.market_analysis import SkillsTaxonomy, skills_taxonomy
+from services.market_analysis.skills_taxonomy import fold_text
+
+
+@pytest.fixture
+def skills_file(tmp_path):
+    path = tmp_path / "skills.json"
+    path.write_text(json.dumps({
+        "IT": {
+            "programming_languages": [
+                {"id": 1, "name": "Python", "variants": ["python3"]},
+                {"id": 2, "name": "JavaScript", "variants": ["js", "Java Script"]},
+            ],
+            "databases": [
+                {"id": 3, "name": "PostgreSQL", "variants": ["postgres", "python3"]},
+            ],
+        }
+    }), encoding="utf-8")
+    return path
+
+
+class TestSkillsTaxonomy:
+
+    def test_instance_created(self):
+        assert isinstance(skills_taxonomy, SkillsTaxonomy)
+        assert len(skills_taxonomy) > 1000
+
+    def test_fold_text_reexported(self):
+        assert fold_text("Développeur") == "developpeur"
+
+    def test_category_lookup(self):
+        assert skills_taxonomy.category_of("Python") == "programming_languages"
+        assert skills_taxonomy.category_of("Unknown Skill") == "other"
+
+    def test_duplicate_names_keep_first_declared_category(self):
+        # Noms présents deux fois dans le vrai skills.json
+        assert skills_taxonomy.category_of("Swift") == "programming_languages"
+        assert skills_taxonomy.category_of("Figma") == "collaboration_tools"
+        assert skills_taxonomy.category_of("Snowflake") == "databases"
+        assert skills_taxonomy.category_of("BigQuery") == "databases"
+        assert skills_taxonomy.category_of("Redshift") == "databases"
+
+    def test_duplicate_names_resolve_to_first_id(self):
+        for name, skill_id in skills_taxonomy.ids.items():
+            first = min(i for i, n in skills_taxonomy.names.items() if n == name)
+            assert skill_id == first, name
+
+    def test_resolve_name_and_variant(self, skills_file, tmp_path):
+        taxonomy = SkillsTaxonomy.load(skills_file, tmp_path / "skills.pickle")
+
+        assert taxonomy.resolve("PYTHON") == 1
+        assert taxonomy.resolve("Java-Script") == 2
+        assert taxonomy.resolve("postgres") == 3
+        assert taxonomy.resolve("Cobol") is None
+
+    def test_canonical_name_wins_over_variant(self, skills_file, tmp_path):
+        taxonomy = SkillsTaxonomy.load(skills_file, tmp_path / "skills.pickle")
+
+        # "python3" est variante de deux skills : le premier déclaré l'emporte
+        assert taxonomy.resolve("python3") == 1
+
+    def test_category_masks(self, skills_file, tmp_path):
+        taxonomy = SkillsTaxonomy.load(skills_file, tmp_path / "skills.pickle")
+
+        assert taxonomy.in_category(1, "programming_languages")
+        assert not taxonomy.in_category(3, "programming_languages")
+        assert taxonomy.ids_in_category("databases") == [3]
+        assert taxonomy.categories_of_mask(taxonomy.mask_of([1, 3])) == ["programming_languages", "databases"]
+        assert taxonomy.categories_of_mask(taxonomy.mask_of([2])) == ["programming_languages"]
+
+    def test_category_of_variant(self, skills_file, tmp_path):
+        taxonomy = SkillsTaxonomy.load(skills_file, tmp_path / "skills.pickle")
+
+        assert taxonomy.category_of("postgres") == "databases"
+
+    def test_by_category_in_file_order(self, skills_file, tmp_path):
+        taxonomy = SkillsTaxonomy.load(skills_file, tmp_path / "skills.pickle")
+
+        assert taxonomy.by_category["programming_languages"] == ["Python", "JavaScript"]
+        assert taxonomy.by_category["databases"] == ["PostgreSQL"]
+        assert taxonomy.variants[2] == ("js", "Java Script")
+
+    def test_artifact_written_and_reused(self, skills_file, tmp_path):
+        artifact = tmp_path / "skills.pickle"
+        SkillsTaxonomy.load(skills_file, artifact)
+
+        assert artifact.exists()
+
+        with open(artifact, "rb") as f:
+            data = pickle.load(f)
+        data["names"][1] = "Python (from artifact)"
+        with open(artifact, "wb") as f:
+            pickle.dump(data, f)
+
+        taxonomy = SkillsTaxonomy.load(skills_file, artifact)
+        assert taxonomy.names[1] == "Python (from artifact)"
+
+    def test_artifact_rebuilt_when_source_changes(self, skills_file, tmp_path):
+        artifact = tmp_path / "skills.pickle"
+        first = SkillsTaxonomy.load(skills_file, artifact)
+
+        data = json.loads(skills_file.read_text(encoding="utf-8"))
+        data["IT"]["databases"].append({"id": 4, "name": "Redis", "variants": []})
+        skills_file.write_text(json.dumps(data), encoding="utf-8")
+
+        second = SkillsTaxonomy.load(skills_file, artifact)
+        assert second.version != first.version
+        assert second.category_of("Redis") == "databases"
+
+    def test_corrupted_artifact_is_recompiled(self, skills_file, tmp_path):
+        artifact = tmp_path / "skills.pickle"
+        artifact.write_bytes(b"not a pickle")
+
+        taxonomy = SkillsTaxonomy.load(skills_file, artifact)
+        assert taxonomy.category_of("JavaScript") == "programming_languages"
+        assert pickle.loads(artifact.read_bytes())["version"] == taxonomy.version
+
+    def test_artifact_replaced_atomically(self, skills_file, tmp_path, monkeypatch):
+        artifact = tmp_path / "skills.pickle"
+        artifact.write_bytes(b"previous artifact")
+        replaced = []
+        real_replace = os.replace
+
+        def spy_replace(src, dst):
+            # Le contenu complet existe déjà sous un autre nom avant le renommage
+            assert pickle.loads(Path(src).read_bytes())["names"][1] == "Python"
+            replaced.append(dst)
+            real_replace(src, dst)
+
+        monkeypatch.setattr(os, "replace", spy_replace)
+        SkillsTaxonomy.load(skills_file, artifact)
+
+        assert replaced == [artifact]
+        assert list(tmp_path.glob("*.tmp")) == []
@@ -43,6 +43,27 @@ class TestRecordSearch:
         assert call_args["province"] == "Quebec"
         assert call_args["total_jobs"] == 25
 
+    @patch('services.user.user_history.supabase')
+    def test_repeated_search_updates_latest_entry(self, mock_supabase):
+        latest = MagicMock()
+        latest.data = [{"id": "search-1", "query": "Sr. Java Dev", "city": "Montréal", "province": "QC"}]
+        mock_supabase.table.return_value.select.return_value.eq.return_value.order.return_value.limit.return_value.execute.return_value = latest
+
+        history = UserHistory()
+        result = history.record_search(
+            user_id="user-123",
+            query="Senior Java Developer",
+            city="Montreal",
+            province="Quebec",
+            results={"skills": ["Java"]},
+            total_jobs=30
+        )
+
+        assert result is True
+        mock_supabase.table.return_value.insert.assert_not_called()
+        update_args = mock_supabase.table.return_value.update.call_args[0][0]
+        assert update_args == {"results": {"skills": ["Java"]}, "total_jobs": 30}
+
     @patch('services.user.user_history.supabase')
     def test_record_search_error_returns_false(self, mock_supabase):
         mock_supabase.table.return_value.insert.side_effect = Exception("DB Error")